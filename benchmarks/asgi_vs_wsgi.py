@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from benchmarks.common import setup_django
+
+SERVERS = {
+    "wsgi": [
+        "gunicorn",
+        "src.core.wsgi:application",
+        "--worker-class",
+        "gthread",
+        "--workers",
+        "1",
+        "--threads",
+        "{threads}",
+        "--bind",
+        "127.0.0.1:{port}",
+        "--log-level",
+        "warning",
+    ],
+    "asgi": [
+        "uvicorn",
+        "src.core.asgi:application",
+        "--workers",
+        "1",
+        "--port",
+        "{port}",
+        "--log-level",
+        "warning",
+    ],
+}
+SCENARIOS = [
+    ("wsgi", "/api/events/"),
+    ("asgi", "/api/events/"),
+    ("asgi", "/api/async/events/"),
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_kb(pid: int) -> int:
+    total = 0
+    pids = [pid]
+    children = Path(f"/proc/{pid}/task/{pid}/children")
+    if children.exists():
+        pids += [int(p) for p in children.read_text().split()]
+    for p in pids:
+        for line in Path(f"/proc/{p}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                total += int(line.split()[1])
+    return total
+
+
+async def connection_loop(port, path, token, deadline, stats):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+        f"Authorization: Bearer {token}\r\nConnection: keep-alive\r\n\r\n"
+    ).encode()
+    try:
+        while time.perf_counter() < deadline:
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head.split(b" ", 2)[1])
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            stats["ok" if status == 200 else "errors"] += 1
+    finally:
+        writer.close()
+
+
+async def load(port, path, token, concurrency, duration, pid):
+    stats = {"ok": 0, "errors": 0}
+    deadline = time.perf_counter() + duration
+    tasks = [
+        asyncio.create_task(connection_loop(port, path, token, deadline, stats))
+        for _ in range(concurrency)
+    ]
+    peak = 0
+    while not all(t.done() for t in tasks):
+        peak = max(peak, rss_kb(pid))
+        await asyncio.sleep(0.2)
+    failed = sum(1 for t in tasks if t.exception() is not None)
+    return stats, peak, failed
+
+
+def wait_ready(port: int, timeout: float = 20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Сервер на порту {port} не запустился")
+
+
+def run_scenario(server, path, token, args, env):
+    port = free_port()
+    cmd = [part.format(port=port, threads=args.threads) for part in SERVERS[server]]
+    proc = subprocess.Popen(cmd, env=env)
+    try:
+        wait_ready(port)
+        asyncio.run(load(port, path, token, 1, 1, proc.pid))
+        idle = rss_kb(proc.pid)
+        stats, peak, failed = asyncio.run(
+            load(port, path, token, args.concurrency, args.duration, proc.pid)
+        )
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {
+        "server": server,
+        "path": path,
+        "rps": round(stats["ok"] / args.duration, 1),
+        "errors": stats["errors"] + failed,
+        "idle_rss_kb": idle,
+        "peak_rss_kb": peak,
+        "kb_per_connection": round((peak - idle) / args.concurrency, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="RPS и память на соединение: WSGI (gunicorn) против ASGI (uvicorn)"
+    )
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.sqlite3")
+        setup_django(test_db_name=db_path)
+
+        from django.contrib.auth.models import User
+        from django.db import connection
+
+        from src.authz.tokens import UserRefreshToken
+        from src.events.models import Event, Venue
+
+        now = datetime.now(timezone.utc)
+        venue = Venue.objects.create(name="Bench venue", external_id=uuid.uuid4())
+        Event.objects.bulk_create(
+            Event(
+                name=f"Bench event {i}",
+                external_id=uuid.uuid4(),
+                event_date=now + timedelta(days=i),
+                changed_at=now,
+                venue=venue,
+            )
+            for i in range(args.events)
+        )
+        user = User.objects.create_user(username="bench", password="bench-password")
+        token = str(UserRefreshToken.for_user(user).access_token)
+        connection.close()
+
+        env = {**os.environ, "SQLITE_PATH": db_path}
+        report = [
+            run_scenario(server, path, token, args, env) for server, path in SCENARIOS
+        ]
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
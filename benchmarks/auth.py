@@ -0,0 +1,66 @@
+import argparse
+import json
+from unittest.mock import patch
+
+from benchmarks.common import measure, setup_django
+
+# Режим: (класс аутентификации, JWT_USER_ACTIVE_CACHE_TTL). TTL задан явно, чтобы
+# результат не зависел от .env: stateless без проверки is_active не ходит в БД
+# вовсе, с проверкой — замеряется на прогретом кэше Redis.
+MODES = {
+    "db": ("rest_framework_simplejwt.authentication.JWTAuthentication", 0),
+    "stateless": ("src.authz.authentication.StatelessJWTAuthentication", 0),
+    "stateless_active_cache": (
+        "src.authz.authentication.StatelessJWTAuthentication",
+        30,
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Запросы к БД и задержка /api/events/ для режимов JWT-аутентификации"
+    )
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+
+    import redis
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.utils.module_loading import import_string
+
+    from src.authz.tokens import UserRefreshToken
+    from src.core.redis_client import get_redis
+    from src.events.views import EventViewSet
+
+    try:
+        redis_up = get_redis().ping()
+    except redis.RedisError:
+        redis_up = False
+
+    user = User.objects.create_user(username="bench", password="bench-password")
+    access = str(UserRefreshToken.for_user(user).access_token)
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def request():
+        resp = client.get("/api/events/")
+        assert resp.status_code == 200, resp.status_code
+
+    report = {}
+    for mode, (path, ttl) in MODES.items():
+        if ttl and not redis_up:
+            report[mode] = {"skipped": "нужен Redis (REDIS_URL)"}
+            continue
+        EventViewSet.authentication_classes = [import_string(path)]
+        with patch("src.authz.authentication.JWT_USER_ACTIVE_CACHE_TTL", ttl):
+            # Первый запрос прогревает кэш is_active.
+            request()
+            report[mode] = measure(request, args.iterations)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import os
+import statistics
+import time
+
+import django
+
+
+def setup_django(test_db_name: str | None = None, **env):
+    for key, value in env.items():
+        os.environ.setdefault(key, str(value))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.core.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmarks-secret-key-not-for-production")
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    if test_db_name:
+        connection.settings_dict["TEST"]["NAME"] = test_db_name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def measure(fn, iterations: int) -> dict:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    samples = []
+    queries = 0
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - started)
+        queries += len(ctx.captured_queries)
+    result = summarize(samples)
+    result["queries_per_call"] = round(queries / iterations, 2)
+    return result
@@ -0,0 +1,73 @@
+import argparse
+import json
+import sys
+
+# Для этих метрик больше — лучше, для остальных (мс, секунды, запросы) — хуже.
+HIGHER_IS_BETTER = ("per_sec",)
+COMPARED = (
+    "p50_ms",
+    "p95_ms",
+    "queries_per_call",
+    "queries_per_message",
+    "seconds",
+    "per_sec",
+)
+
+
+def flatten(data: dict, prefix: str = "") -> dict:
+    result = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            if key != "timings":
+                result.update(flatten(value, path))
+        elif key in COMPARED and isinstance(value, (int, float)):
+            result[path] = value
+    return result
+
+
+def change_pct(metric: str, old: float, new: float) -> float:
+    if old == 0:
+        return 0.0
+    delta = (new - old) / old * 100
+    return -delta if metric.endswith(HIGHER_IS_BETTER) else delta
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Сравнение двух результатов benchmarks.suite"
+    )
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="ухудшение в процентах, при котором команда завершается с кодом 1",
+    )
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    old_metrics = flatten(base["scenarios"])
+    new_metrics = flatten(new["scenarios"])
+    print(f"{base['meta']['commit']} -> {new['meta']['commit']}")
+
+    regressions = 0
+    for metric in sorted(old_metrics.keys() & new_metrics.keys()):
+        old, cur = old_metrics[metric], new_metrics[metric]
+        pct = change_pct(metric, old, cur)
+        mark = ""
+        if pct > args.threshold:
+            mark = "  REGRESSION"
+            regressions += 1
+        print(f"{metric:45} {old:>12} {cur:>12} {pct:>+8.1f}%{mark}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import json
+import sys
+from datetime import timedelta
+
+from benchmarks.common import setup_django
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def inspect_plan(qs) -> tuple[set, bool, bool]:
+    # Индексы из плана, признак полного прохода по таблице мероприятий и
+    # отдельной сортировки (порядок должен браться из индекса).
+    from django.db import connection
+
+    if connection.vendor == "postgresql":
+        plan = json.loads(qs.explain(format="json"))[0]["Plan"]
+        nodes = list(plan_nodes(plan))
+        indexes = {n["Index Name"] for n in nodes if "Index Name" in n}
+        seq_scan = any(
+            n["Node Type"] == "Seq Scan" and n.get("Relation Name") == "events_event"
+            for n in nodes
+        )
+        sort = any(n["Node Type"] in ("Sort", "Incremental Sort") for n in nodes)
+        return indexes, seq_scan, sort
+
+    # SQLite: строки вида "SEARCH events_event USING INDEX event_status_date_idx (...)"
+    lines = qs.explain().splitlines()
+    indexes = {
+        line.split(" INDEX ")[1].split()[0] for line in lines if " INDEX " in line
+    }
+    seq_scan = any(
+        "SCAN events_event" in line and " INDEX " not in line for line in lines
+    )
+    sort = any("TEMP B-TREE FOR ORDER BY" in line for line in lines)
+    return indexes, seq_scan, sort
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Проверка планов запросов списка мероприятий: фильтры по "
+        "статусу, площадке и датам должны идти по составным индексам"
+    )
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--venues", type=int, default=200)
+    parser.add_argument("--verbose", action="store_true", help="Печатать планы")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import connection
+    from django.db.models import Max, Min
+    from django.http import QueryDict
+
+    from benchmarks.seed import seed_data
+    from src.core.settings import REST_FRAMEWORK
+    from src.events.filters import EventFilter
+    from src.events.models import Event, Venue
+    from src.events.views import EventViewSet
+
+    seed_data(events=args.events, venues=args.venues, registrations=0)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    venue = Venue.objects.order_by("id").first()
+    bounds = Event.objects.aggregate(first=Min("event_date"), last=Max("event_date"))
+    middle = (bounds["first"] + (bounds["last"] - bounds["first"]) / 2).date()
+    day, week_end = middle.isoformat(), (middle + timedelta(days=7)).isoformat()
+
+    # (название, параметры запроса, допустимые индексы)
+    cases = [
+        ("list", "", {"event_status_date_idx"}),
+        ("upcoming", "upcoming=true", {"event_status_date_idx"}),
+        (
+            "date_range",
+            f"date_from={day}&date_to={week_end}",
+            {"event_status_date_idx"},
+        ),
+        ("venue", f"venue={venue.external_id}", {"event_venue_date_idx"}),
+        (
+            "venue_upcoming",
+            f"venue={venue.external_id}&upcoming=true",
+            {"event_venue_date_idx"},
+        ),
+    ]
+
+    page_size = REST_FRAMEWORK["PAGE_SIZE"]
+    failed = False
+    for name, params, expected in cases:
+        filterset = EventFilter(QueryDict(params), queryset=EventViewSet.queryset)
+        if not filterset.is_valid():
+            sys.exit(f"{name}: {filterset.errors}")
+        qs = filterset.qs[:page_size]
+        indexes, seq_scan, sort = inspect_plan(qs)
+        ok = bool(indexes & expected) and not seq_scan and not sort
+        failed |= not ok
+        status = "ok" if ok else "FAIL"
+        print(
+            f"{status:<5} {name:<15} indexes={sorted(indexes)} seq_scan={seq_scan} sort={sort}"
+        )
+        if args.verbose or not ok:
+            print(qs.explain())
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
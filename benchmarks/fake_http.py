@@ -0,0 +1,129 @@
+import json
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DROP = "drop"
+
+
+def parse_fault(value: str) -> tuple[str, float]:
+    # "503=0.05" -> ("503", 0.05); "drop" — разорвать соединение без ответа.
+    outcome, _, share = value.partition("=")
+    if outcome != DROP and not (outcome.isdigit() and 400 <= int(outcome) < 600):
+        raise ValueError(f"Ожидается HTTP-статус 4xx/5xx или drop: {outcome}")
+    return outcome, float(share or 0)
+
+
+def add_fault_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.0, help="секунды")
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="случайная добавка к задержке, с"
+    )
+    parser.add_argument(
+        "--fault",
+        action="append",
+        type=parse_fault,
+        default=[],
+        metavar="STATUS=SHARE",
+        help="доля ответов с ошибкой, например 429=0.1, 503=0.05, drop=0.01",
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=int,
+        default=1,
+        help="значение Retry-After для 429/503, отрицательное — без заголовка",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело уходят разными write: без этого keep-alive клиенты
+    # ловят задержку ~40 мс на каждом ответе (Nagle + delayed ACK).
+    disable_nagle_algorithm = True
+    latency = 0.0
+    jitter = 0.0
+    faults: dict[str, float] = {}
+    retry_after: int | None = 1
+    seed = 0
+    # Общие для всех запросов сервера, создаются в make_server.
+    stats: Counter
+    attempts: Counter
+    lock: threading.Lock
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body: dict | None = None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+        with self.lock:
+            self.stats[str(status)] += 1
+
+    def send_stats(self):
+        with self.lock:
+            body = dict(self.stats)
+        self.send_json(200, body)
+
+    def next_attempt(self, key: str) -> random.Random:
+        # Решение зависит только от seed, ключа и номера попытки, а не от порядка
+        # запросов в потоках, поэтому прогон воспроизводим.
+        with self.lock:
+            self.attempts[key] += 1
+            attempt = self.attempts[key]
+        return random.Random(f"{self.seed}:{key}:{attempt}")
+
+    def roll_fault(self, rnd: random.Random) -> str | None:
+        roll = rnd.random()
+        for outcome, share in self.faults.items():
+            if roll < share:
+                return outcome
+            roll -= share
+        return None
+
+    def inject(self, key: str) -> bool:
+        rnd = self.next_attempt(key)
+        delay = self.latency + (rnd.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        outcome = self.roll_fault(rnd)
+        if outcome is None:
+            return False
+        if outcome == DROP:
+            with self.lock:
+                self.stats[DROP] += 1
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return True
+        status = int(outcome)
+        headers = {}
+        if status in (429, 503) and self.retry_after is not None:
+            headers["Retry-After"] = str(self.retry_after)
+        self.send_json(status, {"detail": "injected"}, headers)
+        return True
+
+
+def make_server(handler, port: int = 0, **attrs) -> ThreadingHTTPServer:
+    retry_after = attrs.get("retry_after", handler.retry_after)
+    attrs["retry_after"] = (
+        retry_after if retry_after is not None and retry_after >= 0 else None
+    )
+    attrs["faults"] = dict(attrs.get("faults") or {})
+    configured = type(
+        f"Configured{handler.__name__}",
+        (handler,),
+        {**attrs, "stats": Counter(), "attempts": Counter(), "lock": threading.Lock()},
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), configured)
+    server.daemon_threads = True
+    return server
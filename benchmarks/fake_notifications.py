@@ -0,0 +1,118 @@
+import argparse
+import json
+import time
+from http.server import ThreadingHTTPServer
+
+from benchmarks import fake_http
+
+DETAILS = {409: "already sent", 422: "email is required"}
+
+
+class NotificationHandler(fake_http.FakeHandler):
+    success_status = 201
+    # Сервис отвечает 409 на повторный id, как настоящий.
+    conflict_on_duplicate = True
+    delivered: set
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            self.send_stats()
+            return
+        self.send_json(404, {"detail": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json(400, {"detail": "invalid json"})
+            return
+        if self.path.rstrip("/").endswith("/batch"):
+            self.post_batch(payload)
+            return
+
+        msg_id = str(payload.get("id", ""))
+        # id сообщений — случайные UUID, email в бенчмарках стабилен между прогонами.
+        if self.inject(payload.get("email") or msg_id):
+            return
+        status = self.accept(payload)
+        body = {"id": msg_id} if status < 300 else {"detail": DETAILS[status]}
+        self.send_json(status, body)
+
+    def accept(self, payload: dict) -> int:
+        msg_id = str(payload.get("id", ""))
+        if not payload.get("email"):
+            return 422
+        with self.lock:
+            duplicate = msg_id in self.delivered
+            self.delivered.add(msg_id)
+        if duplicate and self.conflict_on_duplicate:
+            return 409
+        return self.success_status
+
+    def post_batch(self, payload: dict):
+        # Задержка — одна на запрос, сбои — по каждому сообщению отдельно.
+        messages = payload.get("messages") if isinstance(payload, dict) else None
+        if not isinstance(messages, list):
+            self.send_json(400, {"detail": "messages is required"})
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        results = []
+        for message in messages:
+            msg_id = str(message.get("id", ""))
+            outcome = self.roll_fault(self.next_attempt(message.get("email") or msg_id))
+            if outcome is None:
+                status = self.accept(message)
+            else:
+                status = 503 if outcome == fake_http.DROP else int(outcome)
+            with self.lock:
+                self.stats[f"item_{status}"] += 1
+            results.append({"id": msg_id, "status": status})
+        self.send_json(200, {"results": results})
+
+
+def make_server(
+    port: int = 0,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    faults: dict[str, float] | None = None,
+    retry_after: int | None = 1,
+    seed: int = 0,
+    success_status: int = 201,
+) -> ThreadingHTTPServer:
+    return fake_http.make_server(
+        NotificationHandler,
+        port,
+        latency=latency,
+        jitter=jitter,
+        faults=faults,
+        retry_after=retry_after,
+        seed=seed,
+        success_status=success_status,
+        delivered=set(),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный fake сервис уведомлений")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--success-status", type=int, default=201)
+    fake_http.add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    server = make_server(
+        args.port,
+        args.latency,
+        args.jitter,
+        dict(args.fault),
+        args.retry_after,
+        args.seed,
+        args.success_status,
+    )
+    print(f"NOTIFICATIONS_API_URL=http://127.0.0.1:{args.port}/api/notifications")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
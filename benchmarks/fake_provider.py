@@ -0,0 +1,141 @@
+import argparse
+import hashlib
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from benchmarks import fake_http
+
+
+def build_events(
+    count: int, seed: int = 0, venues: int = 50, changed_days: int = 0
+) -> list[dict]:
+    rnd = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    places = [
+        {"id": str(uuid.UUID(int=rnd.getrandbits(128))), "name": f"Venue {i}"}
+        for i in range(venues)
+    ]
+    return [
+        {
+            "id": str(uuid.UUID(int=rnd.getrandbits(128))),
+            "name": f"Provider event {i}",
+            "event_time": (now + timedelta(days=i % 365)).isoformat(),
+            "registration_deadline": (now + timedelta(days=30)).isoformat(),
+            "changed_at": (
+                now - timedelta(days=rnd.randint(0, changed_days))
+            ).isoformat(),
+            "status": "published",
+            "place": places[i % venues],
+        }
+        for i in range(count)
+    ]
+
+
+class ProviderHandler(fake_http.FakeHandler):
+    events: list[dict] = []
+    page_size = 100
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == "/_stats":
+            self.send_stats()
+            return
+        if self.inject(self.path):
+            return
+
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        events = self.events
+        if query.get("changed_at"):
+            events = [e for e in events if e["changed_at"] >= query["changed_at"]]
+        page = int(query.get("page", 1))
+        start = (page - 1) * self.page_size
+        results = events[start : start + self.page_size]
+        next_url = None
+        if start + self.page_size < len(events):
+            host = self.headers.get("Host")
+            next_url = (
+                f"http://{host}{parts.path}?{urlencode({**query, 'page': page + 1})}"
+            )
+        body = {"count": len(events), "next": next_url, "results": results}
+        etag = '"{}"'.format(
+            hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()
+        )
+        if self.headers.get("If-None-Match") == etag:
+            self.send_json(304, headers={"ETag": etag})
+            return
+        self.send_json(200, body, {"ETag": etag})
+
+
+def make_server(
+    port: int = 0,
+    events: int = 1000,
+    page_size: int = 100,
+    latency: float = 0.0,
+    rate_limit: float = 0.0,
+    retry_after: int | None = 1,
+    seed: int = 0,
+    jitter: float = 0.0,
+    faults: dict[str, float] | None = None,
+    venues: int = 50,
+    changed_days: int = 0,
+) -> ThreadingHTTPServer:
+    faults = dict(faults or {})
+    if rate_limit:
+        faults["429"] = rate_limit
+    return fake_http.make_server(
+        ProviderHandler,
+        port,
+        events=build_events(events, seed, venues, changed_days),
+        page_size=page_size,
+        latency=latency,
+        jitter=jitter,
+        faults=faults,
+        retry_after=retry_after,
+        seed=seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный fake events-provider")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--venues", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument(
+        "--changed-days",
+        type=int,
+        default=0,
+        help="changed_at мероприятий распределен по стольким последним дням",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help="доля 429, то же, что --fault 429=",
+    )
+    fake_http.add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    server = make_server(
+        args.port,
+        args.events,
+        args.page_size,
+        args.latency,
+        args.rate_limit,
+        args.retry_after,
+        args.seed,
+        args.jitter,
+        dict(args.fault),
+        args.venues,
+        args.changed_days,
+    )
+    print(f"PROVIDER_URL=http://127.0.0.1:{args.port}/api/events/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
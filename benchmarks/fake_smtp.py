@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import socket
+import threading
+import time
+from collections import Counter
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class SmtpHandler:
+    # Принимает письма и считает их; адреса на reject_domain получают 550.
+    def __init__(self, latency: float = 0.0, reject_domain: str = "reject.invalid"):
+        self.latency = latency
+        self.reject_domain = reject_domain
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        # EHLO — один на SMTP-соединение, по нему видно переиспользование.
+        session.host_name = hostname
+        self.count("connections")
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.endswith("@" + self.reject_domain):
+            self.count("rejected")
+            return "550 mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.count("messages")
+        return "250 Message accepted for delivery"
+
+
+class SmtpServer:
+    def __init__(self, port: int = 0, user: str = "", password: str = "", **kwargs):
+        # aiosmtpd — зависимость только бенчмарков (pip install -e .[bench]).
+        from aiosmtpd.controller import Controller
+
+        self.handler = SmtpHandler(**kwargs)
+        self.port = port or free_port()
+        options = {}
+        if user:
+            options = {
+                "auth_required": True,
+                "auth_require_tls": False,
+                "authenticator": self.authenticator(user, password),
+            }
+        self.controller = Controller(
+            self.handler, hostname="127.0.0.1", port=self.port, **options
+        )
+
+    def authenticator(self, user: str, password: str):
+        from aiosmtpd.smtp import AuthResult
+
+        def check(server, session, envelope, mechanism, auth_data):
+            ok = auth_data.login.decode() == user and (
+                auth_data.password.decode() == password
+            )
+            self.handler.count("auth" if ok else "auth_failed")
+            return AuthResult(success=ok)
+
+        return check
+
+    def start(self) -> "SmtpServer":
+        self.controller.start()
+        return self
+
+    def stop(self):
+        self.controller.stop()
+
+    def take_stats(self) -> dict:
+        with self.handler.lock:
+            stats = dict(sorted(self.handler.stats.items()))
+            self.handler.stats.clear()
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный SMTP-сервер (aiosmtpd)")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--user", default="")
+    parser.add_argument("--password", default="")
+    args = parser.parse_args()
+
+    server = SmtpServer(
+        args.port, args.user, args.password, latency=args.latency
+    ).start()
+    print(f"EMAIL_HOST=127.0.0.1 EMAIL_PORT={server.port}")
+    try:
+        while True:
+            time.sleep(10)
+            print(server.take_stats())
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
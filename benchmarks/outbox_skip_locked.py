@@ -0,0 +1,110 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter
+
+from benchmarks.common import setup_django
+
+
+def hold_locks(batch_size: int, hold: float, locked_ids: list, ready: threading.Event):
+    from django.db import connection, transaction
+
+    from src.events.models import MessageStatus, Outbox
+
+    try:
+        with transaction.atomic():
+            qs = (
+                Outbox.objects.filter(state=MessageStatus.PENDING)
+                .order_by("id")
+                .select_for_update(skip_locked=True)
+            )
+            locked_ids.extend(qs.values_list("id", flat=True)[:batch_size])
+            ready.set()
+            time.sleep(hold)
+    finally:
+        connection.close()
+
+
+def drain(batch_size: int, claimed: list):
+    from django.db import connection
+
+    from src.events.tasks import claim_messages
+
+    try:
+        while msgs := claim_messages(batch_size):
+            claimed.extend(m.id for m in msgs)
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Проверка, что воркеры outbox параллельно пропускают "
+        "заблокированные строки (select_for_update(skip_locked=True))"
+    )
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--hold", type=float, default=2.0)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import connection
+
+    from src.events.models import Outbox
+    from src.events.tasks import claim_messages
+
+    if not connection.features.has_select_for_update_skip_locked:
+        sys.exit(f"{connection.vendor} не поддерживает SKIP LOCKED, нужен Postgres")
+
+    Outbox.objects.bulk_create(
+        Outbox(topic="registration", payload={"n": i}) for i in range(args.messages)
+    )
+
+    locked_ids, ready = [], threading.Event()
+    holder = threading.Thread(
+        target=hold_locks, args=(args.batch_size, args.hold, locked_ids, ready)
+    )
+    holder.start()
+    ready.wait()
+    started = time.perf_counter()
+    skipped = [m.id for m in claim_messages(args.batch_size)]
+    claim_while_locked = time.perf_counter() - started
+    holder.join()
+
+    claimed = list(skipped)
+    threads = [
+        threading.Thread(target=drain, args=(args.batch_size, claimed))
+        for _ in range(args.workers)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    drain_seconds = time.perf_counter() - started
+
+    duplicates = [pk for pk, n in Counter(claimed).items() if n > 1]
+    report = {
+        "claim_while_locked_s": round(claim_while_locked, 3),
+        "overlap_with_locked": len(set(skipped) & set(locked_ids)),
+        "claimed": len(claimed),
+        "duplicates": len(duplicates),
+        "drain_s": round(drain_seconds, 3),
+    }
+    print(json.dumps(report, indent=2))
+
+    ok = (
+        claim_while_locked < args.hold
+        and report["overlap_with_locked"] == 0
+        and report["claimed"] == args.messages
+        and not duplicates
+    )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
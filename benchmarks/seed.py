@@ -0,0 +1,124 @@
+import argparse
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import django
+
+BATCH_SIZE = 1000
+
+
+def seed_data(
+    events: int = 1000,
+    venues: int = 50,
+    registrations: int = 5,
+    closed_ratio: float = 0.2,
+    seed: int = 0,
+) -> dict:
+    from src.events.models import (
+        Event,
+        EventRegistration,
+        EventStatus,
+        MessageStatus,
+        Outbox,
+        Venue,
+    )
+    from src.events.utils.notifications import confirmation_digest
+    from src.events.utils.registrations import registration_payload
+
+    rnd = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def new_uuid():
+        return uuid.UUID(int=rnd.getrandbits(128), version=4)
+
+    venue_objs = Venue.objects.bulk_create(
+        [
+            Venue(id=new_uuid(), name=f"Площадка {i}", external_id=new_uuid())
+            for i in range(venues)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    event_objs = Event.objects.bulk_create(
+        [
+            Event(
+                id=new_uuid(),
+                external_id=new_uuid(),
+                name=f"Мероприятие {i}",
+                event_date=now + timedelta(hours=rnd.randint(-24 * 30, 24 * 365)),
+                changed_at=now - timedelta(minutes=rnd.randint(0, 24 * 60 * 30)),
+                status=(
+                    EventStatus.CLOSED
+                    if rnd.random() < closed_ratio
+                    else EventStatus.OPEN
+                ),
+                venue=rnd.choice(venue_objs) if venue_objs else None,
+            )
+            for i in range(events)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    codes, regs = [], []
+    for i, event in enumerate(event_objs):
+        for n in range(registrations):
+            reg_id = new_uuid()
+            codes.append(f"{rnd.randint(100000, 999999)}")
+            regs.append(
+                EventRegistration(
+                    id=reg_id,
+                    event=event,
+                    full_name=f"Участник {n}",
+                    email=f"user{n}.{i}@example.com",
+                    confirmation_code=confirmation_digest(codes[-1]),
+                )
+            )
+    EventRegistration.objects.bulk_create(regs, batch_size=BATCH_SIZE)
+    Outbox.objects.bulk_create(
+        [
+            Outbox(
+                topic="registration",
+                payload=registration_payload(reg, reg.event, code),
+                state=MessageStatus.SENT,
+            )
+            for reg, code in zip(regs, codes)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return {
+        "venues": len(venue_objs),
+        "events": len(event_objs),
+        "registrations": len(regs),
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--venues", type=int, default=50)
+    parser.add_argument(
+        "--registrations", type=int, default=5, help="регистраций на мероприятие"
+    )
+    parser.add_argument("--closed-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Заполнение БД из настроек (DB_ENGINE) тестовыми данными"
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.core.settings")
+    django.setup()
+
+    print(
+        seed_data(
+            args.events, args.venues, args.registrations, args.closed_ratio, args.seed
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+from benchmarks.common import setup_django, summarize
+
+PROFILES = ("default", "wal")
+
+
+def fake_provider_items(count: int):
+    now = datetime.now(timezone.utc)
+    venue_ids = [uuid.uuid4() for _ in range(50)]
+    for i in range(count):
+        yield {
+            "id": str(uuid.uuid4()),
+            "name": f"Sync event {i}",
+            "event_time": (now + timedelta(days=i % 365)).isoformat(),
+            "registration_deadline": (now + timedelta(days=30)).isoformat(),
+            "changed_at": now.isoformat(),
+            "status": "published",
+            "place": {"id": str(venue_ids[i % 50]), "name": f"Venue {i % 50}"},
+        }
+
+
+def run_sync(items: int):
+    from django.core.management import call_command
+    from django.db import connection
+
+    from src.sync.management.commands import sync_events
+
+    try:
+        with (
+            mock.patch.object(
+                sync_events,
+                "iter_provider_events",
+                lambda *args, **kwargs: fake_provider_items(items),
+            ),
+            open(os.devnull, "w") as devnull,
+        ):
+            call_command("sync_events", "--all", stdout=devnull)
+    finally:
+        connection.close()
+
+
+def run_reader(token: str, stop: threading.Event, samples: list, errors: list):
+    from django.db import connection
+    from django.test import Client
+
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+    try:
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                resp = client.get("/api/events/")
+                if resp.status_code != 200:
+                    errors.append(resp.status_code)
+                    continue
+            except Exception as e:
+                errors.append(type(e).__name__)
+                continue
+            samples.append(time.perf_counter() - started)
+    finally:
+        connection.close()
+
+
+def run_profile(profile: str, items: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(
+            test_db_name=str(Path(tmp) / "bench.sqlite3"), SQLITE_PROFILE=profile
+        )
+
+        from django.contrib.auth.models import User
+
+        from src.authz.tokens import UserRefreshToken
+
+        user = User.objects.create_user(username="bench", password="bench-password")
+        token = str(UserRefreshToken.for_user(user).access_token)
+        run_sync(items)
+
+        # Синхронизация идет в отдельном процессе, чтобы не делить GIL с читателями.
+        writer = multiprocessing.get_context("fork").Process(
+            target=run_sync, args=(items,)
+        )
+        stop, samples, errors = threading.Event(), [], []
+        threads = [
+            threading.Thread(target=run_reader, args=(token, stop, samples, errors))
+            for _ in range(readers)
+        ]
+        started = time.perf_counter()
+        writer.start()
+        for t in threads:
+            t.start()
+        writer.join()
+        sync_seconds = time.perf_counter() - started
+        stop.set()
+        for t in threads:
+            t.join()
+
+    report = summarize(samples) if samples else {"count": 0}
+    report.update(sync_s=round(sync_seconds, 3), errors=len(errors), profile=profile)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Задержка /api/events/ во время полной синхронизации на SQLite"
+    )
+    parser.add_argument("--profile", choices=PROFILES)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=2)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args.profile, args.items, args.readers)))
+        return
+
+    report = {}
+    for profile in PROFILES:
+        out = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.sqlite_mixed",
+                "--profile",
+                profile,
+                "--items",
+                str(args.items),
+                "--readers",
+                str(args.readers),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        report[profile] = json.loads(out.stdout.strip().splitlines()[-1])
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
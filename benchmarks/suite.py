@@ -0,0 +1,379 @@
+import argparse
+import io
+import json
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from itertools import count
+from pathlib import Path
+
+from benchmarks import fake_http, fake_notifications, fake_provider, fake_smtp
+from benchmarks.common import measure, setup_django
+from benchmarks.seed import add_arguments as add_seed_arguments
+from benchmarks.seed import seed_data
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SCENARIOS = ("events_list", "register", "auth", "send_messages", "sync_events")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def with_throughput(result: dict, calls: int) -> dict:
+    total = result["mean_ms"] * result["count"] / 1000
+    result["per_sec"] = round(calls / total, 1) if total else 0.0
+    return result
+
+
+def bench_events_list(client, args) -> dict:
+    pages = max(1, min(args.pages, args.events // 10 or 1))
+    numbers = count()
+
+    def request():
+        page = next(numbers) % pages + 1
+        resp = client.get("/api/events/", {"page": page})
+        assert resp.status_code == 200, resp.status_code
+
+    request()
+    return with_throughput(measure(request, args.iterations), args.iterations)
+
+
+def bench_register(client, args) -> dict:
+    from src.events.models import Event, EventStatus
+
+    external_ids = list(
+        Event.objects.filter(status=EventStatus.OPEN).values_list(
+            "external_id", flat=True
+        )[:100]
+    )
+    numbers = count()
+
+    def request():
+        n = next(numbers)
+        resp = client.post(
+            f"/api/events/{external_ids[n % len(external_ids)]}/register/",
+            {"full_name": "Участник", "email": f"bench{n}@example.com"},
+            content_type="application/json",
+        )
+        assert resp.status_code == 201, resp.status_code
+
+    request()
+    return with_throughput(measure(request, args.iterations), args.iterations)
+
+
+def bench_auth(args) -> dict:
+    from django.test import Client
+
+    from src.authz.views import LoginView, RegisterView
+
+    # Бенчмарк измеряет сами эндпоинты, а не лимиты token bucket.
+    LoginView.throttle_classes = []
+    RegisterView.throttle_classes = []
+
+    client = Client()
+    numbers = count()
+    credentials = {"username": "bench-auth", "password": "bench-password"}
+    resp = client.post(
+        "/api/auth/register/", credentials, content_type="application/json"
+    )
+    refresh = resp.json()["refresh_token"]
+
+    def register():
+        resp = client.post(
+            "/api/auth/register/",
+            {"username": f"bench-{next(numbers)}", "password": "bench-password"},
+            content_type="application/json",
+        )
+        assert resp.status_code == 201, resp.status_code
+
+    def login():
+        resp = client.post(
+            "/api/auth/login/", credentials, content_type="application/json"
+        )
+        assert resp.status_code == 200, resp.status_code
+
+    def token_refresh():
+        resp = client.post(
+            "/api/auth/token/refresh/",
+            {"refresh": refresh},
+            content_type="application/json",
+        )
+        assert resp.status_code == 200, resp.status_code
+
+    return {
+        "register": with_throughput(
+            measure(register, args.auth_iterations), args.auth_iterations
+        ),
+        "login": with_throughput(
+            measure(login, args.auth_iterations), args.auth_iterations
+        ),
+        "refresh": with_throughput(
+            measure(token_refresh, args.iterations), args.iterations
+        ),
+    }
+
+
+def server_stats(server) -> dict:
+    if server is None:
+        return {}
+    if isinstance(server, fake_smtp.SmtpServer):
+        return server.take_stats()
+    handler = server.RequestHandlerClass
+    with handler.lock:
+        stats = dict(sorted(handler.stats.items()))
+        handler.stats.clear()
+    return stats
+
+
+def bench_send_messages(args, notifications) -> dict:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from src.events.models import MessageStatus, Outbox
+    from src.events.tasks import send_messages
+
+    Outbox.objects.bulk_create(
+        [
+            Outbox(
+                topic="registration",
+                payload={
+                    "email": f"notify{i}@example.com",
+                    "full_name": "Участник",
+                    "confirmation_code": "123456",
+                },
+            )
+            for i in range(args.messages)
+        ],
+        batch_size=1000,
+    )
+
+    pending = Outbox.objects.filter(state=MessageStatus.PENDING)
+    queries = 0
+    elapsed = 0.0
+    # С ошибками сервиса часть сообщений возвращается в pending, поэтому
+    # крутим до конца очереди, а не до первой пустой пачки.
+    while pending.exists():
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            send_messages(args.batch_size)
+        elapsed += time.perf_counter() - started
+        queries += len(ctx.captured_queries)
+
+    ours = Outbox.objects.filter(payload__email__startswith="notify")
+    sent = ours.filter(state=MessageStatus.SENT).count()
+    return {
+        "messages": args.messages,
+        "sent": sent,
+        "failed": ours.filter(state=MessageStatus.FAILED).count(),
+        "seconds": round(elapsed, 3),
+        "per_sec": round(sent / elapsed, 1) if elapsed else 0.0,
+        "queries_per_message": round(queries / args.messages, 2),
+        "server": server_stats(notifications),
+    }
+
+
+def bench_sync_events(args, provider) -> dict:
+    from django.core.management import call_command
+
+    from src.sync.models import SyncResult
+
+    report = {}
+    for run in ("initial", "unchanged"):
+        started = time.perf_counter()
+        call_command(
+            "sync_events",
+            "--all",
+            "--no-cache",
+            "--engine",
+            args.engine,
+            stdout=io.StringIO(),
+            stderr=io.StringIO(),
+        )
+        elapsed = time.perf_counter() - started
+        result = SyncResult.objects.first()
+        report[run] = {
+            "seconds": round(elapsed, 3),
+            "items": result.items_seen,
+            "per_sec": round(result.items_seen / elapsed, 1) if elapsed else 0.0,
+            "added": result.added_count,
+            "updated": result.updated_count,
+            "retries": result.retries,
+            "timings": result.timings,
+            "server": server_stats(provider),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Набор бенчмарков API и воркеров, результат в JSON"
+    )
+    add_seed_arguments(parser)
+    parser.add_argument("--only", help=f"через запятую из: {', '.join(SCENARIOS)}")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--auth-iterations",
+        type=int,
+        default=20,
+        help="итераций register/login (хеширование пароля медленное намеренно)",
+    )
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--notification-latency", type=float, default=0.0)
+    parser.add_argument(
+        "--notification-transport",
+        default="http",
+        help="NOTIFICATIONS_TRANSPORT для send_messages: http, http_batch, smtp "
+        "(локальный aiosmtpd) или file",
+    )
+    parser.add_argument(
+        "--notification-fault",
+        action="append",
+        type=fake_http.parse_fault,
+        default=[],
+        metavar="STATUS=SHARE",
+        help="ошибки сервиса уведомлений, например 503=0.05, 429=0.02, drop=0.01",
+    )
+    parser.add_argument("--provider-events", type=int, default=2000)
+    parser.add_argument("--provider-page-size", type=int, default=100)
+    parser.add_argument("--provider-latency", type=float, default=0.0)
+    parser.add_argument("--provider-rate-limit", type=float, default=0.0)
+    parser.add_argument(
+        "--provider-fault",
+        action="append",
+        type=fake_http.parse_fault,
+        default=[],
+        metavar="STATUS=SHARE",
+        help="ошибки провайдера, например 503=0.05, drop=0.01",
+    )
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync")
+    parser.add_argument(
+        "--output", help="путь к JSON (по умолчанию benchmarks/results/)"
+    )
+    args = parser.parse_args()
+
+    scenarios = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+    notifications = start(
+        fake_notifications.make_server(
+            latency=args.notification_latency,
+            faults=dict(args.notification_fault),
+            seed=args.seed,
+        )
+    )
+    provider = start(
+        fake_provider.make_server(
+            events=args.provider_events,
+            page_size=args.provider_page_size,
+            latency=args.provider_latency,
+            rate_limit=args.provider_rate_limit,
+            retry_after=0,
+            faults=dict(args.provider_fault),
+            # Другой seed, чтобы UUID провайдера не совпадали с засеянными.
+            seed=args.seed + 1,
+        )
+    )
+
+    # Куда уходят уведомления в send_messages: fake HTTP-сервис, локальный
+    # SMTP или файл (тогда считать на стороне сервера нечего).
+    mail_server = notifications
+    mail_env = {}
+    if args.notification_transport == "smtp":
+        mail_server = fake_smtp.SmtpServer(latency=args.notification_latency).start()
+        mail_env = {"EMAIL_HOST": "127.0.0.1", "EMAIL_PORT": mail_server.port}
+    elif args.notification_transport == "file":
+        mail_server = None
+        mail_env = {
+            "NOTIFICATIONS_FILE_PATH": Path(tempfile.mkdtemp()) / "notifications.ndjson"
+        }
+
+    setup_django(
+        **mail_env,
+        NOTIFICATIONS_API_URL=(
+            f"http://127.0.0.1:{notifications.server_port}/api/notifications"
+        ),
+        NOTIFICATIONS_TRANSPORT=args.notification_transport,
+        PROVIDER_URL=f"http://127.0.0.1:{provider.server_port}/api/events/",
+        QUERY_BUDGET_COUNT=0,
+        QUERY_BUDGET_MS=0,
+        QUERY_SLOW_MS=60_000,
+    )
+
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client
+
+    from src.authz.tokens import UserRefreshToken
+
+    seeded = seed_data(
+        args.events, args.venues, args.registrations, args.closed_ratio, args.seed
+    )
+    user = User.objects.create_user(username="bench", password="bench-password")
+    access = str(UserRefreshToken.for_user(user).access_token)
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    results = {}
+    for name in scenarios:
+        if name == "events_list":
+            results[name] = bench_events_list(client, args)
+        elif name == "register":
+            results[name] = bench_register(client, args)
+        elif name == "auth":
+            results[name] = bench_auth(args)
+        elif name == "send_messages":
+            results[name] = bench_send_messages(args, mail_server)
+        elif name == "sync_events":
+            results[name] = bench_sync_events(args, provider)
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "seeded": seeded,
+            "args": vars(args),
+        },
+        "scenarios": results,
+    }
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"{stamp}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+    notifications.shutdown()
+    if isinstance(mail_server, fake_smtp.SmtpServer):
+        mail_server.stop()
+    provider.shutdown()
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"Результат сохранен в {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import redis
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication as BaseJWTAuthentication,
+)
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from src.authz.revocation import is_token_revoked
+from src.core.redis_client import get_redis
+from src.core.settings import (
+    JWT_REVOCATION,
+    JWT_STATELESS_AUTH,
+    JWT_USER_ACTIVE_CACHE_TTL,
+)
+
+USER_ACTIVE_KEY = "authz:user_active:{}"
+
+
+def is_user_active(user_id) -> bool | None:
+    key = USER_ACTIVE_KEY.format(user_id)
+    try:
+        cached = get_redis().get(key)
+    except redis.RedisError:
+        cached = None
+    if cached is not None:
+        return cached == b"1"
+
+    is_active = (
+        User.objects.filter(pk=user_id).values_list("is_active", flat=True).first()
+    )
+    if is_active is None:
+        return None
+    try:
+        get_redis().set(key, b"1" if is_active else b"0", ex=JWT_USER_ACTIVE_CACHE_TTL)
+    except redis.RedisError:
+        pass
+    return is_active
+
+
+class RevocationCheckMixin:
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_token_revoked(validated_token):
+            raise InvalidToken("Токен отозван")
+        return validated_token
+
+
+class JWTAuthentication(RevocationCheckMixin, BaseJWTAuthentication):
+    pass
+
+
+class StatelessJWTAuthentication(RevocationCheckMixin, JWTStatelessUserAuthentication):
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if JWT_USER_ACTIVE_CACHE_TTL > 0:
+            is_active = is_user_active(user.id)
+            if is_active is None:
+                raise AuthenticationFailed(
+                    "Пользователь не найден", code="user_not_found"
+                )
+            if not is_active:
+                raise AuthenticationFailed(
+                    "Пользователь заблокирован", code="user_inactive"
+                )
+        return user
+
+
+async def aauthenticate(request):
+    # Тот же класс, что у DRF-views (JWT_STATELESS_AUTH); в поток уходит только
+    # проверка, которой нужны БД или Redis.
+    if JWT_STATELESS_AUTH:
+        auth = StatelessJWTAuthentication()
+        blocking = JWT_REVOCATION == "redis" or JWT_USER_ACTIVE_CACHE_TTL > 0
+    else:
+        auth, blocking = JWTAuthentication(), True
+    if blocking:
+        result = await sync_to_async(auth.authenticate)(request)
+    else:
+        result = auth.authenticate(request)
+    return result[0] if result else None
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from rest_framework.exceptions import APIException
+
+from src.core.settings import (
+    AUTH_HASHING_QUEUE,
+    AUTH_HASHING_TIMEOUT,
+    AUTH_HASHING_WORKERS,
+    AUTH_PBKDF2_ITERATIONS,
+)
+
+_executor = (
+    ThreadPoolExecutor(max_workers=AUTH_HASHING_WORKERS, thread_name_prefix="hashing")
+    if AUTH_HASHING_WORKERS > 0
+    else None
+)
+_slots = BoundedSemaphore(max(1, AUTH_HASHING_WORKERS + AUTH_HASHING_QUEUE))
+
+
+class HashingPoolBusy(APIException):
+    status_code = 503
+    default_detail = "Сервис авторизации перегружен, повторите попытку позже"
+    default_code = "hashing_pool_busy"
+
+
+def run_hashing(fn, *args):
+    if _executor is None:
+        return fn(*args)
+    if not _slots.acquire(timeout=AUTH_HASHING_TIMEOUT):
+        raise HashingPoolBusy()
+    try:
+        return _executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = AUTH_PBKDF2_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+    def encode(self, password, salt, iterations=None):
+        return run_hashing(super().encode, password, salt, iterations)
@@ -0,0 +1,57 @@
+import time
+
+import redis
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from src.core.redis_client import get_redis
+from src.core.settings import JWT_REVOCATION, SIMPLE_JWT
+
+REVOKED_BEFORE_KEY = "authz:revoked_before:{}"
+
+
+def blacklist_user_tokens(user_id) -> int:
+    token_ids = OutstandingToken.objects.filter(
+        user_id=user_id,
+        expires_at__gt=timezone.now(),
+        blacklistedtoken__isnull=True,
+    ).values_list("id", flat=True)
+    created = BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token_id=token_id) for token_id in token_ids],
+        ignore_conflicts=True,
+    )
+    return len(created)
+
+
+def revoke_user_tokens(user_id) -> None:
+    if JWT_REVOCATION == "redis":
+        ttl = int(SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds())
+        # iat — целые секунды, поэтому и метка целая: токен, выпущенный в ту же
+        # секунду после logout, не должен считаться отозванным.
+        try:
+            get_redis().set(
+                REVOKED_BEFORE_KEY.format(user_id), int(time.time()), ex=ttl
+            )
+            return
+        except redis.RedisError:
+            pass
+    blacklist_user_tokens(user_id)
+
+
+def is_token_revoked(token) -> bool:
+    if JWT_REVOCATION != "redis":
+        return False
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return False
+    try:
+        revoked_before = get_redis().get(REVOKED_BEFORE_KEY.format(user_id))
+    except redis.RedisError:
+        return False
+    if revoked_before is None:
+        return False
+    return token.get("iat", 0) < int(float(revoked_before))
@@ -1,6 +1,12 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from src.authz.revocation import is_token_revoked
+from src.authz.tokens import UserRefreshToken
 
 
 class RegisterSerializer(serializers.Serializer):
@@ -32,3 +38,22 @@ class LoginSerializer(serializers.Serializer):
             raise serializers.ValidationError("Не верные логин или пароль")
         attrs["user"] = user
         return attrs
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = UserRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if is_token_revoked(refresh):
+            raise InvalidToken("Токен отозван")
+        # Пользователь загружается при каждом обновлении: заблокированный или
+        # удаленный не получает новый access, а права в нем — текущие.
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+        return {"access": str(refresh.access_token_for(user))}
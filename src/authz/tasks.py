@@ -0,0 +1,25 @@
+from celery import shared_task
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+FLUSH_BATCH_SIZE = 1000
+
+
+@shared_task()
+def flush_expired_tokens(batch_size: int = FLUSH_BATCH_SIZE) -> int:
+    now = timezone.now()
+    BlacklistedToken.objects.filter(token__expires_at__lte=now).delete()
+
+    deleted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now).values_list(
+                "id", flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += OutstandingToken.objects.filter(id__in=ids).delete()[0]
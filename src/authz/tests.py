@@ -1 +1,205 @@
-# Create your tests here.
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
+import redis
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from src.authz.authentication import aauthenticate
+from src.authz.revocation import (
+    REVOKED_BEFORE_KEY,
+    is_token_revoked,
+    revoke_user_tokens,
+)
+from src.authz.throttling import TokenBucket, token_bucket_script
+from src.authz.tokens import UserRefreshToken
+from src.core.redis_client import get_redis
+
+
+def reset_login_buckets(username: str):
+    # Ведра троттлинга живут в Redis между тестами и прогонами.
+    try:
+        get_redis().delete(
+            "throttle:login_ip:127.0.0.1", f"throttle:login_username:{username}"
+        )
+    except redis.RedisError:
+        pass
+
+
+class TokenClaimsTests(APITestCase):
+    def setUp(self):
+        reset_login_buckets("admin")
+        self.user = User.objects.create_user("admin", password="secret123")
+        self.user.is_staff = True
+        self.user.save()
+
+    def login(self):
+        response = self.client.post(
+            reverse("login"), {"username": "admin", "password": "secret123"}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def refresh(self, refresh_token):
+        return self.client.post(reverse("token_refresh"), {"refresh": refresh_token})
+
+    def test_authz_claims_only_in_access_token(self):
+        tokens = self.login()
+        refresh = UserRefreshToken(tokens["refresh_token"])
+        self.assertNotIn("is_staff", refresh.payload)
+        self.assertTrue(AccessToken(tokens["access_token"])["is_staff"])
+
+    def test_refresh_restamps_claims_from_user(self):
+        tokens = self.login()
+        self.user.is_staff = False
+        self.user.save()
+
+        response = self.refresh(tokens["refresh_token"])
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AccessToken(response.data["access_token"])["is_staff"])
+
+    def test_legacy_refresh_claims_are_not_copied(self):
+        refresh = UserRefreshToken.for_user(self.user)
+        refresh["is_staff"] = True
+        self.user.is_staff = False
+        self.user.save()
+
+        response = self.refresh(str(refresh))
+        self.assertFalse(AccessToken(response.data["access_token"])["is_staff"])
+
+    def test_refresh_rejected_for_inactive_or_deleted_user(self):
+        tokens = self.login()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.refresh(tokens["refresh_token"]).status_code, 401)
+
+        self.user.delete()
+        self.assertEqual(self.refresh(tokens["refresh_token"]).status_code, 401)
+
+
+class AsyncAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("user", password="secret123")
+        token = UserRefreshToken.for_user(self.user).access_token_for(self.user)
+        self.request = RequestFactory().get(
+            "/", headers={"Authorization": f"Bearer {token}"}
+        )
+
+    @patch("src.authz.authentication.JWT_STATELESS_AUTH", False)
+    async def test_db_mode_loads_user(self):
+        self.assertEqual(await aauthenticate(self.request), self.user)
+        await self.user.adelete()
+        with self.assertRaises(AuthenticationFailed):
+            await aauthenticate(self.request)
+
+    @patch("src.authz.authentication.JWT_STATELESS_AUTH", True)
+    @patch("src.authz.authentication.JWT_USER_ACTIVE_CACHE_TTL", 0)
+    async def test_stateless_mode_trusts_token(self):
+        user_id = self.user.id
+        await self.user.adelete()
+        user = await aauthenticate(self.request)
+        self.assertIsInstance(user, TokenUser)
+        self.assertEqual(user.id, str(user_id))
+
+
+def redis_available() -> bool:
+    try:
+        return get_redis().ping()
+    except redis.RedisError:
+        return False
+
+
+@skipUnless(redis_available(), "нужен Redis (REDIS_URL)")
+@patch("src.authz.revocation.JWT_REVOCATION", "redis")
+class RedisRevocationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("user", password="secret123")
+        get_redis().delete(REVOKED_BEFORE_KEY.format(self.user.id))
+
+    def test_tokens_issued_before_logout_are_revoked(self):
+        refresh = UserRefreshToken.for_user(self.user)
+        refresh.set_iat(at_time=refresh.current_time - timedelta(seconds=5))
+        revoke_user_tokens(self.user.id)
+        self.assertTrue(is_token_revoked(refresh))
+
+    def test_login_in_same_second_as_logout_is_not_revoked(self):
+        with patch("src.authz.revocation.time.time", return_value=1_700_000_000.9):
+            revoke_user_tokens(self.user.id)
+        refresh = UserRefreshToken.for_user(self.user)
+        refresh["iat"] = 1_700_000_000
+        self.assertFalse(is_token_revoked(refresh))
+        self.assertFalse(is_token_revoked(refresh.access_token_for(self.user)))
+
+
+@skipUnless(redis_available(), "нужен Redis (REDIS_URL)")
+class TokenBucketTests(APITestCase):
+    def setUp(self):
+        reset_login_buckets("flooded")
+        get_redis().delete("throttle:test:client")
+
+    def test_bucket_refills_at_rate(self):
+        bucket = TokenBucket("test", capacity=2, rate=1.0)
+        with patch("src.authz.throttling.time.time", return_value=1000.0):
+            self.assertTrue(bucket.consume("client")[0])
+            self.assertTrue(bucket.consume("client")[0])
+            allowed, wait = bucket.consume("client")
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 1.0)
+        with patch("src.authz.throttling.time.time", return_value=1001.0):
+            self.assertTrue(bucket.consume("client")[0])
+
+    @patch.dict(
+        "src.authz.throttling.AUTH_THROTTLE_RATES",
+        {"login_ip": "100/60", "login_username": "2/60"},
+    )
+    def test_login_throttled_per_username(self):
+        data = {"username": "Flooded", "password": "wrong-password"}
+        for _ in range(2):
+            self.assertEqual(self.client.post(reverse("login"), data).status_code, 401)
+        response = self.client.post(reverse("login"), data)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    @patch.dict(
+        "src.authz.throttling.AUTH_THROTTLE_RATES",
+        {"login_ip": "2/60", "login_username": "100/60"},
+    )
+    def test_forwarded_for_does_not_pick_ip_bucket(self):
+        codes = [
+            self.client.post(
+                reverse("login"),
+                {"username": f"user{i}", "password": "wrong-password"},
+                headers={"X-Forwarded-For": f"10.0.0.{i}"},
+            ).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(codes, [401, 401, 429])
+
+    def test_script_registered_once(self):
+        self.assertIs(token_bucket_script(), token_bucket_script())
+
+
+class RedisDownTests(APITestCase):
+    def consume(self):
+        def fail(**kwargs):
+            raise redis.ConnectionError
+
+        with (
+            patch("src.authz.throttling.token_bucket_script", return_value=fail),
+            self.assertLogs("src.authz.throttling", "WARNING"),
+        ):
+            return TokenBucket("test", capacity=1, rate=1.0).consume("client")[0]
+
+    @patch("src.authz.throttling.AUTH_THROTTLE_FAIL_OPEN", True)
+    def test_fail_open(self):
+        self.assertTrue(self.consume())
+
+    @patch("src.authz.throttling.AUTH_THROTTLE_FAIL_OPEN", False)
+    def test_fail_closed(self):
+        self.assertFalse(self.consume())
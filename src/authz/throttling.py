@@ -0,0 +1,132 @@
+import logging
+import time
+import uuid
+from functools import lru_cache
+
+import redis
+from rest_framework.throttling import BaseThrottle
+
+from src.core.redis_client import get_redis
+from src.core.settings import AUTH_THROTTLE_FAIL_OPEN, AUTH_THROTTLE_RATES
+
+logger = logging.getLogger(__name__)
+
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "ts", now)
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+@lru_cache(maxsize=1)
+def token_bucket_script():
+    # Script сам держит SHA и вызывает EVALSHA, при NOSCRIPT загружает тело заново.
+    return get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+
+
+def parse_bucket(value: str) -> tuple[int, float]:
+    capacity, period = value.split("/")
+    return int(capacity), int(capacity) / float(period)
+
+
+class TokenBucket:
+    def __init__(self, scope: str, capacity: int, rate: float):
+        self.scope = scope
+        self.capacity = capacity
+        self.rate = rate
+
+    def consume(self, ident: str) -> tuple[bool, float]:
+        try:
+            allowed, wait = token_bucket_script()(
+                keys=[f"throttle:{self.scope}:{ident}"],
+                args=[self.capacity, self.rate, time.time()],
+            )
+        except redis.RedisError as e:
+            # Без Redis лимит не посчитать: AUTH_THROTTLE_FAIL_OPEN решает,
+            # пропускать запросы без защиты от перебора или отвечать 429.
+            logger.warning(
+                "Троттлинг %s недоступен (%s), запрос %s",
+                self.scope,
+                e.__class__.__name__,
+                "пропущен" if AUTH_THROTTLE_FAIL_OPEN else "отклонен",
+            )
+            return AUTH_THROTTLE_FAIL_OPEN, 0.0
+        return bool(allowed), float(wait)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_bucket_ident(self, request, view) -> str | None:
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        ident = self.get_bucket_ident(request, view)
+        if not ident:
+            return True
+        capacity, rate = parse_bucket(AUTH_THROTTLE_RATES[self.scope])
+        allowed, self.wait_seconds = TokenBucket(self.scope, capacity, rate).consume(
+            ident
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = "login_ip"
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    scope = "login_username"
+
+    def get_bucket_ident(self, request, view):
+        username = (
+            request.data.get("username") if hasattr(request.data, "get") else None
+        )
+        return str(username).strip().lower() if username else None
+
+
+class RegisterIPThrottle(TokenBucketThrottle):
+    scope = "register_ip"
+
+
+class ConfirmIPThrottle(TokenBucketThrottle):
+    scope = "confirm_ip"
+
+
+class ConfirmRegistrationThrottle(TokenBucketThrottle):
+    # Подбор кода к одной регистрации ограничен независимо от числа адресов.
+    scope = "confirm_registration"
+
+    def get_bucket_ident(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not email:
+            return None
+        # Ключ по каноничному UUID: иначе каждое написание того же id (регистр,
+        # без дефисов, {...}, urn:uuid:) получало бы свое ведро. Не UUID —
+        # мероприятия нет, остается ведро по IP.
+        try:
+            event_id = uuid.UUID(str(view.kwargs.get("event_id")))
+        except ValueError:
+            return None
+        return f"{event_id}:{str(email).strip().lower()}"
@@ -0,0 +1,22 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Права живут только в access-токене и берутся из БД при каждом выпуске: в
+# долгоживущем refresh-токене они пережили бы снятие прав.
+AUTHZ_CLAIMS = ("is_staff", "is_superuser")
+
+
+class UserRefreshToken(RefreshToken):
+    # Не копируем права и из refresh-токенов, выпущенных до этого правила.
+    no_copy_claims = (*RefreshToken.no_copy_claims, *AUTHZ_CLAIMS)
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token["username"] = user.username
+        return token
+
+    def access_token_for(self, user):
+        access = self.access_token
+        for claim in AUTHZ_CLAIMS:
+            access[claim] = getattr(user, claim)
+        return access
@@ -2,19 +2,29 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.serializers import TokenRefreshSerializer
-from rest_framework_simplejwt.token_blacklist.models import (
-    BlacklistedToken,
-    OutstandingToken,
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+    TokenError,
 )
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from src.authz.serializers import LoginSerializer, RegisterSerializer
+from src.authz.revocation import revoke_user_tokens
+from src.authz.serializers import (
+    LoginSerializer,
+    RegisterSerializer,
+    RevocableTokenRefreshSerializer,
+)
+from src.authz.throttling import (
+    LoginIPThrottle,
+    LoginUsernameThrottle,
+    RegisterIPThrottle,
+)
+from src.authz.tokens import UserRefreshToken
 
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterIPThrottle]
 
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
@@ -22,8 +32,8 @@ class RegisterView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
-        access = refresh.access_token
+        refresh = UserRefreshToken.for_user(user)
+        access = refresh.access_token_for(user)
         return Response(
             {
                 "message": "Пользователь успешно создан",
@@ -36,6 +46,7 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
 
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
@@ -46,8 +57,8 @@ class LoginView(APIView):
             )
 
         user = serializer.validated_data["user"]
-        refresh = RefreshToken.for_user(user)
-        access = refresh.access_token
+        refresh = UserRefreshToken.for_user(user)
+        access = refresh.access_token_for(user)
         return Response(
             {
                 "access_token": str(access),
@@ -61,10 +72,10 @@ class TokenRefreshCustomView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        serializer = TokenRefreshSerializer(data=request.data)
+        serializer = RevocableTokenRefreshSerializer(data=request.data)
         try:
             serializer.is_valid(raise_exception=True)
-        except (TokenError, InvalidToken):
+        except (TokenError, InvalidToken, AuthenticationFailed):
             return Response(
                 {"error": "Неверный или устаревший токен"},
                 status=status.HTTP_401_UNAUTHORIZED,
@@ -77,7 +88,5 @@ class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        tokens = OutstandingToken.objects.filter(user=request.user)
-        for t in tokens:
-            BlacklistedToken.objects.get_or_create(token=t)
+        revoke_user_tokens(request.user.id)
         return Response({"message": "Вы вышли из аккаунта"})
@@ -1,9 +1,25 @@
 import os
 
 from celery import Celery
+from celery.signals import task_postrun, task_prerun, worker_ready
+
+from src.core.queries import task_postrun_handler, task_prerun_handler
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.core.settings")
 
 app = Celery("events")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+task_prerun.connect(task_prerun_handler)
+task_postrun.connect(task_postrun_handler)
+
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    from src.core.settings import CELERY_METRICS_PORT
+
+    if CELERY_METRICS_PORT:
+        from src.core.metrics import serve_worker_metrics
+
+        serve_worker_metrics(CELERY_METRICS_PORT)
@@ -0,0 +1,91 @@
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+
+from src.core.settings import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_TYPES,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ACCEPT_ENCODING_RE = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q=([\d.]+))?")
+
+
+def accepted_encodings(header: str) -> set[str]:
+    encodings = set()
+    for part in header.split(","):
+        match = ACCEPT_ENCODING_RE.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2) or 1)
+        except ValueError:
+            continue
+        if quality > 0:
+            encodings.add(match.group(1).lower())
+    return encodings
+
+
+def choose_encoding(request) -> str | None:
+    accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_response(request, response):
+    # Потоковые ответы (выгрузки) не трогаем: их сжатие — забота прокси.
+    if response.streaming or response.has_header("Content-Encoding"):
+        return response
+    content_type = response.get("Content-Type", "").split(";")[0].strip()
+    if content_type not in COMPRESSION_TYPES:
+        return response
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if len(response.content) < COMPRESSION_MIN_SIZE:
+        return response
+    encoding = choose_encoding(request)
+    if encoding is None:
+        return response
+
+    if encoding == "br":
+        body = brotli.compress(response.content, quality=COMPRESSION_BROTLI_QUALITY)
+    else:
+        body = gzip.compress(
+            response.content, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0
+        )
+    if len(body) >= len(response.content):
+        return response
+
+    response.content = body
+    response["Content-Length"] = str(len(body))
+    response["Content-Encoding"] = encoding
+    etag = response.get("ETag", "")
+    if etag.startswith('"'):
+        response["ETag"] = "W/" + etag
+    return response
+
+
+@sync_and_async_middleware
+def compression_middleware(get_response):
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            return compress_response(request, await get_response(request))
+
+    else:
+
+        def middleware(request):
+            return compress_response(request, get_response(request))
+
+    return middleware
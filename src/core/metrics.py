@@ -0,0 +1,162 @@
+import os
+import time
+from hmac import compare_digest
+
+from asgiref.sync import iscoroutinefunction
+from django.db import DatabaseError
+from django.db.models import Max
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils import timezone
+from django.utils.decorators import sync_and_async_middleware
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from src.core.settings import METRICS_TOKEN
+from src.events.models import MessageStatus
+from src.events.utils.outbox import backlog_summary
+from src.sync.models import SyncResult, SyncStatus
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["view", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REGISTRATIONS = Counter("event_registrations_total", "Созданные регистрации")
+NOTIFICATION_DURATION = Histogram(
+    "notification_request_duration_seconds",
+    "Время запроса к сервису уведомлений",
+    ["result"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15),
+)
+OUTBOX_DELIVERIES = Counter(
+    "outbox_deliveries_total", "Попытки доставки outbox-сообщений", ["result"]
+)
+OUTBOX_DELIVERY_LATENCY = Histogram(
+    "outbox_delivery_latency_seconds",
+    "Время от создания outbox-сообщения до доставки",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 900, 3600),
+)
+
+
+def view_label(request) -> str:
+    match = request.resolver_match
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route
+
+
+def observe_request(request, response, started: float):
+    HTTP_REQUEST_DURATION.labels(
+        view_label(request), request.method, f"{response.status_code // 100}xx"
+    ).observe(time.perf_counter() - started)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            started = time.perf_counter()
+            response = await get_response(request)
+            observe_request(request, response, started)
+            return response
+
+    else:
+
+        def middleware(request):
+            started = time.perf_counter()
+            response = get_response(request)
+            observe_request(request, response, started)
+            return response
+
+    return middleware
+
+
+class DatabaseCollector:
+    # Считается только при сборе метрик, а не на каждом запросе. Outbox — одним
+    # запросом по частичному индексу без SENT: отправленные копятся бесконечно,
+    # и их подсчет на каждом scrape был бы полным проходом по таблице
+    # (доставленные и так видны в outbox_deliveries_total).
+    def collect(self):
+        try:
+            backlog = backlog_summary()
+            last_sync = SyncResult.objects.filter(status=SyncStatus.SUCCESS).aggregate(
+                m=Max("executed_at")
+            )["m"]
+        except DatabaseError:
+            return
+
+        now = timezone.now()
+        counts = {s: 0 for s in MessageStatus.values if s != MessageStatus.SENT}
+        oldest = None
+        for row in backlog:
+            counts[row["state"]] += row["count"]
+            if row["state"] == MessageStatus.PENDING:
+                oldest = min(oldest or row["oldest"], row["oldest"])
+
+        messages = GaugeMetricFamily(
+            "outbox_messages",
+            "Неотправленные outbox-сообщения по статусу",
+            labels=["state"],
+        )
+        for state, count in counts.items():
+            messages.add_metric([state], count)
+        yield messages
+
+        yield GaugeMetricFamily(
+            "outbox_oldest_pending_age_seconds",
+            "Возраст самого старого неотправленного сообщения",
+            value=(now - oldest).total_seconds() if oldest else 0,
+        )
+        if last_sync:
+            yield GaugeMetricFamily(
+                "sync_last_success_age_seconds",
+                "Время с последней успешной синхронизации",
+                value=(now - last_sync).total_seconds(),
+            )
+
+
+def process_registry() -> CollectorRegistry:
+    # С PROMETHEUS_MULTIPROC_DIR метрики всех процессов (gunicorn, prefork-воркеры
+    # Celery) пишутся в общий каталог и суммируются при сборе.
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics() -> bytes:
+    registry = process_registry()
+    db_registry = CollectorRegistry()
+    db_registry.register(DatabaseCollector())
+    return generate_latest(registry) + generate_latest(db_registry)
+
+
+def is_authorized(request) -> bool:
+    if not METRICS_TOKEN:
+        return True
+    header = request.headers.get("Authorization", "")
+    return compare_digest(header, f"Bearer {METRICS_TOKEN}")
+
+
+def metrics_view(request):
+    if not is_authorized(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+
+def serve_worker_metrics(port: int):
+    start_http_server(port, registry=process_registry())
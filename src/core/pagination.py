@@ -0,0 +1,41 @@
+import json
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+from src.core.settings import ADMIN_EXACT_COUNT_LIMIT
+
+
+def planner_estimate(queryset) -> int | None:
+    # Оценка числа строк из плана Postgres: без прохода по таблице, но с
+    # учетом фильтров. Для других СУБД оценки нет.
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+    except DatabaseError:
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    # Точный COUNT(*) только до ADMIN_EXACT_COUNT_LIMIT строк (подсчет по
+    # подзапросу с LIMIT), дальше — оценка планировщика.
+    @cached_property
+    def count(self) -> int:
+        limit = ADMIN_EXACT_COUNT_LIMIT
+        unordered = self.object_list.order_by()
+        bounded = unordered[: limit + 1].count()
+        if bounded <= limit:
+            return bounded
+        estimate = planner_estimate(unordered)
+        if estimate is None:
+            return unordered.count()
+        return max(estimate, bounded)
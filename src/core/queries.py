@@ -0,0 +1,169 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db import DatabaseError, connections
+from django.utils.decorators import sync_and_async_middleware
+
+from src.core.settings import (
+    QUERY_BUDGET_COUNT,
+    QUERY_BUDGET_MS,
+    QUERY_EXPLAIN_SAMPLE_RATE,
+    QUERY_SERVER_TIMING,
+    QUERY_SLOW_MS,
+    QUERY_TASK_BUDGET_COUNT,
+    QUERY_TASK_BUDGET_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_SLOW_QUERIES = 5
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slow = []
+        self.stack = ExitStack()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if elapsed * 1000 >= QUERY_SLOW_MS and len(self.slow) < MAX_SLOW_QUERIES:
+                self.slow.append(
+                    (
+                        context["connection"].alias,
+                        sql,
+                        None if many else params,
+                        elapsed,
+                    )
+                )
+
+    def start(self):
+        for conn in connections.all():
+            self.stack.enter_context(conn.execute_wrapper(self))
+        return self
+
+    def stop(self):
+        self.stack.close()
+
+
+def explain(alias: str, sql: str, params):
+    conn = connections[alias]
+    prefix = conn.ops.explain_query_prefix()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            return "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+    except DatabaseError as e:
+        return f"EXPLAIN не выполнен: {e}"
+
+
+def report(label: str, stats: QueryStats, elapsed: float, max_count: int, max_ms: int):
+    over_count = max_count and stats.count > max_count
+    over_time = max_ms and elapsed * 1000 > max_ms
+    if over_count or over_time:
+        logger.warning(
+            "%s: %d запросов к БД, SQL %.1f мс, всего %.1f мс",
+            label,
+            stats.count,
+            stats.duration * 1000,
+            elapsed * 1000,
+        )
+
+    # EXPLAIN выполняется уже после снятия обертки, чтобы не попасть в счетчики.
+    for alias, sql, params, duration in stats.slow:
+        message = "%s: медленный запрос %.1f мс: %s"
+        args = [label, duration * 1000, sql]
+        if (
+            params is not None
+            and sql.lstrip()[:6].upper() == "SELECT"
+            and random.random() < QUERY_EXPLAIN_SAMPLE_RATE
+        ):
+            message += "\n%s"
+            args.append(explain(alias, sql, params))
+        logger.warning(message, *args)
+
+
+def server_timing(stats: QueryStats, elapsed: float) -> str:
+    return (
+        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+        f"app;dur={elapsed * 1000:.1f}"
+    )
+
+
+def finish_request(request, response, stats: QueryStats, started: float):
+    if response.streaming:
+        # Запросы потоковой выгрузки выполняются уже после middleware.
+        return
+    elapsed = time.perf_counter() - started
+    if QUERY_SERVER_TIMING:
+        response["Server-Timing"] = server_timing(stats, elapsed)
+    report(
+        f"{request.method} {request.path}",
+        stats,
+        elapsed,
+        QUERY_BUDGET_COUNT,
+        QUERY_BUDGET_MS,
+    )
+
+
+@sync_and_async_middleware
+def query_count_middleware(get_response):
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            # Соединения с БД привязаны к потоку: ORM из async-view работает в
+            # потоке sync_to_async этого запроса, туда же ставится обертка.
+            started = time.perf_counter()
+            stats = await sync_to_async(QueryStats().start)()
+            try:
+                response = await get_response(request)
+            finally:
+                await sync_to_async(stats.stop)()
+            await sync_to_async(finish_request)(request, response, stats, started)
+            return response
+
+    else:
+
+        def middleware(request):
+            started = time.perf_counter()
+            stats = QueryStats().start()
+            try:
+                response = get_response(request)
+            finally:
+                stats.stop()
+            finish_request(request, response, stats, started)
+            return response
+
+    return middleware
+
+
+_task_stats = {}
+
+
+def task_prerun_handler(task_id=None, **kwargs):
+    _task_stats[task_id] = (QueryStats().start(), time.perf_counter())
+
+
+def task_postrun_handler(task_id=None, task=None, **kwargs):
+    entry = _task_stats.pop(task_id, None)
+    if entry is None:
+        return
+    stats, started = entry
+    stats.stop()
+    report(
+        f"task {task.name}[{task_id}]",
+        stats,
+        time.perf_counter() - started,
+        QUERY_TASK_BUDGET_COUNT,
+        QUERY_TASK_BUDGET_MS,
+    )
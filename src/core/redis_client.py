@@ -0,0 +1,10 @@
+from functools import lru_cache
+
+import redis
+
+from src.core.settings import REDIS_URL
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> redis.Redis:
+    return redis.Redis.from_url(REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
@@ -14,6 +14,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -22,12 +23,137 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv()
 
 PROVIDER_URL = os.getenv("PROVIDER_URL", "https://events.k3scluster.tech/api/events/")
+PROVIDER_CONCURRENCY = int(os.getenv("PROVIDER_CONCURRENCY", "4"))
+# Пересекающийся запуск sync_events_task: "skip" — пропустить, "queue" — повторить позже.
+SYNC_OVERLAP_POLICY = os.getenv("SYNC_OVERLAP_POLICY", "skip")
+SYNC_LOCK_TIMEOUT = int(os.getenv("SYNC_LOCK_TIMEOUT", "7200"))
+# Пустой PROVIDER_CACHE_DIR отключает кэш страниц провайдера.
+PROVIDER_CACHE_DIR = os.getenv(
+    "PROVIDER_CACHE_DIR", str(BASE_DIR.parent / ".cache" / "provider")
+)
+PROVIDER_CACHE_MAX_BYTES = int(os.getenv("PROVIDER_CACHE_MAX_BYTES", "52428800"))
+PROVIDER_CACHE_MAX_AGE = int(os.getenv("PROVIDER_CACHE_MAX_AGE", "604800"))
 JWT_TOKEN = os.getenv("PROVIDER_JWT_TOKEN")
 OWNER_ID = os.getenv("OWNER_ID")
 SECRET_KEY = os.getenv("SECRET_KEY")
 NOTIFICATIONS_API_URL = os.getenv(
     "NOTIFICATIONS_API_URL", "https://notifications.k3scluster.tech/api/notifications"
 )
+# Транспорт уведомлений: "http" — POST на каждое сообщение, "http_batch" — до
+# NOTIFICATIONS_BATCH_SIZE сообщений одним POST на NOTIFICATIONS_BATCH_URL,
+# "smtp" — письма через EMAIL_HOST одним соединением на пачку, "file" — NDJSON
+# в NOTIFICATIONS_FILE_PATH (для нагрузочных тестов).
+NOTIFICATIONS_TRANSPORT = os.getenv("NOTIFICATIONS_TRANSPORT", "http")
+NOTIFICATIONS_BATCH_URL = os.getenv(
+    "NOTIFICATIONS_BATCH_URL", f"{NOTIFICATIONS_API_URL.rstrip('/')}/batch"
+)
+NOTIFICATIONS_BATCH_SIZE = int(os.getenv("NOTIFICATIONS_BATCH_SIZE", "50"))
+NOTIFICATIONS_FILE_PATH = os.getenv(
+    "NOTIFICATIONS_FILE_PATH", str(BASE_DIR.parent / ".cache" / "notifications.ndjson")
+)
+NOTIFICATIONS_SMTP_BACKEND = os.getenv(
+    "NOTIFICATIONS_SMTP_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "false").lower() == "true"
+EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL", "false").lower() == "true"
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", "10"))
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "noreply@localhost")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/2")
+
+# Stateless-режим собирает пользователя из claims токена без запроса к БД.
+# JWT_USER_ACTIVE_CACHE_TTL > 0 включает проверку is_active с кэшем в Redis.
+JWT_STATELESS_AUTH = os.getenv("JWT_STATELESS_AUTH", "false").lower() == "true"
+JWT_USER_ACTIVE_CACHE_TTL = int(os.getenv("JWT_USER_ACTIVE_CACHE_TTL", "30"))
+# "blacklist" — logout пишет refresh-токены в blacklist-таблицу одним INSERT,
+# "redis" — хранит в Redis время отзыва, все токены, выпущенные раньше, недействительны.
+JWT_REVOCATION = os.getenv("JWT_REVOCATION", "blacklist")
+
+# Token bucket для login/register: "емкость/секунд на полное восполнение".
+AUTH_THROTTLE_RATES = {
+    "login_ip": os.getenv("AUTH_THROTTLE_LOGIN_IP", "20/60"),
+    "login_username": os.getenv("AUTH_THROTTLE_LOGIN_USERNAME", "5/60"),
+    "register_ip": os.getenv("AUTH_THROTTLE_REGISTER_IP", "10/3600"),
+    # Подтверждение регистрации: с одного IP и на одну регистрацию (event, email).
+    "confirm_ip": os.getenv("AUTH_THROTTLE_CONFIRM_IP", "30/60"),
+    "confirm_registration": os.getenv("AUTH_THROTTLE_CONFIRM_REGISTRATION", "5/900"),
+}
+# Redis недоступен: true — пропускать запросы без лимита, false — отвечать 429.
+AUTH_THROTTLE_FAIL_OPEN = os.getenv("AUTH_THROTTLE_FAIL_OPEN", "true").lower() == "true"
+# Число доверенных прокси перед приложением: IP клиента для лимитов берется из
+# X-Forwarded-For на этой позиции с конца. 0 — только REMOTE_ADDR, заголовок
+# клиента не учитывается.
+NUM_PROXIES = int(os.getenv("NUM_PROXIES", "0"))
+# 0 — число итераций PBKDF2 по умолчанию из Django.
+AUTH_PBKDF2_ITERATIONS = int(os.getenv("AUTH_PBKDF2_ITERATIONS", "0"))
+# AUTH_HASHING_WORKERS > 0 выносит хеширование паролей в ограниченный пул потоков.
+AUTH_HASHING_WORKERS = int(os.getenv("AUTH_HASHING_WORKERS", "0"))
+AUTH_HASHING_QUEUE = int(os.getenv("AUTH_HASHING_QUEUE", "16"))
+AUTH_HASHING_TIMEOUT = float(os.getenv("AUTH_HASHING_TIMEOUT", "5"))
+# Если задан, /metrics требует заголовок "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Порт HTTP-экспортера метрик Celery-воркера, 0 — выключен.
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "0"))
+
+# Размер пачки массового импорта регистраций: одна проверка дублей и один
+# bulk_create на пачку.
+REGISTRATION_IMPORT_CHUNK_SIZE = int(os.getenv("REGISTRATION_IMPORT_CHUNK_SIZE", "500"))
+
+# Админка считает строки точно только до этого порога, дальше — оценка Postgres.
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv("ADMIN_EXACT_COUNT_LIMIT", "10000"))
+
+# Строк на одну выборку серверного курсора при потоковой выгрузке.
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+
+# Операции над outbox (requeue/replay/purge) идут пачками по id такого размера;
+# OUTBOX_OPS_RATE — сообщений в секунду, 0 — без ограничения.
+OUTBOX_OPS_BATCH_SIZE = int(os.getenv("OUTBOX_OPS_BATCH_SIZE", "500"))
+OUTBOX_OPS_RATE = float(os.getenv("OUTBOX_OPS_RATE", "0"))
+
+# Сжатие JSON-ответов (gzip, brotli — если установлен пакет brotli). Выключено по
+# умолчанию: обычно сжимает прокси, а для больших страниц списков можно включить.
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "false").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_TYPES = {"application/json", "text/csv", "application/x-ndjson"}
+
+# Аренда захваченного outbox-сообщения: пока идет доставка, воркер продлевает ее
+# каждые OUTBOX_LEASE_SECONDS / 3; если он не записал результат и перестал
+# продлевать (упал, завис), сообщение захватывается заново.
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+# Пауза перед повтором неудачной доставки: OUTBOX_RETRY_BACKOFF * 2^(попытка - 1),
+# не больше OUTBOX_RETRY_BACKOFF_CAP секунд; 0 — повтор при следующем захвате.
+OUTBOX_RETRY_BACKOFF = int(os.getenv("OUTBOX_RETRY_BACKOFF", "30"))
+OUTBOX_RETRY_BACKOFF_CAP = int(os.getenv("OUTBOX_RETRY_BACKOFF_CAP", "3600"))
+# OUTBOX_DISPATCHER=true — доставку ведет отдельный процесс dispatch_outbox, и
+# периодическая Celery-задача send_messages не планируется.
+OUTBOX_DISPATCHER = os.getenv("OUTBOX_DISPATCHER", "false").lower() == "true"
+OUTBOX_DISPATCH_CONCURRENCY = int(os.getenv("OUTBOX_DISPATCH_CONCURRENCY", "16"))
+OUTBOX_DISPATCH_POLL_INTERVAL = float(os.getenv("OUTBOX_DISPATCH_POLL_INTERVAL", "1"))
+
+# Лента изменений мероприятий: размер страницы /api/events/changes/, а для SSE —
+# период опроса журнала, интервал heartbeat и максимальная длина одного потока
+# (после нее клиент переподключается с Last-Event-ID).
+CHANGE_FEED_PAGE_SIZE = int(os.getenv("CHANGE_FEED_PAGE_SIZE", "500"))
+CHANGE_FEED_POLL_INTERVAL = float(os.getenv("CHANGE_FEED_POLL_INTERVAL", "2"))
+CHANGE_FEED_HEARTBEAT = float(os.getenv("CHANGE_FEED_HEARTBEAT", "15"))
+CHANGE_FEED_STREAM_TIMEOUT = float(os.getenv("CHANGE_FEED_STREAM_TIMEOUT", "300"))
+
+# Счетчик SQL-запросов на запрос/задачу: лог при превышении бюджетов
+# (0 — без ограничения) и, если включен, заголовок Server-Timing — он раскрывает
+# клиентам время БД, поэтому по умолчанию выключен. Запросы дольше QUERY_SLOW_MS
+# логируются, для доли QUERY_EXPLAIN_SAMPLE_RATE из них SELECT добавляется EXPLAIN.
+QUERY_SERVER_TIMING = os.getenv("QUERY_SERVER_TIMING", "false").lower() == "true"
+QUERY_BUDGET_COUNT = int(os.getenv("QUERY_BUDGET_COUNT", "20"))
+QUERY_BUDGET_MS = int(os.getenv("QUERY_BUDGET_MS", "500"))
+QUERY_TASK_BUDGET_COUNT = int(os.getenv("QUERY_TASK_BUDGET_COUNT", "0"))
+QUERY_TASK_BUDGET_MS = int(os.getenv("QUERY_TASK_BUDGET_MS", "0"))
+QUERY_SLOW_MS = int(os.getenv("QUERY_SLOW_MS", "100"))
+QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("QUERY_EXPLAIN_SAMPLE_RATE", "0"))
 
 
 # Quick-start development settings - unsuitable for production
@@ -59,6 +185,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "src.core.metrics.metrics_middleware",
+    "src.core.queries.query_count_middleware",
+    "src.core.compression.compression_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -67,9 +196,18 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
+if not COMPRESSION_ENABLED:
+    MIDDLEWARE.remove("src.core.compression.compression_middleware")
 
 ROOT_URLCONF = "src.urls"
 
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"src": {"handlers": ["console"], "level": "INFO"}},
+}
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -91,13 +229,64 @@ WSGI_APPLICATION = "src.core.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgres":
+    # DB_POOL_MAX_SIZE > 0 включает нативный пул соединений Django 5 (psycopg_pool),
+    # иначе соединения переиспользуются в пределах DB_CONN_MAX_AGE секунд.
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "0"))
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("POSTGRES_DB", "events"),
+            "USER": os.getenv("POSTGRES_USER", "events"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+            "HOST": os.getenv("POSTGRES_HOST", "localhost"),
+            "PORT": os.getenv("POSTGRES_PORT", "5432"),
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": True,
+        }
     }
-}
-
+    if DB_POOL_MAX_SIZE:
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"] = {
+            "pool": {
+                "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+                "max_size": DB_POOL_MAX_SIZE,
+                "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            }
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+        }
+    }
+    # "wal" — профиль для single-node: читатели не блокируются писателями,
+    # транзакции сразу берут write-lock и ждут его до busy_timeout.
+    SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default")
+    if SQLITE_PROFILE == "wal":
+        DATABASES["default"]["OPTIONS"] = {
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))};"
+                f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_KB', '65536'))};"
+                f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', '268435456'))};"
+                "PRAGMA temp_store=MEMORY;"
+            ),
+            "transaction_mode": "IMMEDIATE",
+        }
+
+
+PASSWORD_HASHERS = [
+    "src.authz.hashers.PooledPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -145,9 +334,12 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "src.authz.authentication.StatelessJWTAuthentication"
+        if JWT_STATELESS_AUTH
+        else "src.authz.authentication.JWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.AllowAny",),
+    "NUM_PROXIES": NUM_PROXIES,
 }
 
 SIMPLE_JWT = {
@@ -167,4 +359,22 @@ CELERY_BEAT_SCHEDULE = {
         "task": "src.events.tasks.send_messages",
         "schedule": 60.0,
     },
+    "sync-events-incremental": {
+        "task": "src.sync.tasks.sync_events_task",
+        "schedule": float(os.getenv("SYNC_INCREMENTAL_INTERVAL", "300")),
+    },
+    "sync-events-full": {
+        "task": "src.sync.tasks.sync_events_task",
+        "schedule": crontab(
+            hour=os.getenv("SYNC_FULL_HOUR", "2"),
+            minute=os.getenv("SYNC_FULL_MINUTE", "0"),
+        ),
+        "kwargs": {"full": True},
+    },
+    "flush-expired-tokens": {
+        "task": "src.authz.tasks.flush_expired_tokens",
+        "schedule": crontab(hour=3, minute=30),
+    },
 }
+if OUTBOX_DISPATCHER:
+    CELERY_BEAT_SCHEDULE.pop("send-every-minute")
@@ -0,0 +1,258 @@
+import gzip
+import json
+import os
+import runpy
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from src.core import settings
+from src.core.compression import brotli, compress_response
+from src.core.metrics import DatabaseCollector
+from src.core.pagination import EstimatedCountPaginator, planner_estimate
+from src.core.queries import task_postrun_handler, task_prerun_handler
+from src.events.models import MessageStatus, Outbox
+
+
+def request_count(view: str, method: str, status: str) -> float:
+    labels = {"view": view, "method": method, "status": status}
+    return REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0
+
+
+class DatabaseCollectorTests(TestCase):
+    def test_counts_unsent_messages_in_one_outbox_query(self):
+        for state, count in (
+            (MessageStatus.SENT, 3),
+            (MessageStatus.PENDING, 2),
+            (MessageStatus.FAILED, 1),
+        ):
+            Outbox.objects.bulk_create(
+                [
+                    Outbox(topic="registration", payload={}, state=state)
+                    for _ in range(count)
+                ]
+            )
+        # Outbox и последняя успешная синхронизация.
+        with self.assertNumQueries(2):
+            metrics = {m.name: m for m in DatabaseCollector().collect()}
+
+        self.assertEqual(
+            {s.labels["state"]: s.value for s in metrics["outbox_messages"].samples},
+            {"pending": 2, "processing": 0, "failed": 1},
+        )
+        self.assertGreaterEqual(
+            metrics["outbox_oldest_pending_age_seconds"].samples[0].value, 0
+        )
+
+    def test_metrics_endpoint(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'outbox_messages{state="pending"} 0.0')
+        self.assertNotContains(response, 'state="sent"} ')
+
+    @patch("src.core.metrics.METRICS_TOKEN", "secret")
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        response = self.client.get(
+            reverse("metrics"), headers={"Authorization": "Bearer secret"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class SqliteWalProfileTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = str(Path(tmp.name) / "wal.sqlite3")
+        env = {"DB_ENGINE": "sqlite", "SQLITE_PROFILE": "wal", "SQLITE_PATH": self.path}
+        with patch.dict(os.environ, env):
+            databases = runpy.run_path(settings.__file__)["DATABASES"]
+        # Соединение с настройками профиля поверх служебных ключей текущей БД.
+        self.wal = DatabaseWrapper(
+            {**connection.settings_dict, **databases["default"]}, alias="wal"
+        )
+        connections["wal"] = self.wal
+        self.addCleanup(connections.__delitem__, "wal")
+        self.addCleanup(self.wal.close)
+
+    def pragma(self, name: str):
+        with self.wal.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        self.assertEqual(self.pragma("journal_mode"), "wal")
+        self.assertEqual(self.pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma("busy_timeout"), 5000)
+        self.assertEqual(self.pragma("cache_size"), -65536)
+        self.assertEqual(self.pragma("temp_store"), 2)  # MEMORY
+
+    def test_atomic_takes_write_lock_immediately(self):
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+        # atomic() без единой записи уже держит блокировку писателя:
+        # второй писатель не может начать транзакцию.
+        with transaction.atomic(using="wal"):
+            with self.assertRaisesMessage(sqlite3.OperationalError, "locked"):
+                other.execute("BEGIN IMMEDIATE")
+        other.execute("BEGIN IMMEDIATE")
+
+
+@patch("src.core.compression.COMPRESSION_MIN_SIZE", 100)
+class CompressionTests(SimpleTestCase):
+    body = json.dumps([{"name": f"Event {i}"} for i in range(50)]).encode()
+
+    def compress(self, accept: str = "gzip", response=None):
+        request = RequestFactory().get("/", headers={"Accept-Encoding": accept})
+        if response is None:
+            response = HttpResponse(self.body, content_type="application/json")
+            response["ETag"] = '"abc"'
+        return compress_response(request, response)
+
+    def test_gzip(self):
+        response = self.compress("deflate, gzip;q=0.5")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["ETag"], 'W/"abc"')
+
+    def test_not_accepted(self):
+        for accept in ("", "identity", "gzip;q=0"):
+            with self.subTest(accept=accept):
+                response = self.compress(accept)
+                self.assertNotIn("Content-Encoding", response)
+                self.assertEqual(response.content, self.body)
+                self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_small_body_left_as_is(self):
+        response = self.compress(
+            response=HttpResponse(b"{}", content_type="application/json")
+        )
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_other_types_and_streaming_skipped(self):
+        for response in (
+            HttpResponse(self.body, content_type="text/html"),
+            StreamingHttpResponse([self.body], content_type="application/json"),
+        ):
+            with self.subTest(response=type(response).__name__):
+                response = self.compress(response=response)
+                self.assertNotIn("Content-Encoding", response)
+                self.assertNotIn("Vary", response)
+
+    @patch("src.core.compression.brotli", None)
+    def test_gzip_when_brotli_not_installed(self):
+        self.assertEqual(self.compress("br, gzip")["Content-Encoding"], "gzip")
+
+    @skipUnless(brotli, "нужен brotli (extra brotli)")
+    def test_brotli_preferred(self):
+        response = self.compress("gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), self.body)
+
+
+@patch("src.core.pagination.ADMIN_EXACT_COUNT_LIMIT", 3)
+class EstimatedCountPaginatorTests(TestCase):
+    def count(self, rows: int) -> int:
+        Outbox.objects.bulk_create(
+            [Outbox(topic="registration", payload={}) for _ in range(rows)]
+        )
+        return EstimatedCountPaginator(Outbox.objects.order_by("-created_at"), 2).count
+
+    def test_exact_count_up_to_limit(self):
+        # Вставка строк и один ограниченный COUNT.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.count(3), 3)
+
+    @patch("src.core.pagination.planner_estimate", return_value=1000)
+    def test_planner_estimate_over_limit(self, estimate):
+        self.assertEqual(self.count(5), 1000)
+        estimate.assert_called_once()
+
+    @patch("src.core.pagination.planner_estimate", return_value=2)
+    def test_estimate_not_below_bounded_count(self, estimate):
+        self.assertEqual(self.count(5), 4)
+
+    @patch("src.core.pagination.planner_estimate", return_value=None)
+    def test_exact_count_without_estimate(self, estimate):
+        self.assertEqual(self.count(5), 5)
+
+    def test_planner_estimate_only_on_postgres(self):
+        estimate = planner_estimate(Outbox.objects.filter(state=MessageStatus.PENDING))
+        if connection.vendor == "postgresql":
+            self.assertIsInstance(estimate, int)
+        else:
+            self.assertIsNone(estimate)
+
+
+class QueryCountMiddlewareTests(TestCase):
+    def test_server_timing_off_by_default(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertNotIn("Server-Timing", response)
+
+    @patch("src.core.queries.QUERY_SERVER_TIMING", True)
+    def test_server_timing_counts_queries(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertRegex(
+            response["Server-Timing"], r'^db;dur=[\d.]+;desc="2 queries", app;dur='
+        )
+
+    @patch("src.core.queries.QUERY_SERVER_TIMING", True)
+    async def test_async_view_counts_queries_in_orm_thread(self):
+        response = await self.async_client.get(reverse("async-event-list"))
+        self.assertIn('desc="0 queries"', response["Server-Timing"])
+
+    @patch("src.core.queries.QUERY_BUDGET_COUNT", 1)
+    def test_over_budget_logged(self):
+        with self.assertLogs("src.core.queries", "WARNING") as logs:
+            self.client.get(reverse("metrics"))
+        self.assertIn("GET /metrics: 2 запросов к БД", logs.output[0])
+
+    @patch("src.core.queries.QUERY_SLOW_MS", 0)
+    @patch("src.core.queries.QUERY_EXPLAIN_SAMPLE_RATE", 1)
+    def test_slow_select_logged_with_explain(self):
+        with self.assertLogs("src.core.queries", "WARNING") as logs:
+            self.client.get(reverse("metrics"))
+        slow = [line for line in logs.output if "медленный запрос" in line]
+        self.assertEqual(len(slow), 2)
+        self.assertNotIn("EXPLAIN не выполнен", slow[0])
+        self.assertGreater(len(slow[0].splitlines()), 1)
+
+    @patch("src.core.queries.QUERY_TASK_BUDGET_COUNT", 1)
+    def test_task_over_budget_logged(self):
+        task = type("Task", (), {"name": "demo"})
+        task_prerun_handler(task_id="t1")
+        list(Outbox.objects.all())
+        list(Outbox.objects.all())
+        with self.assertLogs("src.core.queries", "WARNING") as logs:
+            task_postrun_handler(task_id="t1", task=task)
+        self.assertIn("task demo[t1]: 2 запросов к БД", logs.output[0])
+
+
+class MetricsMiddlewareTests(TestCase):
+    def test_sync_view_observed_by_view_name(self):
+        before = request_count("metrics", "GET", "2xx")
+        self.client.get(reverse("metrics"))
+        self.assertEqual(request_count("metrics", "GET", "2xx"), before + 1)
+
+    def test_unmatched_url(self):
+        before = request_count("unmatched", "GET", "4xx")
+        self.client.get("/no-such-page/")
+        self.assertEqual(request_count("unmatched", "GET", "4xx"), before + 1)
+
+    async def test_async_view(self):
+        before = request_count("async-event-list", "GET", "4xx")
+        response = await self.async_client.get(reverse("async-event-list"))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(request_count("async-event-list", "GET", "4xx"), before + 1)
@@ -1,10 +1,37 @@
-from django.contrib import admin
+from uuid import UUID
 
-from src.events.models import Event, EventRegistration, Venue
+from django.contrib import admin, messages
+from django.urls import reverse
+from django.utils.html import format_html
+
+from src.core.pagination import EstimatedCountPaginator
+from src.core.settings import OUTBOX_OPS_BATCH_SIZE
+from src.events.models import Event, EventRegistration, MessageStatus, Outbox, Venue
+from src.events.utils.outbox import backlog_summary, purge_messages, requeue_messages
+
+
+class HighVolumeAdmin(admin.ModelAdmin):
+    # Для больших таблиц: без полного COUNT(*) и с поиском по индексам.
+    # Строка-UUID ищется точным совпадением по uuid_search_fields.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    uuid_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        try:
+            value = UUID(term)
+        except ValueError:
+            return super().get_search_results(request, queryset, search_term)
+        query = None
+        for field in self.uuid_search_fields:
+            q = queryset.filter(**{field: value})
+            query = q if query is None else query | q
+        return (query if query is not None else queryset.none()), False
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(HighVolumeAdmin):
     list_display = (
         "id",
         "external_id",
@@ -13,14 +40,109 @@ class EventAdmin(admin.ModelAdmin):
         "changed_at",
         "venue",
         "status",
+        "registrations_link",
     )
+    list_select_related = ("venue",)
+    list_filter = ("status", "event_date")
+    search_fields = ("name",)
+    uuid_search_fields = ("id", "external_id")
+    autocomplete_fields = ("venue",)
+
+    @admin.display(description="Регистрации")
+    def registrations_link(self, obj):
+        url = reverse("admin:events_eventregistration_changelist")
+        return format_html('<a href="{}?event__id__exact={}">Открыть</a>', url, obj.id)
 
 
 @admin.register(Venue)
-class VenueAdmin(admin.ModelAdmin):
+class VenueAdmin(HighVolumeAdmin):
     list_display = ("id", "external_id", "name")
+    search_fields = ("name",)
+    uuid_search_fields = ("id", "external_id")
 
 
 @admin.register(EventRegistration)
-class EventRegistrationAdmin(admin.ModelAdmin):
-    list_display = ("id", "event", "full_name", "email", "confirmation_code")
+class EventRegistrationAdmin(HighVolumeAdmin):
+    list_display = ("id", "event", "full_name", "email", "created_at", "confirmed_at")
+    list_select_related = ("event",)
+    list_filter = ("event__status", "created_at")
+    search_fields = ("full_name",)
+    uuid_search_fields = ("id", "event__id", "event__external_id")
+    autocomplete_fields = ("event",)
+    ordering = ("-created_at",)
+    readonly_fields = ("confirmation_code", "confirmed_at")
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if "@" in term:
+            return queryset.filter(email=term), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(Outbox)
+class OutboxAdmin(HighVolumeAdmin):
+    # Действия применяются к выбранным строкам (или ко всему фильтру при
+    # "выбрать все") пачками по id, без загрузки сообщений в память.
+    list_display = ("id", "topic", "state", "attempts", "created_at", "error")
+    list_filter = ("state", "topic", "created_at")
+    uuid_search_fields = ("id",)
+    ordering = ("-created_at",)
+    actions = ("requeue_failed", "replay", "purge")
+
+    def get_actions(self, request):
+        # Стандартное удаление строит граф объектов в памяти — вместо него purge.
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {**(extra_context or {}), "backlog": backlog_summary()}
+        return super().changelist_view(request, extra_context)
+
+    def bounded(self, request, queryset, action: str):
+        # В запросе админки — не больше одной пачки. Большие выборки идут через
+        # команду outbox: пачками и с темпом OUTBOX_OPS_RATE.
+        ids = list(
+            queryset.order_by().values_list("id", flat=True)[
+                : OUTBOX_OPS_BATCH_SIZE + 1
+            ]
+        )
+        if len(ids) <= OUTBOX_OPS_BATCH_SIZE:
+            return Outbox.objects.filter(id__in=ids)
+        command = ["python manage.py outbox", action]
+        if state := request.GET.get("state__exact"):
+            command.append(f"--state {state}")
+        if topic := request.GET.get("topic__exact"):
+            command.append(f"--topic {topic}")
+        self.message_user(
+            request,
+            f"Выбрано больше {OUTBOX_OPS_BATCH_SIZE} сообщений, ничего не изменено. "
+            f"Используйте команду: {' '.join(command)}",
+            messages.WARNING,
+        )
+        return None
+
+    @admin.action(description="Вернуть в очередь (только FAILED)")
+    def requeue_failed(self, request, queryset):
+        qs = self.bounded(
+            request, queryset.filter(state=MessageStatus.FAILED), "requeue"
+        )
+        if qs is not None:
+            count = requeue_messages(qs)
+            self.message_user(
+                request, f"Возвращено в очередь: {count}", messages.SUCCESS
+            )
+
+    @admin.action(description="Отправить повторно (кроме «В обработке»)")
+    def replay(self, request, queryset):
+        qs = self.bounded(request, queryset, "replay")
+        if qs is not None:
+            count = requeue_messages(qs)
+            self.message_user(request, f"Поставлено на повторную отправку: {count}")
+
+    @admin.action(description="Удалить (кроме «В обработке»)", permissions=["delete"])
+    def purge(self, request, queryset):
+        qs = self.bounded(request, queryset, "purge")
+        if qs is not None:
+            count = purge_messages(qs)
+            self.message_user(request, f"Удалено: {count}", messages.SUCCESS)
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import time
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from src.authz.authentication import aauthenticate
+from src.core.settings import (
+    CHANGE_FEED_HEARTBEAT,
+    CHANGE_FEED_PAGE_SIZE,
+    CHANGE_FEED_POLL_INTERVAL,
+    CHANGE_FEED_STREAM_TIMEOUT,
+    REST_FRAMEWORK,
+)
+from src.events.models import Event
+from src.events.serializers import EventRegistrationSerializer, EventSerializer
+from src.events.utils.changes import change_data, changes_after, parse_cursor
+from src.events.utils.registrations import create_registration
+from src.events.views import EventViewSet
+
+PAGE_SIZE = REST_FRAMEWORK["PAGE_SIZE"]
+
+
+async def authenticate(request):
+    try:
+        user = await aauthenticate(request)
+    except APIException as e:
+        return None, JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+    if user is None:
+        return None, JsonResponse(
+            {"detail": "Учетные данные не были предоставлены"}, status=401
+        )
+    return user, None
+
+
+def page_link(request, page: int, pages: int) -> str | None:
+    if page < 1 or page > pages:
+        return None
+    url = request.build_absolute_uri()
+    if page == 1:
+        return remove_query_param(url, "page")
+    return replace_query_param(url, "page", page)
+
+
+@require_GET
+async def event_list(request):
+    _, error = await authenticate(request)
+    if error:
+        return error
+
+    view = EventViewSet(request=Request(request), format_kwarg=None, action="list")
+    try:
+        queryset = view.filter_queryset(view.get_queryset())
+        page = int(request.GET.get("page", 1))
+    except APIException as e:
+        return JsonResponse(e.get_full_details(), status=e.status_code, safe=False)
+    except ValueError:
+        page = 0
+
+    count = await queryset.acount()
+    pages = max(1, -(-count // PAGE_SIZE))
+    if page < 1 or page > pages:
+        return JsonResponse({"detail": "Неверная страница"}, status=404)
+
+    offset = (page - 1) * PAGE_SIZE
+    events = [event async for event in queryset[offset : offset + PAGE_SIZE]]
+    return JsonResponse(
+        {
+            "count": count,
+            "next": page_link(request, page + 1, pages),
+            "previous": page_link(request, page - 1, pages),
+            "results": EventSerializer(
+                events, many=True, fields=view.get_sparse_fields()
+            ).data,
+        }
+    )
+
+
+@csrf_exempt
+@require_POST
+async def event_register(request, event_id: str):
+    _, error = await authenticate(request)
+    if error:
+        return error
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"detail": "Некорректный JSON"}, status=400)
+
+    try:
+        event = await Event.objects.filter(external_id=UUID(str(event_id))).afirst()
+    except ValueError:
+        event = None
+    if event is None:
+        return JsonResponse(
+            {"detail": "Мероприятие не найдено. Проверьте id мероприятия"}, status=404
+        )
+
+    serializer = EventRegistrationSerializer(data=data, context={"event": event})
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    try:
+        await sync_to_async(create_registration)(
+            event,
+            full_name=serializer.validated_data["full_name"],
+            email=serializer.validated_data["email"],
+        )
+    except IntegrityError:
+        return JsonResponse(
+            {"detail": "Для этого мероприятия такой email уже зарегистрирован"},
+            status=409,
+        )
+
+    return JsonResponse(
+        {
+            "detail": "Заявка на регистрацию получена, ждите код подтверждения на указанный email"
+        },
+        status=201,
+    )
+
+
+def sse_message(change) -> str:
+    data = json.dumps(change_data(change), cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f"id: {change.id}\nevent: {change.kind}\ndata: {data}\n\n"
+
+
+async def change_stream(cursor: int):
+    # Опрашиваем журнал раз в CHANGE_FEED_POLL_INTERVAL; отставание догоняем
+    # страницами без пауз. Через CHANGE_FEED_STREAM_TIMEOUT поток закрывается,
+    # и клиент переподключается с Last-Event-ID.
+    started = last_sent = time.monotonic()
+    while time.monotonic() - started < CHANGE_FEED_STREAM_TIMEOUT:
+        changes = [change async for change in changes_after(cursor)]
+        for change in changes:
+            yield sse_message(change)
+        if changes:
+            cursor = changes[-1].id
+            last_sent = time.monotonic()
+            if len(changes) == CHANGE_FEED_PAGE_SIZE:
+                continue
+        elif time.monotonic() - last_sent >= CHANGE_FEED_HEARTBEAT:
+            yield ": heartbeat\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(CHANGE_FEED_POLL_INTERVAL)
+
+
+@require_GET
+async def event_changes_stream(request):
+    _, error = await authenticate(request)
+    if error:
+        return error
+
+    try:
+        cursor = parse_cursor(
+            request.headers.get("Last-Event-ID") or request.GET.get("since")
+        )
+    except ValueError:
+        return JsonResponse({"detail": "Некорректный курсор"}, status=400)
+
+    response = StreamingHttpResponse(
+        change_stream(cursor), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,53 @@
+from datetime import datetime, time
+
+from django.db.models import Subquery
+from django.utils import timezone
+from django_filters import rest_framework as filters
+
+from src.events.models import Event, EventStatus, Venue
+
+
+class DayFilter(filters.DateFilter):
+    # День превращается в границу диапазона по event_date, а не в event_date__date:
+    # так фильтр остается range-условием по индексу.
+    def __init__(self, *args, end: bool = False, **kwargs):
+        self.end = end
+        kwargs.setdefault("field_name", "event_date")
+        kwargs.setdefault("lookup_expr", "lte" if end else "gte")
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if value:
+            value = timezone.make_aware(
+                datetime.combine(value, time.max if self.end else time.min)
+            )
+        return super().filter(qs, value)
+
+
+class EventFilter(filters.FilterSet):
+    venue = filters.UUIDFilter(
+        method="filter_venue", help_text="ID площадки в провайдере"
+    )
+    status = filters.ChoiceFilter(choices=EventStatus.choices)
+    date_from = DayFilter(help_text="Мероприятия с этого дня включительно")
+    date_to = DayFilter(end=True, help_text="Мероприятия по этот день включительно")
+    upcoming = filters.BooleanFilter(
+        method="filter_upcoming", help_text="true — только будущие мероприятия"
+    )
+
+    class Meta:
+        model = Event
+        fields = {"name": ["exact", "icontains", "istartswith"]}
+
+    def filter_venue(self, queryset, name, value):
+        # venue_id = (подзапрос по уникальному external_id), а не соединение с
+        # площадками: планировщик листает event_venue_date_idx в порядке списка.
+        # Подзапрос ленивый — фильтр не ходит в БД и годится для async-views.
+        venue = Venue.objects.filter(external_id=value).order_by().values("id")[:1]
+        return queryset.filter(venue_id=Subquery(venue))
+
+    def filter_upcoming(self, queryset, name, value):
+        now = timezone.now()
+        if value:
+            return queryset.filter(event_date__gte=now)
+        return queryset.filter(event_date__lt=now)
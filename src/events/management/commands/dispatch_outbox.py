@@ -0,0 +1,257 @@
+import asyncio
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from src.core.metrics import serve_worker_metrics
+from src.core.settings import (
+    OUTBOX_DISPATCH_CONCURRENCY,
+    OUTBOX_DISPATCH_POLL_INTERVAL,
+    OUTBOX_LEASE_SECONDS,
+)
+from src.events.tasks import (
+    BATCH_SIZE,
+    apply_results,
+    claim_messages,
+    deliver,
+    release_messages,
+    renew_leases,
+)
+from src.events.utils.notifications import get_transport
+
+
+def claim(batch_size: int, lease: float):
+    close_old_connections()
+    return claim_messages(batch_size, lease)
+
+
+def record(msgs, results) -> int:
+    close_old_connections()
+    return apply_results(msgs, results)
+
+
+def release(msgs) -> int:
+    close_old_connections()
+    return release_messages(msgs)
+
+
+def renew(msgs, lease: float) -> int:
+    close_old_connections()
+    return renew_leases(msgs, lease)
+
+
+async def wait(event: asyncio.Event, timeout: float) -> bool:
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+
+class Dispatcher:
+    # Захватчик берет из outbox ровно столько сообщений, сколько помещается в
+    # окно (concurrency пачек в доставке и еще столько же в очереди), воркеры
+    # отправляют пачки в пуле потоков, а результаты пишутся общими UPDATE.
+    # Запросы к БД идут через sync_to_async в одном потоке. Аренда всех
+    # захваченных, но еще не записанных сообщений (в очереди и в доставке)
+    # продлевается каждые lease / 3 секунд.
+    def __init__(self, transports, batch_size: int, poll_interval: float, lease, log):
+        self.transports = transports
+        self.chunk_size = max(t.batch_size for t in transports)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.log = log
+        self.capacity = 2 * len(transports) * self.chunk_size
+        self.in_flight = 0
+        self.leased = {}
+        self.sent = 0
+        self.processed = 0
+        self.released = 0
+        self.queue = asyncio.Queue()
+        self.results = asyncio.Queue()
+        self.stopping = asyncio.Event()
+        self.finished = asyncio.Event()
+        self.wakeup = asyncio.Event()
+        self.executor = ThreadPoolExecutor(len(transports), "outbox-dispatch")
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+    async def run(self):
+        workers = [asyncio.create_task(self.work(t)) for t in self.transports]
+        flusher = asyncio.create_task(self.flush())
+        heartbeat = asyncio.create_task(self.heartbeat())
+        try:
+            await self.claim_loop()
+            await asyncio.gather(*workers)
+            await self.results.put(None)
+            await flusher
+        finally:
+            self.finished.set()
+            await heartbeat
+            self.executor.shutdown()
+
+    async def heartbeat(self):
+        while not await wait(self.finished, self.lease / 3):
+            msgs = list(self.leased.values())
+            if not msgs:
+                continue
+            try:
+                renewed = await sync_to_async(renew)(msgs, self.lease)
+            except Exception as e:
+                self.log(f"Ошибка продления аренды: {e}")
+                continue
+            if renewed < len(msgs):
+                # Аренда успела истечь, и сообщения захватил другой воркер:
+                # их результат отсюда будет отброшен.
+                self.log(f"Аренда {len(msgs) - renewed} сообщений потеряна")
+
+    async def claim_loop(self):
+        while not self.stopping.is_set():
+            free = min(self.capacity - self.in_flight, self.batch_size)
+            if free <= 0:
+                self.wakeup.clear()
+                await wait(self.wakeup, self.poll_interval)
+                continue
+            try:
+                msgs = await sync_to_async(claim)(free, self.lease)
+            except Exception as e:
+                self.log(f"Ошибка захвата сообщений: {e}")
+                msgs = []
+            self.in_flight += len(msgs)
+            self.leased.update((msg.id, msg) for msg in msgs)
+            for start in range(0, len(msgs), self.chunk_size):
+                self.queue.put_nowait(msgs[start : start + self.chunk_size])
+            if len(msgs) < free:
+                # Бэклог выбран: ждем новых сообщений или остановки.
+                await wait(self.stopping, self.poll_interval)
+
+        # Остановка: пачки из очереди сразу возвращаются в PENDING, воркеры
+        # дописывают то, что уже отправляют, и выходят.
+        queued = []
+        while not self.queue.empty():
+            queued.extend(self.queue.get_nowait())
+        if queued:
+            self.released = await sync_to_async(release)(queued)
+            self.in_flight -= len(queued)
+            self.forget(queued)
+        for _ in self.transports:
+            self.queue.put_nowait(None)
+
+    async def work(self, transport):
+        loop = asyncio.get_running_loop()
+        while (msgs := await self.queue.get()) is not None:
+            results = await loop.run_in_executor(
+                self.executor, deliver, transport, msgs
+            )
+            await self.results.put((msgs, results))
+
+    async def flush(self):
+        done = False
+        while not done:
+            batch = [await self.results.get()]
+            while not self.results.empty():
+                batch.append(self.results.get_nowait())
+            if batch[-1] is None:
+                done = True
+                batch.pop()
+            if not batch:
+                continue
+            msgs = [msg for msgs, _ in batch for msg in msgs]
+            results = {k: v for _, r in batch for k, v in r.items()}
+            try:
+                self.sent += await sync_to_async(record)(msgs, results)
+            except Exception as e:
+                # Сообщения остаются в PROCESSING и будут захвачены снова после
+                # истечения аренды.
+                self.log(f"Ошибка записи результатов: {e}")
+            self.processed += len(msgs)
+            self.in_flight -= len(msgs)
+            self.forget(msgs)
+            self.wakeup.set()
+
+    def forget(self, msgs):
+        for msg in msgs:
+            self.leased.pop(msg.id, None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Постоянная доставка outbox: захват сообщений с арендой (SKIP LOCKED), "
+        "N пачек в доставке одновременно, корректная остановка по SIGTERM. "
+        "Можно запускать несколько экземпляров"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=OUTBOX_DISPATCH_CONCURRENCY,
+            help="Пачек в доставке одновременно (по транспорту на каждую)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Максимум сообщений, захватываемых одним запросом",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=OUTBOX_DISPATCH_POLL_INTERVAL,
+            help="Пауза между опросами пустого outbox, секунд",
+        )
+        parser.add_argument(
+            "--lease",
+            type=float,
+            default=OUTBOX_LEASE_SECONDS,
+            help="Аренда захваченного сообщения, секунд",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=0,
+            help="Порт HTTP-экспортера метрик, 0 — выключен",
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--concurrency и --batch-size должны быть больше 0")
+        if options["metrics_port"]:
+            serve_worker_metrics(options["metrics_port"])
+        transports = [get_transport() for _ in range(options["concurrency"])]
+        try:
+            dispatcher = asyncio.run(self.dispatch(transports, options))
+        finally:
+            for transport in transports:
+                transport.close()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Остановлено. Обработано: {dispatcher.processed}, "
+                f"отправлено: {dispatcher.sent}, "
+                f"возвращено в очередь: {dispatcher.released}"
+            )
+        )
+
+    async def dispatch(self, transports, options) -> Dispatcher:
+        dispatcher = Dispatcher(
+            transports,
+            options["batch_size"],
+            options["poll_interval"],
+            options["lease"],
+            self.stderr.write,
+        )
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, dispatcher.stop)
+        self.stdout.write(
+            f"Доставка outbox: параллельных пачек {len(transports)}, "
+            f"до {dispatcher.chunk_size} сообщений в пачке, аренда {options['lease']:g} с"
+        )
+        await dispatcher.run()
+        return dispatcher
@@ -0,0 +1,63 @@
+import json
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+from uuid import UUID
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.core.settings import REGISTRATION_IMPORT_CHUNK_SIZE
+from src.events.models import Event, EventStatus
+from src.events.utils.registrations import (
+    IMPORT_FORMATS,
+    import_registrations,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Массовый импорт регистраций на мероприятие из CSV/JSON/NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_id", help="ID мероприятия в провайдере")
+        parser.add_argument("path", help="Путь к файлу, '-' — stdin")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="Формат файла, по умолчанию по расширению",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=REGISTRATION_IMPORT_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--report",
+            action="store_true",
+            help="Печатать результат по каждой строке (NDJSON), а не только итог",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.filter(external_id=UUID(options["event_id"])).first()
+        except ValueError:
+            event = None
+        if event is None:
+            raise CommandError("Мероприятие не найдено")
+        if event.status != EventStatus.OPEN:
+            raise CommandError("Регистрация возможна только на открытое мероприятие")
+
+        path = options["path"]
+        fmt = options["format"] or Path(path).suffix.lstrip(".").lower()
+        if fmt == "jsonl":
+            fmt = "ndjson"
+        if fmt not in IMPORT_FORMATS:
+            raise CommandError("Укажите --format: csv, json или ndjson")
+
+        # stdin не закрываем — он принадлежит процессу, а не команде.
+        stdin = nullcontext(sys.stdin.buffer)
+        with stdin if path == "-" else open(path, "rb") as stream:
+            report = import_registrations(
+                event, read_rows(stream, fmt), options["chunk_size"]
+            )
+            for line in report:
+                if options["report"] or "row" not in line:
+                    self.stdout.write(json.dumps(line, ensure_ascii=False))
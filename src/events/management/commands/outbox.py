@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from src.core.settings import OUTBOX_OPS_BATCH_SIZE, OUTBOX_OPS_RATE
+from src.events.models import MessageStatus
+from src.events.utils.outbox import (
+    backlog_summary,
+    filter_messages,
+    parse_age,
+    purge_messages,
+    requeue_messages,
+)
+
+# Статусы, с которыми работает действие, если --state не указан.
+DEFAULT_STATES = {
+    "requeue": [MessageStatus.FAILED],
+    "replay": [MessageStatus.SENT, MessageStatus.FAILED],
+    "purge": [MessageStatus.SENT],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Операции над outbox: stats — бэклог по статусам/топикам/возрасту, "
+        "requeue — вернуть FAILED в очередь, replay — переотправить по фильтру, "
+        "purge — удалить по фильтру"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=("stats", "requeue", "replay", "purge"))
+        parser.add_argument(
+            "--state",
+            action="append",
+            choices=[s for s in MessageStatus.values if s != MessageStatus.PROCESSING],
+            help="Статус сообщений, можно несколько раз",
+        )
+        parser.add_argument("--topic")
+        parser.add_argument("--older-than", type=parse_age, help="Например 2h, 7d")
+        parser.add_argument("--newer-than", type=parse_age)
+        parser.add_argument("--error-contains")
+        parser.add_argument("--limit", type=int, help="Не больше N сообщений")
+        parser.add_argument("--batch-size", type=int, default=OUTBOX_OPS_BATCH_SIZE)
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=OUTBOX_OPS_RATE,
+            help="Сообщений в секунду, 0 — без ограничения",
+        )
+        parser.add_argument(
+            "--keep-attempts",
+            action="store_true",
+            help="Не сбрасывать счетчик попыток при requeue/replay",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Только посчитать сообщения"
+        )
+
+    def handle(self, *args, **options):
+        action = options["action"]
+        if action == "stats":
+            self.print_stats()
+            return
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size должен быть больше нуля")
+
+        qs = filter_messages(
+            states=options["state"] or DEFAULT_STATES[action],
+            topic=options["topic"],
+            older_than=options["older_than"],
+            newer_than=options["newer_than"],
+            error_contains=options["error_contains"],
+        ).exclude(state=MessageStatus.PROCESSING)
+
+        if options["dry_run"]:
+            count = qs.count()
+            if options["limit"] is not None:
+                count = min(count, options["limit"])
+            self.stdout.write(f"{action}: подходит сообщений: {count}")
+            return
+
+        if action == "purge":
+            count = purge_messages(
+                qs, options["batch_size"], options["rate"], options["limit"]
+            )
+        else:
+            count = requeue_messages(
+                qs,
+                options["batch_size"],
+                options["rate"],
+                options["limit"],
+                reset_attempts=not options["keep_attempts"],
+            )
+        self.stdout.write(self.style.SUCCESS(f"{action}: обработано {count}"))
+
+    def print_stats(self):
+        rows = backlog_summary(include_sent=True)
+        if not rows:
+            self.stdout.write("Outbox пуст")
+            return
+        self.stdout.write(f"{'state':<12} {'topic':<30} {'count':>10}  oldest age")
+        for row in rows:
+            age = str(row["age"]).split(".")[0] if row["age"] else "-"
+            self.stdout.write(
+                f"{row['state']:<12} {row['topic']:<30} {row['count']:>10}  {age}"
+            )
@@ -5,6 +5,22 @@ import uuid
 from django.db import migrations, models
 
 
+def registration_ids_to_uuid(apps, schema_editor):
+    # Postgres не приводит bigint к uuid, поэтому AlterField ниже падает на
+    # ALTER COLUMN ... USING "id"::uuid. Заранее переводим колонку сами: старые
+    # id становятся uuid из их hex-записи, дальше AlterField приводит uuid к uuid.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = schema_editor.quote_name("events_eventregistration")
+    schema_editor.execute(
+        f'ALTER TABLE {table} ALTER COLUMN "id" DROP IDENTITY IF EXISTS'
+    )
+    schema_editor.execute(
+        f'ALTER TABLE {table} ALTER COLUMN "id" TYPE uuid '
+        f"USING lpad(to_hex(\"id\"), 32, '0')::uuid"
+    )
+
+
 class Migration(migrations.Migration):
     dependencies = [
         ("events", "0001_initial"),
@@ -63,6 +79,7 @@ class Migration(migrations.Migration):
                 "verbose_name_plural": "Outbox сообщения",
             },
         ),
+        migrations.RunPython(registration_ids_to_uuid, migrations.RunPython.noop),
         migrations.AlterField(
             model_name="eventregistration",
             name="id",
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0002_outbox_alter_eventregistration_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outbox",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                verbose_name="Создано",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="outbox",
+            index=models.Index(
+                fields=["state", "created_at"], name="events_outb_state_5774bf_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:18
+
+from django.db import migrations, models
+
+# icontains в Postgres — UPPER(col) LIKE UPPER(%s), под него trigram-индексы.
+TRIGRAM_INDEXES = (
+    ("events_event_name_trgm", "events_event", "name"),
+    ("events_venue_name_trgm", "events_venue", "name"),
+    ("events_reg_full_name_trgm", "events_eventregistration", "full_name"),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+            f"USING gin (UPPER({column}) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0003_outbox_created_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="eventregistration",
+            index=models.Index(fields=["email"], name="events_even_email_87537a_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="eventregistration",
+            index=models.Index(
+                fields=["created_at"], name="events_even_created_60dc75_idx"
+            ),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0004_registration_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["status", "-event_date", "name"], name="event_status_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["venue", "-event_date", "name"], name="event_venue_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:26
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0005_event_listing_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "external_id",
+                    models.UUIDField(verbose_name="ID мероприятия в провайдере"),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("created", "Добавлено"),
+                            ("updated", "Изменено"),
+                            ("closed", "Закрыто"),
+                        ],
+                        max_length=8,
+                        verbose_name="Тип изменения",
+                    ),
+                ),
+                (
+                    "data",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="Состояние после изменения",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Записано"),
+                ),
+                (
+                    "event",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="changes",
+                        to="events.event",
+                        verbose_name="Мероприятие",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Изменение мероприятия",
+                "verbose_name_plural": "Изменения мероприятий",
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:28
+
+from django.db import migrations, models
+from django.utils.crypto import salted_hmac
+
+# Копия src.events.utils.notifications.CONFIRMATION_SALT: миграция не зависит
+# от кода приложения.
+CONFIRMATION_SALT = "src.events.confirmation_code"
+BATCH_SIZE = 1000
+
+
+def hash_confirmation_codes(apps, schema_editor):
+    # Открытые коды уже отправлены письмами; в БД остается только их HMAC.
+    EventRegistration = apps.get_model("events", "EventRegistration")
+    batch = []
+    rows = EventRegistration.objects.only("id", "confirmation_code").iterator(
+        chunk_size=BATCH_SIZE
+    )
+    for reg in rows:
+        if len(reg.confirmation_code) == 64:
+            continue
+        reg.confirmation_code = salted_hmac(
+            CONFIRMATION_SALT, reg.confirmation_code, algorithm="sha256"
+        ).hexdigest()
+        batch.append(reg)
+        if len(batch) >= BATCH_SIZE:
+            EventRegistration.objects.bulk_update(batch, ["confirmation_code"])
+            batch = []
+    if batch:
+        EventRegistration.objects.bulk_update(batch, ["confirmation_code"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0006_eventchange"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="eventregistration",
+            name="confirmed_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Время подтверждения"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="eventregistration",
+            name="confirmation_code",
+            field=models.CharField(
+                max_length=64, verbose_name="Хеш кода подтверждения"
+            ),
+        ),
+        migrations.RunPython(hash_confirmation_codes, migrations.RunPython.noop),
+    ]
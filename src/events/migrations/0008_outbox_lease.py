@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0007_registration_confirmation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outbox",
+            name="lease_expires_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Аренда истекает"
+            ),
+        ),
+    ]
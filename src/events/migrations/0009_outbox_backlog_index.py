@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0008_outbox_lease"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="outbox",
+            index=models.Index(
+                condition=models.Q(("state", "sent"), _negated=True),
+                fields=["state", "topic", "created_at"],
+                name="outbox_backlog_idx",
+            ),
+        ),
+    ]
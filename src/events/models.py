@@ -1,5 +1,6 @@
 from uuid import uuid4
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -53,6 +54,18 @@ class Event(models.Model):
         verbose_name = "Мероприятие"
         verbose_name_plural = "Мероприятия"
         ordering = ["-event_date", "name"]
+        # Под списки с фильтром по статусу/площадке: диапазон по event_date и
+        # сортировка по умолчанию (-event_date, name) читаются прямо из индекса.
+        indexes = [
+            models.Index(
+                fields=["status", "-event_date", "name"],
+                name="event_status_date_idx",
+            ),
+            models.Index(
+                fields=["venue", "-event_date", "name"],
+                name="event_venue_date_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name}"
@@ -68,12 +81,16 @@ class EventRegistration(models.Model):
     )
     full_name = models.CharField(max_length=128, verbose_name="Имя регистрирующегося")
     email = models.EmailField(verbose_name="Электронная почта")
+    # HMAC-SHA256 кода (confirmation_digest), сам код есть только в payload outbox.
     confirmation_code = models.CharField(
-        max_length=12, verbose_name="Код подтверждения"
+        max_length=64, verbose_name="Хеш кода подтверждения"
     )
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name="Время отправки подтверждающего кода"
     )
+    confirmed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Время подтверждения"
+    )
 
     class Meta:
         verbose_name = "Регистрация"
@@ -81,6 +98,8 @@ class EventRegistration(models.Model):
         unique_together = [("event", "email")]
         indexes = [
             models.Index(fields=["event", "email"]),
+            models.Index(fields=["email"]),
+            models.Index(fields=["created_at"]),
         ]
 
     def __str__(self):
@@ -107,7 +126,54 @@ class Outbox(models.Model):
     )
     attempts = models.PositiveIntegerField(default=0, verbose_name="Количество попыток")
     error = models.TextField(blank=True, default="", verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    # До этого времени сообщение в PROCESSING принадлежит захватившему его
+    # воркеру; после — считается брошенным и захватывается заново. У PENDING
+    # после неудачной попытки — время, раньше которого повтор не захватывается.
+    lease_expires_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Аренда истекает"
+    )
 
     class Meta:
         verbose_name = "Outbox сообщение"
         verbose_name_plural = "Outbox сообщения"
+        indexes = [
+            models.Index(fields=["state", "created_at"]),
+            models.Index(
+                fields=["state", "topic", "created_at"],
+                condition=~models.Q(state=MessageStatus.SENT),
+                name="outbox_backlog_idx",
+            ),
+        ]
+
+
+class ChangeKind(models.TextChoices):
+    CREATED = "created", "Добавлено"
+    UPDATED = "updated", "Изменено"
+    CLOSED = "closed", "Закрыто"
+
+
+class EventChange(models.Model):
+    # Журнал изменений мероприятий только на добавление: id служит курсором
+    # ленты /api/events/changes/. Пишет его только sync_events одной транзакцией
+    # на прогон через record_changes, которая не дает параллельным прогонам
+    # закоммитить id не по порядку, поэтому курсор не пропускает записи.
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="changes",
+        verbose_name="Мероприятие",
+    )
+    external_id = models.UUIDField(verbose_name="ID мероприятия в провайдере")
+    kind = models.CharField(
+        max_length=8, choices=ChangeKind.choices, verbose_name="Тип изменения"
+    )
+    data = models.JSONField(
+        encoder=DjangoJSONEncoder, verbose_name="Состояние после изменения"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Записано")
+
+    class Meta:
+        verbose_name = "Изменение мероприятия"
+        verbose_name_plural = "Изменения мероприятий"
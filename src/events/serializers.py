@@ -9,12 +9,54 @@ class VenueSerializer(serializers.ModelSerializer):
         fields = ["name"]
 
 
-class EventSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    # fields=[...] оставляет в ответе только перечисленные поля.
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def parse_fields(value: str | None, allowed) -> list[str] | None:
+    # "?fields=id,name" -> ["id", "name"]; без параметра — все поля.
+    if not value:
+        return None
+    fields = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in allowed]
+    if unknown or not fields:
+        raise serializers.ValidationError(
+            {"fields": [f"Допустимые поля: {', '.join(allowed)}"]}
+        )
+    return fields
+
+
+class EventSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    id = serializers.UUIDField(source="external_id", read_only=True)
     venue = VenueSerializer()
 
     class Meta:
         model = Event
-        fields = ["name", "event_date", "status", "venue"]
+        fields = ["id", "name", "event_date", "status", "venue"]
+
+    # Колонки модели под каждое поле ответа: для only() и select_related.
+    COLUMNS = {
+        "id": ["external_id"],
+        "name": ["name"],
+        "event_date": ["event_date"],
+        "status": ["status"],
+        "venue": ["venue__name"],
+    }
+
+    @classmethod
+    def sparse_queryset(cls, queryset, fields: list[str] | None):
+        if fields is None:
+            return queryset
+        if "venue" not in fields:
+            queryset = queryset.select_related(None)
+        return queryset.only(
+            *[column for name in fields for column in cls.COLUMNS[name]]
+        )
 
 
 class EventRegistrationSerializer(serializers.Serializer):
@@ -40,3 +82,8 @@ class EventRegistrationSerializer(serializers.Serializer):
             )
 
         return attrs
+
+
+class EventConfirmSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    code = serializers.RegexField(r"^\d{6}$")
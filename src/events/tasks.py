@@ -1,18 +1,42 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
 from celery import shared_task
-from django.db import transaction
-from django.db.models import F
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 
+from src.core.metrics import OUTBOX_DELIVERIES, OUTBOX_DELIVERY_LATENCY
+from src.core.settings import (
+    OUTBOX_LEASE_SECONDS,
+    OUTBOX_RETRY_BACKOFF,
+    OUTBOX_RETRY_BACKOFF_CAP,
+)
 from src.events.models import MessageStatus, Outbox
-from src.events.utils.notifications import send_confirmation_email
+from src.events.utils.notifications import (
+    Notification,
+    PermanentError,
+    get_transport,
+)
 
 BATCH_SIZE = 100
 MAX_ATTEMPTS = 5
 
 
-def claim_messages(batch_size: int = BATCH_SIZE):
+def claim_messages(batch_size: int = BATCH_SIZE, lease: float = OUTBOX_LEASE_SECONDS):
+    # Захват с арендой: PENDING, у которых подошло время повтора, и брошенные
+    # PROCESSING (аренда истекла или ее нет — строки до появления аренды).
+    # lease_expires_at одной пачки служит меткой владельца: результаты пишутся,
+    # только пока она не перезаписана.
+    now = timezone.now()
+    due = Q(lease_expires_at__lt=now) | Q(lease_expires_at__isnull=True)
     with transaction.atomic():
         qs = (
-            Outbox.objects.filter(state=MessageStatus.PENDING)
+            Outbox.objects.filter(
+                due, state__in=[MessageStatus.PENDING, MessageStatus.PROCESSING]
+            )
             .order_by("id")
             .select_for_update(skip_locked=True)
         )
@@ -22,42 +46,154 @@ def claim_messages(batch_size: int = BATCH_SIZE):
         Outbox.objects.filter(id__in=ids).update(
             state=MessageStatus.PROCESSING,
             attempts=F("attempts") + 1,
+            lease_expires_at=now + timedelta(seconds=lease),
         )
     return list(Outbox.objects.filter(id__in=ids))
 
 
-@shared_task()
-def send_messages(batch_size: int = BATCH_SIZE) -> int:
-    msgs = claim_messages(batch_size)
-    if not msgs:
-        return 0
+def owned(msgs: list[Outbox]):
+    # Группы id по аренде: UPDATE трогает строку, только если ее не захватил
+    # заново другой воркер после истечения нашей аренды.
+    groups = defaultdict(list)
+    for msg in msgs:
+        groups[msg.lease_expires_at].append(msg.id)
+    return [
+        Outbox.objects.filter(
+            id__in=ids, state=MessageStatus.PROCESSING, lease_expires_at=lease
+        )
+        for lease, ids in groups.items()
+    ]
+
+
+def release_messages(msgs: list[Outbox]) -> int:
+    # Захваченные, но не начатые сообщения сразу возвращаются в очередь,
+    # не дожидаясь конца аренды; попытка не засчитывается.
+    return sum(
+        qs.update(
+            state=MessageStatus.PENDING,
+            attempts=F("attempts") - 1,
+            lease_expires_at=None,
+        )
+        for qs in owned(msgs)
+    )
+
 
-    processed = 0
+def renew_leases(msgs: list[Outbox], lease: float = OUTBOX_LEASE_SECONDS) -> int:
+    # Продление аренды на время доставки — только строк, которые еще наши.
+    # Новая метка запоминается в msgs, иначе apply_results не узнал бы свои
+    # строки.
+    expires = timezone.now() + timedelta(seconds=lease)
+    renewed = set()
+    with transaction.atomic():
+        for qs in owned(msgs):
+            ids = list(qs.select_for_update().values_list("id", flat=True))
+            Outbox.objects.filter(id__in=ids).update(lease_expires_at=expires)
+            renewed.update(ids)
     for msg in msgs:
+        if msg.id in renewed:
+            msg.lease_expires_at = expires
+    return len(renewed)
+
+
+@contextmanager
+def lease_heartbeat(msgs: list[Outbox], lease: float = OUTBOX_LEASE_SECONDS):
+    # Пока идет доставка, аренда продлевается каждые lease / 3 секунд: пачка
+    # SMTP-писем с таймаутами может идти дольше аренды, и другой воркер
+    # отправил бы те же сообщения повторно.
+    stop = threading.Event()
+
+    def beat():
         try:
-            ok = send_confirmation_email(
-                msg.id,
-                msg.payload["email"],
-                msg.payload["full_name"],
-                msg.payload["confirmation_code"],
-            )
-            if not ok:
-                raise Exception("Сервис недоступен. Не удалось отправить сообщение")
+            while not stop.wait(lease / 3):
+                try:
+                    renew_leases(msgs, lease)
+                except DatabaseError:
+                    pass  # следующая попытка через интервал
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name="outbox-lease", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def deliver(transport, msgs: list[Outbox]) -> dict[str, str | None]:
+    # Результат по каждому сообщению: None — доставлено, иначе текст ошибки.
+    results = {}
+    notifications = []
+    for msg in msgs:
+        try:
+            notifications.append(Notification.from_payload(msg.id, msg.payload))
+        except (KeyError, TypeError, ValueError) as e:
+            results[str(msg.id)] = PermanentError(f"Некорректный payload: {e}")
+    for start in range(0, len(notifications), transport.batch_size):
+        batch = notifications[start : start + transport.batch_size]
+        try:
+            results.update(transport.send_batch(batch))
         except Exception as e:
-            if msg.attempts < MAX_ATTEMPTS:
-                Outbox.objects.filter(id=msg.id).update(
-                    state=MessageStatus.PENDING,
-                    error=str(e)[:1000],
-                )
-            else:
-                Outbox.objects.filter(id=msg.id).update(
-                    state=MessageStatus.FAILED,
-                    error=str(e)[:1000],
-                )
+            results.update({n.id: str(e) or e.__class__.__name__ for n in batch})
+    return results
+
+
+def retry_at(now, attempts: int):
+    if not OUTBOX_RETRY_BACKOFF:
+        return None
+    delay = min(OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1), OUTBOX_RETRY_BACKOFF_CAP)
+    return now + timedelta(seconds=delay)
+
+
+def apply_results(msgs: list[Outbox], results: dict[str, str | None]) -> int:
+    # Статусы пишутся групповыми UPDATE: один на отправленные и по одному на
+    # каждую пару (статус, ошибка), а не запрос на сообщение.
+    now = timezone.now()
+    sent = []
+    errors = defaultdict(list)
+    for msg in msgs:
+        error = results.get(str(msg.id), "Нет результата отправки")
+        if error is None:
+            sent.append(msg)
+            OUTBOX_DELIVERY_LATENCY.observe((now - msg.created_at).total_seconds())
+            continue
+        if msg.attempts < MAX_ATTEMPTS and not isinstance(error, PermanentError):
+            state, retry = MessageStatus.PENDING, retry_at(now, msg.attempts)
         else:
-            Outbox.objects.filter(id=msg.id).update(
-                state=MessageStatus.SENT,
-                error="",
-            )
-            processed += 1
-    return processed
+            state, retry = MessageStatus.FAILED, None
+        errors[(state, error[:1000], retry)].append(msg)
+
+    # Считаются только записанные строки: результат по перехваченному другим
+    # воркером сообщению отбрасывается.
+    sent_count = sum(
+        qs.update(state=MessageStatus.SENT, error="", lease_expires_at=None)
+        for qs in owned(sent)
+    )
+    if sent_count:
+        OUTBOX_DELIVERIES.labels("sent").inc(sent_count)
+    for (state, error, retry), failed in errors.items():
+        count = sum(
+            qs.update(state=state, error=error, lease_expires_at=retry)
+            for qs in owned(failed)
+        )
+        result = "retry" if state == MessageStatus.PENDING else "failed"
+        OUTBOX_DELIVERIES.labels(result).inc(count)
+    return sent_count
+
+
+@shared_task()
+def send_messages(
+    batch_size: int = BATCH_SIZE, lease: float = OUTBOX_LEASE_SECONDS
+) -> int:
+    msgs = claim_messages(batch_size, lease)
+    if not msgs:
+        return 0
+
+    try:
+        with get_transport() as transport, lease_heartbeat(msgs, lease):
+            results = deliver(transport, msgs)
+    except Exception as e:
+        # Иначе захваченные сообщения остались бы в PROCESSING.
+        results = {str(msg.id): str(e) or e.__class__.__name__ for msg in msgs}
+    return apply_results(msgs, results)
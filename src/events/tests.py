@@ -1 +1,930 @@
-# Create your tests here.
+import asyncio
+import gzip
+import json
+import smtplib
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, transaction
+from django.db.models import Max, Min
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, modify_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from benchmarks.explain_events import inspect_plan
+from benchmarks.seed import seed_data
+from src.authz.tests import redis_available
+from src.authz.tokens import UserRefreshToken
+from src.core.redis_client import get_redis
+from src.core.settings import REST_FRAMEWORK
+from src.events.filters import EventFilter
+from src.events.management.commands.dispatch_outbox import Dispatcher
+from src.events.models import (
+    Event,
+    EventChange,
+    EventRegistration,
+    EventStatus,
+    MessageStatus,
+    Outbox,
+    Venue,
+)
+from src.events.tasks import (
+    apply_results,
+    claim_messages,
+    deliver,
+    release_messages,
+    send_messages,
+)
+from src.events.utils.changes import change_for, record_changes
+from src.events.utils.exports import EVENT_HEADER
+from src.events.utils.notifications import (
+    DeliveryError,
+    Notification,
+    NotificationTransport,
+    SmtpTransport,
+    confirmation_digest,
+)
+from src.events.utils.outbox import backlog_summary
+from src.events.views import EventViewSet
+
+PAYLOAD = {"email": "a@example.com", "full_name": "A", "confirmation_code": "1"}
+
+
+def create_messages(count: int, **fields) -> list[Outbox]:
+    return Outbox.objects.bulk_create(
+        [Outbox(topic="registration", payload=PAYLOAD, **fields) for _ in range(count)]
+    )
+
+
+class OutboxAdminTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser("admin", password="secret123")
+        self.client.force_login(admin)
+        self.url = reverse("admin:events_outbox_changelist")
+
+    def run_action(self, action: str, msgs: list[Outbox]):
+        return self.client.post(
+            self.url,
+            {"action": action, "_selected_action": [str(m.id) for m in msgs]},
+            follow=True,
+        )
+
+    def test_backlog_summary_skips_sent(self):
+        create_messages(3, state=MessageStatus.SENT)
+        create_messages(2, state=MessageStatus.FAILED)
+        self.assertEqual(
+            [(row["state"], row["count"]) for row in backlog_summary()],
+            [(MessageStatus.FAILED, 2)],
+        )
+        self.assertEqual(len(backlog_summary(include_sent=True)), 2)
+
+    def test_replay_within_batch_requeues(self):
+        msgs = create_messages(2, state=MessageStatus.FAILED, attempts=5)
+        self.run_action("replay", msgs)
+        self.assertEqual(
+            Outbox.objects.filter(state=MessageStatus.PENDING, attempts=0).count(), 2
+        )
+
+    @patch("src.events.admin.OUTBOX_OPS_BATCH_SIZE", 2)
+    def test_large_selection_goes_through_command(self):
+        msgs = create_messages(3, state=MessageStatus.FAILED)
+        response = self.run_action("replay", msgs)
+        self.assertContains(response, "python manage.py outbox replay")
+        self.assertEqual(Outbox.objects.filter(state=MessageStatus.FAILED).count(), 3)
+
+
+class OutboxCommandTests(TestCase):
+    def outbox(self, *args) -> str:
+        out = StringIO()
+        call_command("outbox", *args, "--rate", "0", stdout=out)
+        return out.getvalue()
+
+    def test_requeue_failed_in_batches(self):
+        create_messages(5, state=MessageStatus.FAILED, attempts=5, error="boom")
+        create_messages(1, state=MessageStatus.PROCESSING, attempts=1)
+        create_messages(1, state=MessageStatus.SENT)
+        self.assertIn("обработано 5", self.outbox("requeue", "--batch-size", "2"))
+        self.assertEqual(
+            Outbox.objects.filter(
+                state=MessageStatus.PENDING, attempts=0, error=""
+            ).count(),
+            5,
+        )
+        self.assertEqual(Outbox.objects.filter(state=MessageStatus.SENT).count(), 1)
+        self.assertEqual(
+            Outbox.objects.filter(state=MessageStatus.PROCESSING).count(), 1
+        )
+
+    def test_replay_by_topic_and_error_keeps_attempts(self):
+        create_messages(2, state=MessageStatus.SENT, attempts=1, error="")
+        create_messages(2, state=MessageStatus.FAILED, attempts=3, error="SMTP 550")
+        create_messages(1, state=MessageStatus.FAILED, attempts=3, error="timeout")
+        Outbox.objects.create(topic="other", payload=PAYLOAD, state=MessageStatus.SENT)
+        output = self.outbox(
+            "replay",
+            "--topic",
+            "registration",
+            "--error-contains",
+            "smtp",
+            "--keep-attempts",
+        )
+        self.assertIn("обработано 2", output)
+        self.assertEqual(
+            Outbox.objects.filter(state=MessageStatus.PENDING, attempts=3).count(), 2
+        )
+        self.assertEqual(Outbox.objects.filter(state=MessageStatus.SENT).count(), 3)
+
+    def test_purge_older_than_with_limit(self):
+        create_messages(3, state=MessageStatus.SENT)
+        create_messages(1, state=MessageStatus.FAILED)
+        Outbox.objects.update(created_at=timezone.now() - timedelta(days=10))
+        create_messages(1, state=MessageStatus.SENT)
+        self.assertIn(
+            "подходит сообщений: 3",
+            self.outbox("purge", "--older-than", "7d", "--dry-run"),
+        )
+        self.assertIn(
+            "обработано 2", self.outbox("purge", "--older-than", "7d", "--limit", "2")
+        )
+        self.assertEqual(Outbox.objects.filter(state=MessageStatus.SENT).count(), 2)
+        self.assertEqual(Outbox.objects.filter(state=MessageStatus.FAILED).count(), 1)
+
+    def test_stats(self):
+        self.assertIn("Outbox пуст", self.outbox("stats"))
+        create_messages(2, state=MessageStatus.SENT)
+        self.assertRegex(self.outbox("stats"), r"sent\s+registration\s+2")
+
+    def test_invalid_arguments(self):
+        with self.assertRaisesMessage(CommandError, "--batch-size"):
+            self.outbox("requeue", "--batch-size", "0")
+        with self.assertRaises(CommandError):
+            self.outbox("purge", "--older-than", "week")
+
+
+class AdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.venue = Venue.objects.create(name="Hall", external_id=uuid.uuid4())
+        cls.events = [
+            Event.objects.create(
+                external_id=uuid.uuid4(),
+                name=name,
+                event_date=timezone.now(),
+                changed_at=timezone.now(),
+                venue=cls.venue,
+            )
+            for name in ("Jazz night", "Rock night")
+        ]
+        for i in range(3):
+            EventRegistration.objects.create(
+                event=cls.events[i % 2],
+                full_name=f"Guest {i}",
+                email=f"guest{i}@example.com",
+                confirmation_code="x",
+            )
+        cls.admin = User.objects.create_superuser("admin", password="secret123")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def search(self, model: str, term: str) -> list:
+        response = self.client.get(
+            reverse(f"admin:events_{model}_changelist"), {"q": term}
+        )
+        self.assertEqual(response.status_code, 200)
+        return list(response.context["cl"].result_list)
+
+    def test_event_by_name_and_uuid(self):
+        self.assertEqual(self.search("event", "jazz"), [self.events[0]])
+        event = self.events[1]
+        self.assertEqual(self.search("event", str(event.external_id)), [event])
+        self.assertEqual(self.search("event", str(event.id)), [event])
+        self.assertEqual(self.search("event", str(uuid.uuid4())), [])
+
+    def test_registration_by_exact_email_and_event(self):
+        found = self.search("eventregistration", " guest1@example.com ")
+        self.assertEqual([r.full_name for r in found], ["Guest 1"])
+        self.assertEqual(self.search("eventregistration", "guest1@example"), [])
+        found = self.search("eventregistration", str(self.events[0].external_id))
+        self.assertEqual(sorted(r.full_name for r in found), ["Guest 0", "Guest 2"])
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        url = reverse("admin:events_eventregistration_changelist")
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        for i in range(3, 10):
+            EventRegistration.objects.create(
+                event=self.events[0],
+                full_name=f"Guest {i}",
+                email=f"guest{i}@example.com",
+                confirmation_code="x",
+            )
+        with self.assertNumQueries(len(few)):
+            self.client.get(url)
+
+
+class EventListPlanTests(TestCase):
+    # Страница списка с любым из фильтров должна читаться диапазоном по
+    # составному индексу: без полного прохода и без отдельной сортировки.
+    @classmethod
+    def setUpTestData(cls):
+        seed_data(events=5000, venues=100, registrations=0)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assert_plan(self, params: str, expected_index: str):
+        filterset = EventFilter(QueryDict(params), queryset=EventViewSet.queryset)
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        qs = filterset.qs[: REST_FRAMEWORK["PAGE_SIZE"]]
+        indexes, seq_scan, sort = inspect_plan(qs)
+        plan = qs.explain()
+        self.assertIn(expected_index, indexes, plan)
+        self.assertFalse(seq_scan, plan)
+        self.assertFalse(sort, plan)
+
+    def test_status_filters_use_status_index(self):
+        bounds = Event.objects.aggregate(
+            first=Min("event_date"), last=Max("event_date")
+        )
+        middle = (bounds["first"] + (bounds["last"] - bounds["first"]) / 2).date()
+        week_end = middle + timedelta(days=7)
+        for params in (
+            "",
+            "upcoming=true",
+            f"date_from={middle.isoformat()}&date_to={week_end.isoformat()}",
+        ):
+            with self.subTest(params=params):
+                self.assert_plan(params, "event_status_date_idx")
+
+    def test_venue_filters_use_venue_index(self):
+        venue = Venue.objects.order_by("id").first()
+        for params in (
+            f"venue={venue.external_id}",
+            f"venue={venue.external_id}&upcoming=true",
+        ):
+            with self.subTest(params=params):
+                self.assert_plan(params, "event_venue_date_idx")
+
+
+class AsyncEventListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.venues = Venue.objects.bulk_create(
+            [Venue(name=name, external_id=uuid.uuid4()) for name in ("A", "B")]
+        )
+        Event.objects.bulk_create(
+            [
+                Event(
+                    external_id=uuid.uuid4(),
+                    name=f"Event {i}",
+                    event_date=timezone.now() + timedelta(days=i),
+                    changed_at=timezone.now(),
+                    venue=cls.venues[i % 2],
+                )
+                for i in range(3)
+            ]
+        )
+        user = User.objects.create_user("user", password="secret123")
+        token = UserRefreshToken.for_user(user).access_token_for(user)
+        cls.headers = {"Authorization": f"Bearer {token}"}
+
+    async def get(self, **params):
+        return await self.async_client.get(
+            reverse("async-event-list"), params, headers=self.headers
+        )
+
+    async def test_venue_filter(self):
+        response = await self.get(venue=str(self.venues[0].external_id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [event["name"] for event in response.json()["results"]],
+            ["Event 2", "Event 0"],
+        )
+
+    async def test_unknown_venue_is_empty(self):
+        response = await self.get(venue=str(uuid.uuid4()))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 0)
+
+    async def test_sparse_fields(self):
+        response = await self.get(fields="id,name")
+        self.assertEqual(
+            [set(event) for event in response.json()["results"]], [{"id", "name"}] * 3
+        )
+        response = await self.get(fields="id,secret")
+        self.assertEqual(response.status_code, 400)
+
+
+class SparseFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        venue = Venue.objects.create(name="Hall", external_id=uuid.uuid4())
+        cls.events = Event.objects.bulk_create(
+            [
+                Event(
+                    external_id=uuid.uuid4(),
+                    name=f"Event {i}",
+                    event_date=timezone.now() + timedelta(days=i),
+                    changed_at=timezone.now(),
+                    venue=venue,
+                )
+                for i in range(30)
+            ]
+        )
+        cls.headers = bearer(User.objects.create_user("user", password="secret123"))
+
+    def get(self, url: str, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, headers=self.headers)
+        events_sql = [q["sql"] for q in queries if '"events_event"' in q["sql"]]
+        return response, events_sql[-1] if events_sql else ""
+
+    def test_full_representation_by_default(self):
+        response, sql = self.get(reverse("event-list"))
+        self.assertEqual(
+            set(response.json()["results"][0]),
+            {"id", "name", "event_date", "status", "venue"},
+        )
+        self.assertIn('"events_venue"', sql)
+
+    def test_fields_narrow_json_and_select(self):
+        response, sql = self.get(reverse("event-list"), fields="id, name")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()["results"][0]), {"id", "name"})
+        self.assertNotIn('"events_venue"', sql)
+        self.assertNotIn('"events_event"."status"', sql.split(" FROM ")[0])
+
+    def test_venue_field_keeps_join(self):
+        event = self.events[0]
+        url = reverse("event-detail", args=[event.pk])
+        response, sql = self.get(url, fields="venue")
+        self.assertEqual(response.json(), {"venue": {"name": "Hall"}})
+        self.assertIn('"events_venue"', sql)
+
+    def test_unknown_or_empty_fields_rejected(self):
+        for value in ("id,secret", ","):
+            with self.subTest(fields=value):
+                response, sql = self.get(reverse("event-list"), fields=value)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(sql, "")
+                self.assertIn("fields", response.json())
+
+    @patch("src.core.compression.COMPRESSION_MIN_SIZE", 100)
+    @modify_settings(
+        MIDDLEWARE={"append": "src.core.compression.compression_middleware"}
+    )
+    def test_compressed_list(self):
+        response = self.client.get(
+            reverse("event-list"),
+            headers={**self.headers, "Accept-Encoding": "gzip"},
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        body = json.loads(gzip.decompress(response.content))
+        self.assertEqual(body["count"], 30)
+
+
+@skipUnless(
+    connection.features.has_select_for_update_skip_locked,
+    "нужен Postgres (SKIP LOCKED)",
+)
+class OutboxSkipLockedTests(TransactionTestCase):
+    def hold_locks(self, count: int, locked: list, ready, release):
+        try:
+            with transaction.atomic():
+                qs = (
+                    Outbox.objects.filter(state=MessageStatus.PENDING)
+                    .order_by("id")
+                    .select_for_update(skip_locked=True)
+                )
+                locked.extend(qs.values_list("id", flat=True)[:count])
+                ready.set()
+                release.wait(10)
+        finally:
+            connection.close()
+
+    def test_claim_skips_rows_locked_by_another_worker(self):
+        create_messages(20)
+        locked, ready, release = [], threading.Event(), threading.Event()
+        holder = threading.Thread(
+            target=self.hold_locks, args=(10, locked, ready, release)
+        )
+        holder.start()
+        try:
+            self.assertTrue(ready.wait(10))
+            claimed = [msg.id for msg in claim_messages(20)]
+        finally:
+            release.set()
+            holder.join()
+
+        self.assertEqual(len(claimed), 10)
+        self.assertFalse(set(claimed) & set(locked))
+
+
+class BrokenTransport(NotificationTransport):
+    def send(self, notification):
+        raise DeliveryError("Сервис недоступен")
+
+
+class DeliveryResultsTests(TestCase):
+    def test_malformed_payload_fails_without_retry(self):
+        create_messages(1)
+        Outbox.objects.create(topic="registration", payload={"email": "a@b.c"})
+        Outbox.objects.create(
+            topic="registration", payload={**PAYLOAD, "email": "not-an-email"}
+        )
+        msgs = claim_messages()
+        apply_results(msgs, deliver(BrokenTransport(), msgs))
+
+        states = Outbox.objects.values_list("payload", "state")
+        self.assertEqual(
+            sorted(state for _, state in states),
+            [MessageStatus.FAILED, MessageStatus.FAILED, MessageStatus.PENDING],
+        )
+        retried = Outbox.objects.get(state=MessageStatus.PENDING)
+        self.assertEqual(retried.payload, PAYLOAD)
+        self.assertEqual(retried.error, "Сервис недоступен")
+
+
+class FlakySmtpBackend:
+    # Как EmailBackend Django: без открытого соединения send_messages открывает
+    # и закрывает свое. Письма на адреса из failing обрывают соединение, на
+    # адреса из refused — получают 550.
+    failing = {"broken@example.com"}
+    refused = {"refused@example.com"}
+
+    def __init__(self, **kwargs):
+        self.opened = 0
+        self.is_open = False
+
+    def open(self):
+        if self.is_open:
+            return False
+        self.opened += 1
+        self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        new_connection = self.open()
+        try:
+            if set(messages[0].to) & self.failing:
+                raise smtplib.SMTPServerDisconnected("connection lost")
+            if rejected := set(messages[0].to) & self.refused:
+                raise smtplib.SMTPRecipientsRefused(
+                    {email: (550, b"no such user") for email in rejected}
+                )
+        finally:
+            if new_connection:
+                self.close()
+        return 1
+
+
+class SmtpTransportTests(TestCase):
+    def test_connection_reopened_once_after_error(self):
+        emails = ["a@example.com", "broken@example.com"] + [
+            f"{i}@example.com" for i in range(5)
+        ]
+        notifications = [
+            Notification(str(i), email, "A", "1") for i, email in enumerate(emails)
+        ]
+        transport = SmtpTransport(backend="src.events.tests.FlakySmtpBackend")
+        results = transport.send_batch(notifications)
+
+        self.assertEqual([n.id for n in notifications if results[n.id]], ["1"])
+        self.assertEqual(transport.connection.opened, 2)
+
+    def test_refused_recipient_fails_without_retry(self):
+        Outbox.objects.create(
+            topic="registration", payload={**PAYLOAD, "email": "refused@example.com"}
+        )
+        create_messages(1)
+        msgs = claim_messages()
+        transport = SmtpTransport(backend="src.events.tests.FlakySmtpBackend")
+        self.assertEqual(apply_results(msgs, deliver(transport, msgs)), 1)
+
+        refused = Outbox.objects.get(payload__email="refused@example.com")
+        self.assertEqual(refused.state, MessageStatus.FAILED)
+        self.assertIn("refused@example.com", refused.error)
+        # Отказ по адресу не обрывает соединение.
+        self.assertEqual(transport.connection.opened, 1)
+
+
+class RegistrationImportTests(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(
+            external_id=uuid.uuid4(),
+            name="Event",
+            event_date=timezone.now() + timedelta(days=7),
+            changed_at=timezone.now(),
+            status=EventStatus.OPEN,
+        )
+        EventRegistration.objects.create(
+            event=self.event,
+            full_name="Existing",
+            email="existing@example.com",
+            confirmation_code="x",
+        )
+        admin = User.objects.create_user("admin", password="secret123", is_staff=True)
+        token = UserRefreshToken.for_user(admin).access_token_for(admin)
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.url = reverse("event-registrations-import", args=[self.event.external_id])
+
+    def import_csv(self, body: str) -> list[dict]:
+        response = self.client.post(
+            self.url, body, content_type="text/csv", headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in response.streaming_content]
+
+    @patch("src.events.views.REGISTRATION_IMPORT_CHUNK_SIZE", 2)
+    def test_duplicates_within_file_across_chunks_and_in_db(self):
+        report = self.import_csv(
+            "full_name,email\n"
+            "A,a@example.com\n"
+            "A again,a@example.com\n"
+            "B,b@example.com\n"
+            "Existing,existing@example.com\n"
+            "B again,b@example.com\n"
+            ",bad\n"
+        )
+        self.assertEqual(
+            [line["status"] for line in report[:-1]],
+            ["created", "duplicate", "created", "duplicate", "duplicate", "invalid"],
+        )
+        self.assertEqual(
+            report[-1]["summary"], {"created": 2, "duplicate": 3, "invalid": 1}
+        )
+        self.assertEqual(EventRegistration.objects.filter(event=self.event).count(), 3)
+        self.assertEqual(Outbox.objects.filter(topic="registration").count(), 2)
+
+    def test_reimport_creates_nothing(self):
+        body = "full_name,email\nA,a@example.com\n"
+        self.import_csv(body)
+        report = self.import_csv(body)
+        self.assertEqual(report[0]["status"], "duplicate")
+        self.assertEqual(Outbox.objects.count(), 1)
+
+    def test_command_imports_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "registrations.csv"
+            path.write_text("full_name,email\nA,a@example.com\n", encoding="utf-8")
+            out = StringIO()
+            call_command(
+                "import_registrations",
+                str(self.event.external_id),
+                str(path),
+                stdout=out,
+            )
+        self.assertEqual(
+            json.loads(out.getvalue())["summary"],
+            {"created": 1, "duplicate": 0, "invalid": 0},
+        )
+
+
+def bearer(user: User) -> dict:
+    token = UserRefreshToken.for_user(user).access_token_for(user)
+    return {"Authorization": f"Bearer {token}"}
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        venue = Venue.objects.create(name="Hall", external_id=uuid.uuid4())
+        now = timezone.now()
+        cls.events = [
+            Event.objects.create(
+                external_id=uuid.uuid4(),
+                name=f"Event {i}",
+                event_date=now + timedelta(days=3 - i),
+                changed_at=now,
+                status=EventStatus.CLOSED if i == 2 else EventStatus.OPEN,
+                venue=venue,
+            )
+            for i in range(3)
+        ]
+        EventRegistration.objects.create(
+            event=cls.events[0],
+            full_name="Иван, мл.",
+            email="ivan@example.com",
+            confirmation_code="x",
+        )
+        cls.user = User.objects.create_user("user", password="secret123")
+        cls.admin = User.objects.create_user(
+            "admin", password="secret123", is_staff=True
+        )
+
+    def export(self, url: str, user: User, **params):
+        response = self.client.get(url, params, headers=bearer(user))
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    @patch("src.events.views.EXPORT_CHUNK_SIZE", 1)
+    @patch("src.core.queries.QUERY_SERVER_TIMING", True)
+    def test_events_csv_in_date_order(self):
+        response, body = self.export(reverse("event-export"), self.user)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="events.csv"', response["Content-Disposition"])
+        # Запросы выгрузки идут после middleware — Server-Timing их бы не учел.
+        self.assertNotIn("Server-Timing", response)
+        lines = body.splitlines()
+        self.assertEqual(lines[0], ",".join(EVENT_HEADER))
+        self.assertEqual(
+            [line.split(",")[0] for line in lines[1:]],
+            [str(e.external_id) for e in reversed(self.events)],
+        )
+
+    def test_events_filtered_ndjson(self):
+        _, body = self.export(
+            reverse("event-export"), self.user, output="ndjson", status="closed"
+        )
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [str(self.events[2].external_id)])
+        self.assertEqual(rows[0]["venue_name"], "Hall")
+
+    def test_unknown_output_rejected(self):
+        response = self.client.get(
+            reverse("event-export"), {"output": "xml"}, headers=bearer(self.user)
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_registrations_csv_for_admin_only(self):
+        url = reverse("event-registrations-export", args=[self.events[0].external_id])
+        response = self.client.get(url, headers=bearer(self.user))
+        self.assertEqual(response.status_code, 403)
+
+        _, body = self.export(url, self.admin)
+        lines = body.splitlines()
+        self.assertEqual(lines[0], "id,full_name,email,created_at")
+        self.assertIn('"Иван, мл.",ivan@example.com', lines[1])
+
+    def test_registrations_unknown_event(self):
+        url = reverse("event-registrations-export", args=["not-a-uuid"])
+        response = self.client.get(url, headers=bearer(self.admin))
+        self.assertEqual(response.status_code, 404)
+
+
+class OutboxLeaseTests(TestCase):
+    def test_expired_lease_is_reclaimed_and_stale_result_dropped(self):
+        create_messages(2)
+        stale = claim_messages(lease=-1)
+        fresh = claim_messages(lease=60)
+        self.assertEqual({m.id for m in fresh}, {m.id for m in stale})
+
+        self.assertEqual(apply_results(stale, {str(m.id): None for m in stale}), 0)
+        self.assertFalse(Outbox.objects.exclude(state=MessageStatus.PROCESSING))
+
+        self.assertEqual(apply_results(fresh, {str(m.id): None for m in fresh}), 2)
+        self.assertEqual(
+            list(Outbox.objects.values_list("state", "attempts", "lease_expires_at")),
+            [(MessageStatus.SENT, 2, None)] * 2,
+        )
+
+    def test_live_lease_is_not_reclaimed(self):
+        create_messages(1)
+        self.assertEqual(len(claim_messages(lease=60)), 1)
+        self.assertEqual(claim_messages(lease=60), [])
+
+    def test_release_refunds_attempt(self):
+        create_messages(1)
+        msgs = claim_messages(lease=60)
+        self.assertEqual(release_messages(msgs), 1)
+        msg = Outbox.objects.get()
+        self.assertEqual(
+            (msg.state, msg.attempts, msg.lease_expires_at),
+            (MessageStatus.PENDING, 0, None),
+        )
+
+    def test_failed_delivery_waits_for_backoff(self):
+        create_messages(1)
+        msgs = claim_messages()
+        apply_results(msgs, {str(msgs[0].id): "Сервис недоступен"})
+        msg = Outbox.objects.get()
+        self.assertEqual(msg.state, MessageStatus.PENDING)
+        self.assertGreater(msg.lease_expires_at, timezone.now())
+        self.assertEqual(claim_messages(), [])
+
+
+class SlowTransport(NotificationTransport):
+    # Пачка идет дольше аренды; в конце другой воркер пытается захватить те же
+    # сообщения.
+    batch_size = 10
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.stolen = None
+
+    def send_batch(self, notifications):
+        time.sleep(self.delay)
+        try:
+            self.stolen = claim_messages(lease=60)
+        finally:
+            connection.close()
+        return {n.id: None for n in notifications}
+
+
+class OutboxLeaseRenewalTests(TransactionTestCase):
+    lease = 0.3
+
+    def test_send_messages_renews_lease_during_delivery(self):
+        create_messages(2)
+        transport = SlowTransport(delay=self.lease * 4)
+        with patch("src.events.tasks.get_transport", return_value=transport):
+            self.assertEqual(send_messages(lease=self.lease), 2)
+        self.assertEqual(transport.stolen, [])
+        self.assertEqual(Outbox.objects.filter(state=MessageStatus.SENT).count(), 2)
+
+    def test_dispatcher_renews_lease_of_in_flight_messages(self):
+        create_messages(2)
+        transport = SlowTransport(delay=self.lease * 4)
+        errors = []
+
+        async def dispatch():
+            dispatcher = Dispatcher([transport], 10, 0.05, self.lease, errors.append)
+            task = asyncio.create_task(dispatcher.run())
+            while dispatcher.processed < 2:
+                await asyncio.sleep(0.05)
+            dispatcher.stop()
+            await task
+            await sync_to_async(connections.close_all)()
+            return dispatcher
+
+        dispatcher = asyncio.run(asyncio.wait_for(dispatch(), 10))
+        self.assertEqual((dispatcher.sent, transport.stolen, errors), (2, [], []))
+
+
+class EventConfirmTests(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(
+            external_id=uuid.uuid4(),
+            name="Event",
+            event_date=timezone.now() + timedelta(days=7),
+            changed_at=timezone.now(),
+        )
+        self.reg = EventRegistration.objects.create(
+            event=self.event,
+            full_name="A",
+            email="a@example.com",
+            confirmation_code=confirmation_digest("123456"),
+        )
+        user = User.objects.create_user("user", password="secret123")
+        token = UserRefreshToken.for_user(user).access_token_for(user)
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def confirm(self, code: str, event_id=None):
+        return self.client.post(
+            reverse("event-confirm", args=[event_id or self.event.external_id]),
+            {"email": "a@example.com", "code": code},
+            content_type="application/json",
+            headers=self.headers,
+        )
+
+    def test_confirm(self):
+        self.assertEqual(self.confirm("123456").status_code, 200)
+        self.reg.refresh_from_db()
+        self.assertIsNotNone(self.reg.confirmed_at)
+
+    def test_wrong_code(self):
+        self.assertEqual(self.confirm("654321").status_code, 400)
+        self.reg.refresh_from_db()
+        self.assertIsNone(self.reg.confirmed_at)
+
+    def test_already_confirmed_keeps_first_time(self):
+        self.confirm("123456")
+        self.reg.refresh_from_db()
+        confirmed_at = self.reg.confirmed_at
+        self.assertEqual(self.confirm("123456").status_code, 200)
+        self.reg.refresh_from_db()
+        self.assertEqual(self.reg.confirmed_at, confirmed_at)
+
+    @skipUnless(redis_available(), "нужен Redis (REDIS_URL)")
+    @patch.dict(
+        "src.authz.throttling.AUTH_THROTTLE_RATES",
+        {"confirm_ip": "100/60", "confirm_registration": "3/900"},
+    )
+    def test_throttled_per_registration_across_id_spellings(self):
+        get_redis().delete(
+            "throttle:confirm_ip:127.0.0.1",
+            f"throttle:confirm_registration:{self.event.external_id}:a@example.com",
+        )
+        ext = self.event.external_id
+        for spelling in (str(ext).upper(), ext.hex, f"urn:uuid:{ext}"):
+            self.assertEqual(self.confirm("000000", spelling).status_code, 400)
+        response = self.confirm("123456")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.reg.refresh_from_db()
+        self.assertIsNone(self.reg.confirmed_at)
+
+
+def create_changes(count: int) -> list[EventChange]:
+    event = Event.objects.create(
+        external_id=uuid.uuid4(),
+        name="Event",
+        event_date=timezone.now() + timedelta(days=7),
+        changed_at=timezone.now(),
+    )
+    changes = [change_for(event, created=i == 0) for i in range(count)]
+    record_changes(changes)
+    return list(EventChange.objects.order_by("id"))
+
+
+class EventChangesTests(TestCase):
+    def setUp(self):
+        self.changes = create_changes(5)
+        user = User.objects.create_user("user", password="secret123")
+        token = UserRefreshToken.for_user(user).access_token_for(user)
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def get(self, **params):
+        return self.client.get(reverse("event-changes"), params, headers=self.headers)
+
+    def test_pages_follow_cursor_in_id_order(self):
+        ids, pages, cursor = [], 0, 0
+        while True:
+            data = self.get(since=cursor, limit=2).json()
+            ids += [int(change["cursor"]) for change in data["results"]]
+            cursor, pages = data["cursor"], pages + 1
+            if not data["has_more"]:
+                break
+        self.assertEqual(ids, [change.id for change in self.changes])
+        self.assertEqual(pages, 3)
+        self.assertEqual(self.get(since=cursor).json()["results"], [])
+
+    def test_kinds_and_cursor_of_empty_page(self):
+        data = self.get(since=self.changes[-1].id).json()
+        self.assertEqual(
+            (data["cursor"], data["has_more"]), (str(self.changes[-1].id), False)
+        )
+        kinds = [change["kind"] for change in self.get().json()["results"]]
+        self.assertEqual(kinds, ["created"] + ["updated"] * 4)
+
+    @patch("src.events.views.CHANGE_FEED_PAGE_SIZE", 3)
+    def test_limit_is_capped_by_page_size(self):
+        self.assertEqual(len(self.get(limit=100).json()["results"]), 3)
+
+    def test_invalid_cursor(self):
+        for params in ({"since": "-1"}, {"since": "x"}, {"limit": "x"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+
+    @patch("src.events.async_views.CHANGE_FEED_POLL_INTERVAL", 0.01)
+    @patch("src.events.async_views.CHANGE_FEED_STREAM_TIMEOUT", 0.1)
+    async def test_stream_resumes_after_last_event_id(self):
+        response = await self.async_client.get(
+            reverse("async-event-changes"),
+            headers={**self.headers, "Last-Event-ID": str(self.changes[1].id)},
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        ids = [
+            int(line.split(b": ")[1])
+            for line in body.splitlines()
+            if line.startswith(b"id: ")
+        ]
+        self.assertEqual(ids, [change.id for change in self.changes[2:]])
+
+
+@skipUnless(connection.vendor == "postgresql", "нужен Postgres")
+class RecordChangesOrderTests(TransactionTestCase):
+    def write(self, ready, release):
+        try:
+            with transaction.atomic():
+                create_changes(1)
+                ready.set()
+                release.wait(10)
+        finally:
+            connection.close()
+
+    def test_parallel_run_waits_for_commit(self):
+        ready, release = threading.Event(), threading.Event()
+        first = threading.Thread(target=self.write, args=(ready, release))
+        first.start()
+        self.assertTrue(ready.wait(10))
+        go = threading.Event()
+        go.set()
+        second = threading.Thread(target=self.write, args=(threading.Event(), go))
+        second.start()
+        second.join(0.5)
+        try:
+            # Второй прогон не получил id, пока первый не закоммитил свой.
+            self.assertTrue(second.is_alive())
+            self.assertEqual(EventChange.objects.count(), 0)
+        finally:
+            release.set()
+            first.join()
+            second.join()
+        self.assertEqual(EventChange.objects.count(), 2)
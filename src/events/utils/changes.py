@@ -0,0 +1,71 @@
+from django.db import connection
+
+from src.core.settings import CHANGE_FEED_PAGE_SIZE
+from src.events.models import ChangeKind, Event, EventChange, EventStatus
+
+
+def event_snapshot(event: Event) -> dict:
+    venue = event.venue
+    return {
+        "name": event.name,
+        "event_date": event.event_date,
+        "status": event.status,
+        "changed_at": event.changed_at,
+        "venue": (
+            {"id": str(venue.external_id), "name": venue.name} if venue else None
+        ),
+    }
+
+
+def change_for(event: Event, created: bool, previous_status: str | None = None):
+    if created:
+        kind = ChangeKind.CREATED
+    elif event.status == EventStatus.CLOSED and previous_status != EventStatus.CLOSED:
+        kind = ChangeKind.CLOSED
+    else:
+        kind = ChangeKind.UPDATED
+    return EventChange(
+        event=event,
+        external_id=event.external_id,
+        kind=kind,
+        data=event_snapshot(event),
+    )
+
+
+def record_changes(changes: list[EventChange]) -> None:
+    # id — курсор ленты, поэтому записи должны становиться видны по возрастанию
+    # id. Журнал пишется в конце транзакции прогона под блокировкой таблицы до
+    # коммита: параллельный прогон получит id только после нашего коммита, с
+    # --lock или без. SQLite и так пропускает одну пишущую транзакцию за раз.
+    if not changes:
+        return
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"LOCK TABLE {EventChange._meta.db_table} IN SHARE ROW EXCLUSIVE MODE"
+            )
+    EventChange.objects.bulk_create(changes, batch_size=1000)
+
+
+def parse_cursor(value: str | None) -> int:
+    # Пустой курсор — с начала журнала.
+    if not value:
+        return 0
+    cursor = int(value)
+    if cursor < 0:
+        raise ValueError("Курсор не может быть отрицательным")
+    return cursor
+
+
+def changes_after(cursor: int, limit: int = CHANGE_FEED_PAGE_SIZE):
+    return EventChange.objects.filter(id__gt=cursor).order_by("id")[:limit]
+
+
+def change_data(change: EventChange) -> dict:
+    return {
+        "cursor": str(change.id),
+        "kind": change.kind,
+        "id": str(change.external_id),
+        "recorded_at": change.created_at,
+        "event": change.data,
+    }
@@ -0,0 +1,55 @@
+import csv
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+EVENT_FIELDS = (
+    "external_id",
+    "name",
+    "event_date",
+    "status",
+    "changed_at",
+    "venue__external_id",
+    "venue__name",
+)
+EVENT_HEADER = (
+    "id",
+    "name",
+    "event_date",
+    "status",
+    "changed_at",
+    "venue_id",
+    "venue_name",
+)
+REGISTRATION_FIELDS = ("id", "full_name", "email", "created_at")
+
+
+class Echo:
+    # csv.writer пишет строку сюда и сразу получает ее обратно, без буфера.
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(
+            [v.isoformat() if isinstance(v, datetime) else v for v in row]
+        )
+
+
+def ndjson_lines(header, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + "\n"
+
+
+def export_response(header, rows, fmt: str, filename: str) -> StreamingHttpResponse:
+    lines = csv_lines(header, rows) if fmt == "csv" else ndjson_lines(header, rows)
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
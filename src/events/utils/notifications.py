@@ -1,38 +1,293 @@
-import random
+import json
+import secrets
+import smtplib
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
 
 import requests
+from django.core.mail import EmailMessage, get_connection
+from django.utils.crypto import salted_hmac
 
-from src.core.settings import JWT_TOKEN, NOTIFICATIONS_API_URL, OWNER_ID
+from src.core.metrics import NOTIFICATION_DURATION
+from src.core.settings import (
+    JWT_TOKEN,
+    NOTIFICATIONS_API_URL,
+    NOTIFICATIONS_BATCH_SIZE,
+    NOTIFICATIONS_BATCH_URL,
+    NOTIFICATIONS_FILE_PATH,
+    NOTIFICATIONS_SMTP_BACKEND,
+    NOTIFICATIONS_TRANSPORT,
+    OWNER_ID,
+)
+
+# Ответы сервиса, после которых повторять бессмысленно: 409 — сообщение с этим
+# id уже принято, 422 — сервис его никогда не примет.
+DELIVERED_STATUS = (409, 422)
+
+CONFIRMATION_SALT = "src.events.confirmation_code"
 
 
 def generate_confirmation_code() -> str:
-    return f"{random.randint(100000, 999999)}"
-
-
-def send_confirmation_email(msg_id: str, email: str, full_name: str, code: str) -> bool:
-    headers = {
-        "Authorization": f"Bearer {JWT_TOKEN}",
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-    }
-
-    payload = {
-        "id": str(msg_id),
-        "owner_id": str(OWNER_ID),
-        "email": email,
-        "message": f"Здравствуйте, {full_name}!\nВаш код подтверждения: {code}",
-    }
-
-    try:
-        resp = requests.post(
-            f"{NOTIFICATIONS_API_URL}", json=payload, headers=headers, timeout=(5, 10)
+    return f"{secrets.randbelow(900000) + 100000}"
+
+
+def confirmation_digest(code: str) -> str:
+    # Ключ — SECRET_KEY: по утекшей таблице регистраций коды не подобрать.
+    return salted_hmac(CONFIRMATION_SALT, code, algorithm="sha256").hexdigest()
+
+
+@dataclass
+class Notification:
+    id: str
+    email: str
+    full_name: str
+    code: str
+
+    @classmethod
+    def from_payload(cls, msg_id, payload: dict) -> "Notification":
+        notification = cls(
+            id=str(msg_id),
+            email=payload["email"],
+            full_name=payload["full_name"],
+            code=payload["confirmation_code"],
+        )
+        if not isinstance(notification.email, str) or "@" not in notification.email:
+            raise ValueError(f"некорректный email {notification.email!r}")
+        return notification
+
+    @property
+    def text(self) -> str:
+        return f"Здравствуйте, {self.full_name}!\nВаш код подтверждения: {self.code}"
+
+
+class DeliveryError(Exception):
+    pass
+
+
+class RecipientRefused(DeliveryError):
+    pass
+
+
+class PermanentError(str):
+    # Ошибка самого сообщения, а не доставки: повтор не поможет, и сообщение
+    # сразу переходит в FAILED.
+    pass
+
+
+class NotificationTransport:
+    # send_batch возвращает результат по каждому id: None — доставлено, иначе
+    # текст ошибки. Транспорт живет одну пачку воркера (with get_transport()).
+    batch_size = 1
+
+    def send(self, notification: Notification) -> None:
+        raise NotImplementedError
+
+    def send_batch(self, notifications: list[Notification]) -> dict[str, str | None]:
+        results = {}
+        for notification in notifications:
+            try:
+                self.send(notification)
+            except Exception as e:
+                results[notification.id] = str(e) or e.__class__.__name__
+            else:
+                results[notification.id] = None
+        return results
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HttpTransport(NotificationTransport):
+    # Одно сообщение — один POST; сессия держит соединение на всю пачку.
+    def __init__(self, url: str = NOTIFICATIONS_API_URL):
+        self.url = url
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {JWT_TOKEN}",
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+            }
+        )
+
+    def message(self, notification: Notification) -> dict:
+        return {
+            "id": notification.id,
+            "owner_id": str(OWNER_ID),
+            "email": notification.email,
+            "message": notification.text,
+        }
+
+    def post(self, url: str, body) -> requests.Response:
+        started = time.perf_counter()
+        try:
+            resp = self.session.post(url, json=body, timeout=(5, 10))
+        except requests.RequestException as e:
+            NOTIFICATION_DURATION.labels("error").observe(time.perf_counter() - started)
+            raise DeliveryError(f"Сервис недоступен: {e.__class__.__name__}") from e
+        NOTIFICATION_DURATION.labels(f"{resp.status_code // 100}xx").observe(
+            time.perf_counter() - started
+        )
+        return resp
+
+    def send(self, notification: Notification) -> None:
+        resp = self.post(self.url, self.message(notification))
+        if 200 <= resp.status_code < 300 or resp.status_code in DELIVERED_STATUS:
+            return
+        raise DeliveryError(f"Сервис ответил {resp.status_code}")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class HttpBatchTransport(HttpTransport):
+    # POST {"messages": [...]} на NOTIFICATIONS_BATCH_URL, в ответ
+    # {"results": [{"id": ..., "status": 201}, ...]} — статус по каждому сообщению.
+    batch_size = NOTIFICATIONS_BATCH_SIZE
+
+    def __init__(self, url: str = NOTIFICATIONS_BATCH_URL):
+        super().__init__(url)
+
+    def send(self, notification: Notification) -> None:
+        error = self.send_batch([notification])[notification.id]
+        if error:
+            raise DeliveryError(error)
+
+    def send_batch(self, notifications: list[Notification]) -> dict[str, str | None]:
+        try:
+            resp = self.post(
+                self.url, {"messages": [self.message(n) for n in notifications]}
+            )
+            if not 200 <= resp.status_code < 300:
+                raise DeliveryError(f"Сервис ответил {resp.status_code}")
+            items = resp.json()["results"]
+            statuses = {str(item["id"]): int(item["status"]) for item in items}
+        except (DeliveryError, ValueError, KeyError, TypeError) as e:
+            error = str(e) if isinstance(e, DeliveryError) else "Некорректный ответ"
+            return {n.id: error for n in notifications}
+
+        results = {}
+        for notification in notifications:
+            code = statuses.get(notification.id)
+            if code is None:
+                results[notification.id] = "Нет результата в ответе"
+            elif 200 <= code < 300 or code in DELIVERED_STATUS:
+                results[notification.id] = None
+            else:
+                results[notification.id] = f"Сервис ответил {code}"
+        return results
+
+
+class SmtpTransport(NotificationTransport):
+    # Письма напрямую через SMTP (EMAIL_HOST и др. из настроек): одно
+    # аутентифицированное соединение на всю пачку, а не на каждое письмо.
+    batch_size = NOTIFICATIONS_BATCH_SIZE
+    subject = "Код подтверждения регистрации"
+
+    def __init__(self, backend: str = NOTIFICATIONS_SMTP_BACKEND):
+        self.connection = get_connection(backend)
+
+    def send(self, notification: Notification) -> None:
+        message = EmailMessage(
+            self.subject,
+            notification.text,
+            to=[notification.email],
+            headers={"X-Notification-Id": notification.id},
+            connection=self.connection,
         )
+        started = time.perf_counter()
+        try:
+            message.send()
+        except smtplib.SMTPRecipientsRefused as e:
+            # Адрес не примут и при повторе; соединение при этом живо.
+            NOTIFICATION_DURATION.labels("rejected").observe(
+                time.perf_counter() - started
+            )
+            raise RecipientRefused(f"SMTP: адрес отклонен: {e.recipients}") from e
+        except (smtplib.SMTPException, OSError) as e:
+            NOTIFICATION_DURATION.labels("error").observe(time.perf_counter() - started)
+            # Соединение после ошибки может быть в неизвестном состоянии.
+            self.connection.close()
+            raise DeliveryError(f"SMTP: {e.__class__.__name__}: {e}") from e
+        else:
+            NOTIFICATION_DURATION.labels("sent").observe(time.perf_counter() - started)
+
+    def open(self) -> str | None:
+        try:
+            self.connection.open()
+        except (smtplib.SMTPException, OSError) as e:
+            return f"SMTP: {e.__class__.__name__}: {e}"
+        return None
+
+    def send_batch(self, notifications: list[Notification]) -> dict[str, str | None]:
+        if error := self.open():
+            return {n.id: error for n in notifications}
+        results = {}
+        for i, notification in enumerate(notifications):
+            try:
+                self.send(notification)
+            except RecipientRefused as e:
+                results[notification.id] = PermanentError(e)
+            except DeliveryError as e:
+                results[notification.id] = str(e)
+                # Закрытое после ошибки соединение открывается один раз и снова
+                # служит остатку пачки; без этого бэкенд Django открывал бы его
+                # на каждое письмо. Не открылось — остаток пачки ждет повтора.
+                if error := self.open():
+                    results.update({n.id: error for n in notifications[i + 1 :]})
+                    break
+            else:
+                results[notification.id] = None
+        return results
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class FileTransport(NotificationTransport):
+    # NDJSON-приемник для нагрузочных тестов: пачка дописывается в файл одной
+    # записью, уведомления никуда не уходят.
+    batch_size = NOTIFICATIONS_BATCH_SIZE
+
+    def __init__(self, path: str = NOTIFICATIONS_FILE_PATH):
+        self.path = Path(path)
+        self.file = None
+
+    def send(self, notification: Notification) -> None:
+        self.send_batch([notification])
+
+    def send_batch(self, notifications: list[Notification]) -> dict[str, str | None]:
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = self.path.open("a", encoding="utf-8")
+        self.file.write(
+            "".join(
+                json.dumps(asdict(n), ensure_ascii=False) + "\n" for n in notifications
+            )
+        )
+        self.file.flush()
+        return {n.id: None for n in notifications}
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+TRANSPORTS = {
+    "http": HttpTransport,
+    "http_batch": HttpBatchTransport,
+    "smtp": SmtpTransport,
+    "file": FileTransport,
+}
 
-        if 200 <= resp.status_code < 300:
-            return True
-        if resp.status_code in (409, 422):
-            return True
-        return False
 
-    except requests.RequestException:
-        return False
+def get_transport() -> NotificationTransport:
+    return TRANSPORTS[NOTIFICATIONS_TRANSPORT]()
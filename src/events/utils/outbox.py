@@ -0,0 +1,134 @@
+import re
+import time
+from datetime import timedelta
+
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from src.core.settings import OUTBOX_OPS_BATCH_SIZE
+from src.events.models import MessageStatus, Outbox
+
+DURATION_RE = re.compile(r"^(\d+)([smhd])$")
+DURATION_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+
+def parse_age(value: str) -> timedelta:
+    # "90s", "15m", "2h", "7d"
+    match = DURATION_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Ожидается длительность вида 15m, 2h, 7d: {value}")
+    amount, unit = match.groups()
+    return timedelta(**{DURATION_UNITS[unit]: int(amount)})
+
+
+def filter_messages(
+    qs=None,
+    states=None,
+    topic: str | None = None,
+    older_than: timedelta | None = None,
+    newer_than: timedelta | None = None,
+    error_contains: str | None = None,
+):
+    qs = Outbox.objects.all() if qs is None else qs
+    now = timezone.now()
+    if states:
+        qs = qs.filter(state__in=states)
+    if topic:
+        qs = qs.filter(topic=topic)
+    if older_than:
+        qs = qs.filter(created_at__lt=now - older_than)
+    if newer_than:
+        qs = qs.filter(created_at__gte=now - newer_than)
+    if error_contains:
+        qs = qs.filter(error__icontains=error_contains)
+    return qs
+
+
+def backlog_summary(include_sent: bool = False) -> list[dict]:
+    # Без SENT выборка идет по частичному индексу outbox_backlog_idx и не
+    # растет вместе с историей отправленных сообщений.
+    now = timezone.now()
+    qs = Outbox.objects.all()
+    if not include_sent:
+        qs = qs.exclude(state=MessageStatus.SENT)
+    rows = (
+        qs.values("state", "topic")
+        .annotate(count=Count("id"), oldest=Min("created_at"))
+        .order_by("state", "topic")
+    )
+    return [
+        {**row, "age": (now - row["oldest"]) if row["oldest"] else None} for row in rows
+    ]
+
+
+def iter_id_batches(
+    qs, batch_size: int = OUTBOX_OPS_BATCH_SIZE, limit: int | None = None
+):
+    # Keyset-пагинация по id: в памяти только одна пачка id, а строки, которые
+    # изменились и выпали из фильтра, не сдвигают следующие пачки.
+    last_id = None
+    taken = 0
+    while limit is None or taken < limit:
+        size = batch_size if limit is None else min(batch_size, limit - taken)
+        page = qs.order_by("id")
+        if last_id is not None:
+            page = page.filter(id__gt=last_id)
+        ids = list(page.values_list("id", flat=True)[:size])
+        if not ids:
+            return
+        yield ids
+        taken += len(ids)
+        last_id = ids[-1]
+
+
+def throttle(processed: int, started: float, rate: float | None):
+    # rate — сообщений в секунду; ждем, пока средний темп не опустится до него.
+    if not rate:
+        return
+    delay = processed / rate - (time.monotonic() - started)
+    if delay > 0:
+        time.sleep(delay)
+
+
+def requeue_messages(
+    qs,
+    batch_size: int = OUTBOX_OPS_BATCH_SIZE,
+    rate: float | None = None,
+    limit: int | None = None,
+    reset_attempts: bool = True,
+) -> int:
+    # PROCESSING не трогаем: сообщение сейчас отправляет воркер.
+    qs = qs.exclude(state=MessageStatus.PROCESSING)
+    fields = {"state": MessageStatus.PENDING, "error": "", "lease_expires_at": None}
+    if reset_attempts:
+        fields["attempts"] = 0
+
+    started = time.monotonic()
+    processed = 0
+    for ids in iter_id_batches(qs, batch_size, limit):
+        processed += (
+            Outbox.objects.filter(id__in=ids)
+            .exclude(state=MessageStatus.PROCESSING)
+            .update(**fields)
+        )
+        throttle(processed, started, rate)
+    return processed
+
+
+def purge_messages(
+    qs,
+    batch_size: int = OUTBOX_OPS_BATCH_SIZE,
+    rate: float | None = None,
+    limit: int | None = None,
+) -> int:
+    qs = qs.exclude(state=MessageStatus.PROCESSING)
+    started = time.monotonic()
+    processed = 0
+    for ids in iter_id_batches(qs, batch_size, limit):
+        processed += (
+            Outbox.objects.filter(id__in=ids)
+            .exclude(state=MessageStatus.PROCESSING)
+            .delete()[0]
+        )
+        throttle(processed, started, rate)
+    return processed
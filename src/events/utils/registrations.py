@@ -0,0 +1,200 @@
+import codecs
+import csv
+import json
+from uuid import uuid4
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from src.core.metrics import REGISTRATIONS
+from src.events.models import Event, EventRegistration, Outbox
+from src.events.utils.notifications import (
+    confirmation_digest,
+    generate_confirmation_code,
+)
+
+FULL_NAME_MAX_LENGTH = EventRegistration._meta.get_field("full_name").max_length
+EMAIL_MAX_LENGTH = EventRegistration._meta.get_field("email").max_length
+IMPORT_FORMATS = ("csv", "json", "ndjson")
+
+
+def registration_payload(reg: EventRegistration, event: Event, code: str) -> dict:
+    return {
+        "registration_id": str(reg.id),
+        "event_id": str(event.id),
+        "full_name": reg.full_name,
+        "email": reg.email,
+        "confirmation_code": code,
+    }
+
+
+def create_registration(event: Event, full_name: str, email: str) -> EventRegistration:
+    code = generate_confirmation_code()
+    with transaction.atomic():
+        reg = EventRegistration.objects.create(
+            event=event,
+            full_name=full_name,
+            email=email,
+            confirmation_code=confirmation_digest(code),
+        )
+        Outbox.objects.create(
+            topic="registration", payload=registration_payload(reg, event, code)
+        )
+    REGISTRATIONS.inc()
+    return reg
+
+
+def confirm_registration(event_id, email: str, code: str) -> bool:
+    # Один UPDATE по уникальному индексу (event, email): и проверка кода, и
+    # отметка. Повторное подтверждение тем же кодом не меняет confirmed_at.
+    return bool(
+        EventRegistration.objects.filter(
+            event__external_id=event_id,
+            email=email,
+            confirmation_code=confirmation_digest(code),
+        ).update(confirmed_at=Coalesce("confirmed_at", Value(timezone.now())))
+    )
+
+
+def import_format(content_type: str) -> str | None:
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    if content_type == "application/json":
+        return "json"
+    return None
+
+
+def read_rows(stream, fmt: str):
+    # Строки читаются из потока по одной, тело запроса целиком в память не грузится.
+    # Исключение — JSON-массив, для больших файлов нужен CSV или NDJSON.
+    lines = codecs.iterdecode(iter(stream.readline, b""), "utf-8-sig")
+    if fmt == "csv":
+        yield from csv.DictReader(lines)
+    elif fmt == "ndjson":
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+    else:
+        data = json.loads("".join(lines))
+        if not isinstance(data, list):
+            raise ValueError("Ожидается JSON-массив записей")
+        yield from data
+
+
+def validate_row(row) -> tuple[str, str, list[str]]:
+    if not isinstance(row, dict):
+        return "", "", ["Ожидается объект с полями full_name и email"]
+    full_name = str(row.get("full_name") or "").strip()
+    email = str(row.get("email") or "").strip()
+    errors = []
+    if not full_name:
+        errors.append("Не указано имя")
+    elif len(full_name) > FULL_NAME_MAX_LENGTH:
+        errors.append(f"Имя длиннее {FULL_NAME_MAX_LENGTH} символов")
+    try:
+        validate_email(email)
+    except ValidationError:
+        errors.append("Некорректный email")
+    else:
+        if len(email) > EMAIL_MAX_LENGTH:
+            errors.append(f"Email длиннее {EMAIL_MAX_LENGTH} символов")
+    return full_name, email, errors
+
+
+def import_chunk(event: Event, chunk: list[tuple[int, object]]) -> list[dict]:
+    results = {}
+    candidates = {}
+    codes = {}
+    for line, row in chunk:
+        full_name, email, errors = validate_row(row)
+        if errors:
+            results[line] = {
+                "row": line,
+                "email": email,
+                "status": "invalid",
+                "errors": errors,
+            }
+        elif email in candidates:
+            results[line] = {"row": line, "email": email, "status": "duplicate"}
+        else:
+            codes[email] = generate_confirmation_code()
+            candidates[email] = EventRegistration(
+                id=uuid4(),
+                event=event,
+                full_name=full_name,
+                email=email,
+                confirmation_code=confirmation_digest(codes[email]),
+            )
+            results[line] = {"row": line, "email": email, "status": "created"}
+
+    with transaction.atomic():
+        existing = set(
+            EventRegistration.objects.filter(
+                event=event, email__in=list(candidates)
+            ).values_list("email", flat=True)
+        )
+        regs = [reg for email, reg in candidates.items() if email not in existing]
+        # ignore_conflicts на случай параллельной одиночной регистрации: какие
+        # строки реально вставились, проверяется по заранее известным id.
+        EventRegistration.objects.bulk_create(regs, ignore_conflicts=True)
+        inserted = set(
+            EventRegistration.objects.filter(id__in=[r.id for r in regs]).values_list(
+                "id", flat=True
+            )
+        )
+        created = [reg for reg in regs if reg.id in inserted]
+        Outbox.objects.bulk_create(
+            [
+                Outbox(
+                    topic="registration",
+                    payload=registration_payload(reg, event, codes[reg.email]),
+                )
+                for reg in created
+            ]
+        )
+
+    created_emails = {reg.email for reg in created}
+    for result in results.values():
+        if result["status"] == "created" and result["email"] not in created_emails:
+            result["status"] = "duplicate"
+    REGISTRATIONS.inc(len(created))
+    return list(results.values())
+
+
+def import_registrations(event: Event, rows, chunk_size: int):
+    # row — номер записи с 1, без учета заголовка CSV.
+    summary = {status: 0 for status in ("created", "duplicate", "invalid")}
+    chunk = []
+    error = None
+    try:
+        for line, row in enumerate(rows, start=1):
+            chunk.append((line, row))
+            if len(chunk) < chunk_size:
+                continue
+            yield from count_results(import_chunk(event, chunk), summary)
+            chunk = []
+    except (ValueError, csv.Error) as e:
+        error = f"Не удалось прочитать данные: {e}"
+
+    if chunk:
+        yield from count_results(import_chunk(event, chunk), summary)
+    if error:
+        yield {"error": error}
+    yield {"summary": summary}
+
+
+def count_results(results: list[dict], summary: dict):
+    for result in results:
+        summary[result["status"]] += 1
+        yield result
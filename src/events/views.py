@@ -1,16 +1,45 @@
+import io
+import json
 from uuid import UUID
 
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.filters import OrderingFilter
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from src.events.models import Event, EventRegistration, Outbox
-from src.events.serializers import EventRegistrationSerializer, EventSerializer
-from src.events.utils.notifications import generate_confirmation_code
+from src.authz.throttling import ConfirmIPThrottle, ConfirmRegistrationThrottle
+from src.core.settings import (
+    CHANGE_FEED_PAGE_SIZE,
+    EXPORT_CHUNK_SIZE,
+    REGISTRATION_IMPORT_CHUNK_SIZE,
+)
+from src.events.filters import EventFilter
+from src.events.models import Event, EventStatus
+from src.events.serializers import (
+    EventConfirmSerializer,
+    EventRegistrationSerializer,
+    EventSerializer,
+    parse_fields,
+)
+from src.events.utils.changes import change_data, changes_after, parse_cursor
+from src.events.utils.exports import (
+    EVENT_FIELDS,
+    EVENT_HEADER,
+    EXPORT_FORMATS,
+    REGISTRATION_FIELDS,
+    export_response,
+)
+from src.events.utils.registrations import (
+    confirm_registration,
+    create_registration,
+    import_format,
+    import_registrations,
+    read_rows,
+)
 
 
 class EventViewSet(viewsets.ModelViewSet):
@@ -18,9 +47,27 @@ class EventViewSet(viewsets.ModelViewSet):
     queryset = Event.objects.select_related("venue").all().filter(status="open")
     serializer_class = EventSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = {"name": ["exact", "icontains", "istartswith"]}
+    filterset_class = EventFilter
     ordering_fields = ["event_date"]
 
+    def get_sparse_fields(self) -> list[str] | None:
+        # ?fields= сужает и JSON, и SELECT; для записи всегда полный набор.
+        if self.action not in ("list", "retrieve"):
+            return None
+        return parse_fields(
+            self.request.query_params.get("fields"), EventSerializer.Meta.fields
+        )
+
+    def get_queryset(self):
+        return EventSerializer.sparse_queryset(
+            super().get_queryset(), self.get_sparse_fields()
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        if self.get_serializer_class() is EventSerializer:
+            kwargs.setdefault("fields", self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
 
 class EventRegisterView(APIView):
     permission_classes = [IsAuthenticated]
@@ -44,26 +91,11 @@ class EventRegisterView(APIView):
         serializer.is_valid(raise_exception=True)
 
         try:
-            with transaction.atomic():
-                code = generate_confirmation_code()
-
-                reg = EventRegistration.objects.create(
-                    event=event,
-                    full_name=serializer.validated_data["full_name"],
-                    email=serializer.validated_data["email"],
-                    confirmation_code=code,
-                )
-
-                Outbox.objects.create(
-                    topic="registration",
-                    payload={
-                        "registration_id": str(reg.id),
-                        "event_id": str(event.id),
-                        "full_name": reg.full_name,
-                        "email": reg.email,
-                        "confirmation_code": reg.confirmation_code,
-                    },
-                )
+            create_registration(
+                event,
+                full_name=serializer.validated_data["full_name"],
+                email=serializer.validated_data["email"],
+            )
         except IntegrityError:
             return Response(
                 {"detail": "Для этого мероприятия такой email уже зарегистрирован"},
@@ -76,3 +108,158 @@ class EventRegisterView(APIView):
             },
             status=status.HTTP_201_CREATED,
         )
+
+
+class EventConfirmView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ConfirmIPThrottle, ConfirmRegistrationThrottle]
+
+    def post(self, request, event_id: str):
+        try:
+            ext_uuid = UUID(str(event_id))
+        except ValueError:
+            return Response(
+                {"detail": "Мероприятие не найдено. Проверьте id мероприятия"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        serializer = EventConfirmSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Мероприятие отдельно не ищем: неверный код, чужой email и
+        # несуществующее мероприятие неотличимы и стоят один запрос.
+        if not confirm_registration(
+            ext_uuid,
+            email=serializer.validated_data["email"],
+            code=serializer.validated_data["code"],
+        ):
+            return Response(
+                {"detail": "Неверный код подтверждения"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"detail": "Регистрация подтверждена"})
+
+
+class EventRegistrationImportView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, event_id: str):
+        try:
+            event = Event.objects.filter(external_id=UUID(str(event_id))).first()
+        except ValueError:
+            event = None
+
+        if event is None:
+            return Response(
+                {"detail": "Мероприятие не найдено. Проверьте id мероприятия"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if event.status != EventStatus.OPEN:
+            return Response(
+                {"detail": "Регистрация возможна только на открытое мероприятие"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fmt = import_format(request.content_type)
+        if fmt is None:
+            return Response(
+                {
+                    "detail": "Поддерживаются text/csv, application/json и application/x-ndjson"
+                },
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        # Тело читается и обрабатывается пачками по мере отдачи отчета.
+        rows = read_rows(request.stream or io.BytesIO(), fmt)
+        report = import_registrations(event, rows, REGISTRATION_IMPORT_CHUNK_SIZE)
+        return StreamingHttpResponse(
+            (json.dumps(line, ensure_ascii=False) + "\n" for line in report),
+            content_type="application/x-ndjson",
+        )
+
+
+def export_format(request):
+    # ?format= занят DRF под выбор рендерера, поэтому формат выгрузки — ?output=.
+    fmt = request.query_params.get("output", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return None, Response(
+            {"detail": "Параметр output: csv или ndjson"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return fmt, None
+
+
+class EventExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        fmt, error = export_format(request)
+        if error:
+            return error
+
+        filterset = EventFilter(request.query_params, queryset=Event.objects.all())
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (
+            filterset.qs.order_by("event_date", "id")
+            .values_list(*EVENT_FIELDS)
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return export_response(EVENT_HEADER, rows, fmt, "events")
+
+
+class EventRegistrationExportView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, event_id: str):
+        fmt, error = export_format(request)
+        if error:
+            return error
+
+        try:
+            event = Event.objects.filter(external_id=UUID(str(event_id))).first()
+        except ValueError:
+            event = None
+        if event is None:
+            return Response(
+                {"detail": "Мероприятие не найдено. Проверьте id мероприятия"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        rows = (
+            event.registrations.order_by("created_at", "id")
+            .values_list(*REGISTRATION_FIELDS)
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return export_response(
+            REGISTRATION_FIELDS, rows, fmt, f"registrations-{event.external_id}"
+        )
+
+
+class EventChangesView(APIView):
+    # Лента изменений: ?since=<cursor> из прошлого ответа, пустой — с начала.
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            since = parse_cursor(request.query_params.get("since"))
+            limit = int(request.query_params.get("limit", CHANGE_FEED_PAGE_SIZE))
+        except ValueError:
+            return Response(
+                {"detail": "Параметры since и limit должны быть целыми числами"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = max(1, min(limit, CHANGE_FEED_PAGE_SIZE))
+
+        changes = list(changes_after(since, limit + 1))
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        cursor = str(changes[-1].id) if changes else str(since)
+        return Response(
+            {
+                "cursor": cursor,
+                "has_more": has_more,
+                "results": [change_data(change) for change in changes],
+            }
+        )
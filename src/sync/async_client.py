@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import queue
+import threading
+
+import httpx
+
+from src.core.settings import PROVIDER_CONCURRENCY
+from src.sync.http_cache import ProviderCache
+from src.sync.provider import (
+    BACKOFF_CAP,
+    MAX_ATTEMPTS,
+    RETRIABLE_STATUS,
+    backoff,
+    parse_retry_after,
+    provider_headers,
+)
+from src.sync.stats import SyncStats
+
+try:
+    import h2  # noqa: F401
+except ImportError:
+    HTTP2_AVAILABLE = False
+else:
+    HTTP2_AVAILABLE = True
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class AsyncProviderClient:
+    def __init__(
+        self,
+        concurrency: int = PROVIDER_CONCURRENCY,
+        cache: ProviderCache | None = None,
+        stats: SyncStats | None = None,
+    ):
+        self.cache = cache
+        self.stats = stats if stats is not None else SyncStats()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            headers=provider_headers(),
+            timeout=httpx.Timeout(30, connect=5),
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+            follow_redirects=True,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    async def get_json(self, url: str) -> dict | None:
+        cached = self.cache.get(url) if self.cache else None
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                async with self.semaphore:
+                    with self.stats.timer("network"):
+                        resp = await self.client.get(
+                            url, headers=ProviderCache.validators(cached)
+                        )
+            except httpx.HTTPError:
+                await self.wait(backoff(attempt, BACKOFF_CAP))
+                continue
+
+            status = resp.status_code
+
+            if status == 304 and cached:
+                self.stats.count(pages_fetched=1, pages_not_modified=1)
+                return {"results": [], "next": cached["next"], "not_modified": True}
+
+            if status == 429:
+                ra = parse_retry_after(resp.headers.get("Retry-After"))
+                await self.wait(
+                    ra if ra else backoff(attempt, BACKOFF_CAP), rate_limited=True
+                )
+                continue
+
+            if status in RETRIABLE_STATUS:
+                await self.wait(backoff(attempt, BACKOFF_CAP))
+                continue
+
+            if not resp.is_success:
+                logger.warning("Пропускаем URL %s: HTTP %s.", url, status)
+                return None
+
+            self.stats.count(pages_fetched=1, bytes_downloaded=len(resp.content))
+            with self.stats.timer("parse"):
+                data = resp.json()
+            if self.cache:
+                self.cache.store(url, resp.headers, data.get("next"))
+            return data
+
+        logger.warning("Пропускаем URL %s: лимит повторных попыток исчерпан.", url)
+        return None
+
+    async def wait(self, seconds: float, rate_limited: bool = False):
+        self.stats.record_wait(seconds, rate_limited)
+        await asyncio.sleep(seconds)
+
+    async def iter_pages(self, url: str):
+        # Следующая страница запрашивается, пока обрабатывается текущая.
+        pending = asyncio.create_task(self.get_json(url))
+        try:
+            while pending is not None:
+                data = await pending
+                pending = None
+                if not data or not (data.get("results") or data.get("not_modified")):
+                    return
+                if data.get("next"):
+                    pending = asyncio.create_task(self.get_json(data["next"]))
+                if data["results"]:
+                    yield data["results"]
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+
+def iter_provider_events_async(
+    url: str,
+    concurrency: int = PROVIDER_CONCURRENCY,
+    cache: ProviderCache | None = None,
+    stats: SyncStats | None = None,
+):
+    pages = queue.Queue(maxsize=2)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    async def produce():
+        async with AsyncProviderClient(concurrency, cache, stats) as client:
+            async for results in client.iter_pages(url):
+                if not await asyncio.to_thread(put, results):
+                    return
+
+    def run():
+        try:
+            asyncio.run(produce())
+        except Exception as e:
+            put(e)
+        else:
+            put(_DONE)
+
+    thread = threading.Thread(target=run, name="provider-client", daemon=True)
+    thread.start()
+    try:
+        while (page := pages.get()) is not _DONE:
+            if isinstance(page, Exception):
+                raise page
+            yield from page
+    finally:
+        stop.set()
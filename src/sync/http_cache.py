@@ -0,0 +1,81 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+
+
+class ProviderCache:
+    # conditional=False — запуск не шлет условные запросы, а только обновляет
+    # валидаторы: кэш не привязан к БД, и после ее очистки или восстановления
+    # ответы 304 оставили бы страницы незаписанными.
+    def __init__(self, directory, max_bytes: int, max_age: int, conditional=True):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.conditional = conditional
+        self.pending: dict[str, dict] = {}
+
+    def path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def get(self, url: str) -> dict | None:
+        if not self.conditional:
+            return None
+        path = self.path(url)
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url or time.time() - entry["stored_at"] > self.max_age:
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    @staticmethod
+    def validators(entry: dict | None) -> dict:
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, headers, next_url: str | None) -> None:
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        self.pending[url] = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "next": next_url,
+            "stored_at": time.time(),
+        }
+
+    def commit(self) -> None:
+        # Записываем только после коммита транзакции синхронизации, иначе 304
+        # в следующем запуске пропустит страницы, которые так и не попали в БД.
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for url, entry in self.pending.items():
+            self.path(url).write_text(json.dumps(entry))
+        self.pending.clear()
+        self.evict()
+
+    def evict(self) -> None:
+        now = time.time()
+        files = []
+        for path in self.directory.glob("*.json"):
+            stat = path.stat()
+            if now - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
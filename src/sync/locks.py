@@ -0,0 +1,20 @@
+from redis.exceptions import LockError
+
+from src.core.redis_client import get_redis
+from src.core.settings import SYNC_LOCK_TIMEOUT
+
+SYNC_LOCK_KEY = "sync:events:lock"
+
+
+class SyncLock:
+    def __init__(self, timeout: int = SYNC_LOCK_TIMEOUT):
+        self.lock = get_redis().lock(SYNC_LOCK_KEY, timeout=timeout)
+
+    def acquire(self) -> bool:
+        return self.lock.acquire(blocking=False)
+
+    def release(self) -> None:
+        try:
+            self.lock.release()
+        except LockError:
+            pass
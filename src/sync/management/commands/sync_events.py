@@ -1,4 +1,4 @@
-import random
+import cProfile
 import time
 from datetime import datetime
 from uuid import UUID
@@ -8,9 +8,28 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.db.models import Max
 
-from src.core.settings import JWT_TOKEN, PROVIDER_URL
+from src.core.settings import (
+    PROVIDER_CACHE_DIR,
+    PROVIDER_CACHE_MAX_AGE,
+    PROVIDER_CACHE_MAX_BYTES,
+    PROVIDER_CONCURRENCY,
+    PROVIDER_URL,
+)
 from src.events.models import Event, EventStatus, Venue
-from src.sync.models import SyncResult
+from src.events.utils.changes import change_for, record_changes
+from src.sync.async_client import iter_provider_events_async
+from src.sync.http_cache import ProviderCache
+from src.sync.locks import SyncLock
+from src.sync.models import SyncMode, SyncResult, SyncStatus
+from src.sync.provider import (
+    BACKOFF_CAP,
+    MAX_ATTEMPTS,
+    RETRIABLE_STATUS,
+    backoff,
+    parse_retry_after,
+    provider_headers,
+)
+from src.sync.stats import SyncStats
 
 
 def iso_to_dt(value: str) -> datetime | None:
@@ -20,48 +39,46 @@ def iso_to_dt(value: str) -> datetime | None:
     return datetime.fromisoformat(s)
 
 
-def backoff(attempt: int, backoff_cap) -> float:
-    return min(backoff_cap, (2 ** (attempt - 1)) + random.uniform(0, 0.5))
-
-
-def parse_retry_after(v: str | None) -> int | None:
-    if not v:
-        return None
-    try:
-        return max(1, int(v))
-    except ValueError:
-        return None
-
-
-def iter_provider_events(url: str):
-    RETRIABLE_STATUS = {408, 429, 500, 502, 503, 504}
-    MAX_ATTEMPTS = 6
-    BACKOFF_CAP = 60
-
+def iter_provider_events(
+    url: str, cache: ProviderCache | None = None, stats: SyncStats | None = None
+):
+    stats = stats if stats is not None else SyncStats()
     session = requests.Session()
-    headers = {
-        "Authorization": f"Bearer {JWT_TOKEN}",
-        "Content-Type": "application/json",
-    }
+    headers = provider_headers()
     next_url = url
 
     while next_url:
+        cached = cache.get(next_url) if cache else None
         for attempt in range(1, MAX_ATTEMPTS + 1):
             try:
-                resp = session.get(next_url, headers=headers, timeout=(5, 30))
+                with stats.timer("network"):
+                    resp = session.get(
+                        next_url,
+                        headers={**headers, **ProviderCache.validators(cached)},
+                        timeout=(5, 30),
+                    )
             except requests.RequestException:
-                time.sleep(backoff(attempt, BACKOFF_CAP))
+                delay = backoff(attempt, BACKOFF_CAP)
+                stats.record_wait(delay)
+                time.sleep(delay)
                 continue
 
             status = resp.status_code
 
+            if status == 304 and cached:
+                break
+
             if status == 429:
                 ra = parse_retry_after(resp.headers.get("Retry-After"))
-                time.sleep(ra if ra else backoff(attempt, BACKOFF_CAP))
+                delay = ra if ra else backoff(attempt, BACKOFF_CAP)
+                stats.record_wait(delay, rate_limited=True)
+                time.sleep(delay)
                 continue
 
             if status in RETRIABLE_STATUS:
-                time.sleep(backoff(attempt, BACKOFF_CAP))
+                delay = backoff(attempt, BACKOFF_CAP)
+                stats.record_wait(delay)
+                time.sleep(delay)
                 continue
 
             if 400 <= status < 500:
@@ -81,8 +98,22 @@ def iter_provider_events(url: str):
             print(f"Пропускаем URL {next_url}: лимит повторных попыток исчерпан.")
             break
 
-        data = resp.json()
+        if next_url is None:
+            break
+
+        stats.pages_fetched += 1
+        stats.bytes_downloaded += len(resp.content)
+
+        if resp.status_code == 304:
+            stats.pages_not_modified += 1
+            next_url = cached["next"]
+            continue
+
+        with stats.timer("parse"):
+            data = resp.json()
         results = data.get("results")
+        if cache:
+            cache.store(next_url, resp.headers, data.get("next"))
 
         if results:
             for item in results:
@@ -118,23 +149,78 @@ class Command(BaseCommand):
             help="Синхронизация, начиная с указанной даты (YYYY-MM-DD). "
             "Если не указано, берется по последней дате изменения.",
         )
+        parser.add_argument(
+            "--engine",
+            choices=["sync", "async"],
+            default="sync",
+            help="Клиент провайдера: sync (requests) или async (httpx, HTTP/2)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=PROVIDER_CONCURRENCY,
+            help="Максимум одновременных запросов к провайдеру для async-клиента",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Не использовать кэш страниц провайдера (ETag/Last-Modified)",
+        )
+        parser.add_argument(
+            "--lock",
+            action="store_true",
+            help="Пропустить запуск, если другая синхронизация уже идет (Redis lock)",
+        )
+        parser.add_argument(
+            "--profile",
+            metavar="PATH",
+            help="Сохранить профиль cProfile запуска в файл (смотреть через pstats)",
+        )
 
     def handle(self, *args, **options):
-        do_full = options.get("all")
+        mode = SyncMode.FULL if options.get("all") else SyncMode.INCREMENTAL
+        if not options["lock"]:
+            return self.run_sync(mode, options)
+
+        lock = SyncLock()
+        if not lock.acquire():
+            SyncResult.objects.create(status=SyncStatus.SKIPPED, mode=mode)
+            self.stdout.write(self.style.WARNING("Синхронизация уже идет, пропускаем"))
+            return
+        try:
+            self.run_sync(mode, options)
+        finally:
+            lock.release()
+
+    def run_sync(self, mode: SyncMode, options):
+        if not options["profile"]:
+            return self.sync(mode, options)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(self.sync, mode, options)
+        finally:
+            profiler.dump_stats(options["profile"])
+            self.stdout.write(f"Профиль сохранен в {options['profile']}")
+
+    def sync(self, mode: SyncMode, options):
         since_arg = options.get("since")
+        # Условные запросы — только в инкрементальных запусках по непустой БД.
+        conditional = False
 
-        if do_full:
+        if mode == SyncMode.FULL:
             url = PROVIDER_URL
             self.stdout.write(self.style.NOTICE("Режим: полная синхронизация"))
         else:
             if since_arg:
                 changed_date = since_arg
             else:
-                last_changed = Event.objects.aggregate(m=Max("changed_at"))
+                last_changed = Event.objects.aggregate(m=Max("changed_at"))["m"]
                 changed_date = last_changed.date().isoformat() if last_changed else None
 
             if changed_date:
                 url = f"{PROVIDER_URL}?changed_at={changed_date}"
+                conditional = True
                 self.stdout.write(
                     self.style.NOTICE(f"Инкрементальная синхронизация с {changed_date}")
                 )
@@ -144,10 +230,46 @@ class Command(BaseCommand):
                     self.style.NOTICE("Первая синхронизация: загрузка всех мероприятий")
                 )
 
+        cache = None
+        if PROVIDER_CACHE_DIR and not options["no_cache"]:
+            cache = ProviderCache(
+                PROVIDER_CACHE_DIR,
+                PROVIDER_CACHE_MAX_BYTES,
+                PROVIDER_CACHE_MAX_AGE,
+                conditional,
+            )
+
+        started = time.monotonic()
+        stats = SyncStats()
+
+        try:
+            if options["engine"] == "async":
+                items = iter_provider_events_async(
+                    url, options["concurrency"], cache, stats
+                )
+            else:
+                items = iter_provider_events(url, cache, stats)
+            self.apply_items(items, cache, mode, started, stats)
+        except Exception as e:
+            SyncResult.objects.create(
+                status=SyncStatus.FAILED,
+                mode=mode,
+                duration=time.monotonic() - started,
+                error=str(e)[:1000],
+                **stats.as_fields(),
+            )
+            raise
+
+    def apply_items(
+        self, items, cache, mode: SyncMode, started: float, stats: SyncStats
+    ):
         added, updated = 0, 0
+        changes = []
 
         with transaction.atomic():
-            for item in iter_provider_events(url):
+            for item in items:
+                stats.items_seen += 1
+                db_started = time.perf_counter()
                 try:
                     raw_id = item.get("id")
                     if not raw_id:
@@ -182,21 +304,54 @@ class Command(BaseCommand):
 
                     if created:
                         added += 1
+                        changes.append(change_for(event, created=True))
                         continue
 
                     if changed_at and (
                         event.changed_at is None or changed_at > event.changed_at
                     ):
+                        previous_status = event.status
                         for field, value in event_defaults.items():
                             setattr(event, field, value)
                         event.save(update_fields=list(event_defaults.keys()))
                         updated += 1
+                        changes.append(
+                            change_for(
+                                event, created=False, previous_status=previous_status
+                            )
+                        )
+                    else:
+                        stats.skipped_count += 1
 
                 except Exception as e:
+                    stats.error_count += 1
                     self.stderr.write(self.style.ERROR(f"Ошибка по записи {item}: {e}"))
-
-            SyncResult.objects.create(added_count=added, updated_count=updated)
+                finally:
+                    stats.add_time("db", time.perf_counter() - db_started)
+
+            # Журнал изменений пишется в той же транзакции, что и сами мероприятия.
+            record_changes(changes)
+            SyncResult.objects.create(
+                added_count=added,
+                updated_count=updated,
+                status=SyncStatus.SUCCESS,
+                mode=mode,
+                duration=time.monotonic() - started,
+                **stats.as_fields(),
+            )
+            if cache:
+                transaction.on_commit(cache.commit)
 
         self.stdout.write(
             self.style.SUCCESS(f"Готово. Добавлено: {added}, обновлено: {updated}")
         )
+        self.stdout.write(
+            f"Страниц: {stats.pages_fetched}, записей: {stats.items_seen}, "
+            f"без изменений: {stats.skipped_count}, ошибок: {stats.error_count}, "
+            f"повторов: {stats.retries}, ожиданий по 429: {stats.rate_limit_waits}"
+        )
+        for phase, timing in stats.timings().items():
+            self.stdout.write(
+                f"  {phase}: {timing['total']:.3f} с, "
+                f"p50 {timing['p50'] * 1000:.1f} мс, p95 {timing['p95'] * 1000:.1f} мс"
+            )
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sync", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="syncresult",
+            name="duration",
+            field=models.FloatField(
+                blank=True, null=True, verbose_name="Длительность, с"
+            ),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="error",
+            field=models.TextField(blank=True, default="", verbose_name="Ошибка"),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="mode",
+            field=models.CharField(
+                choices=[("full", "Полная"), ("incremental", "Инкрементальная")],
+                default="incremental",
+                max_length=16,
+                verbose_name="Режим",
+            ),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("success", "Успешно"),
+                    ("failed", "Ошибка"),
+                    ("skipped", "Пропущено"),
+                ],
+                db_index=True,
+                default="success",
+                max_length=16,
+                verbose_name="Результат",
+            ),
+        ),
+    ]
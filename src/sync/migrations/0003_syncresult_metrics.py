@@ -0,0 +1,91 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sync", "0002_syncresult_duration_syncresult_error_syncresult_mode_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="syncresult",
+            name="bytes_downloaded",
+            field=models.PositiveBigIntegerField(
+                default=0, verbose_name="Загружено байт"
+            ),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="db_seconds",
+            field=models.FloatField(default=0, verbose_name="Запись в БД, с"),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="error_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Количество ошибок"
+            ),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="items_seen",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Получено записей"
+            ),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="network_seconds",
+            field=models.FloatField(default=0, verbose_name="Сеть, с"),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="pages_fetched",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Загружено страниц"
+            ),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="parse_seconds",
+            field=models.FloatField(default=0, verbose_name="Разбор ответов, с"),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="rate_limit_wait_seconds",
+            field=models.FloatField(default=0, verbose_name="Ожидание по 429, с"),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="rate_limit_waits",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Ожиданий по 429"
+            ),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="retries",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Повторных запросов"
+            ),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="skipped_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Количество без изменений"
+            ),
+        ),
+        migrations.AddField(
+            model_name="syncresult",
+            name="timings",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="count, total, p50 и p95 по фазам network, wait, parse и db",
+                verbose_name="Тайминги по фазам",
+            ),
+        ),
+    ]
@@ -1,6 +1,17 @@
 from django.db import models
 
 
+class SyncStatus(models.TextChoices):
+    SUCCESS = "success", "Успешно"
+    FAILED = "failed", "Ошибка"
+    SKIPPED = "skipped", "Пропущено"
+
+
+class SyncMode(models.TextChoices):
+    FULL = "full", "Полная"
+    INCREMENTAL = "incremental", "Инкрементальная"
+
+
 class SyncResult(models.Model):
     executed_at = models.DateTimeField(
         auto_now_add=True, db_index=True, verbose_name="Дата и время синхронизации"
@@ -11,6 +22,50 @@ class SyncResult(models.Model):
     updated_count = models.PositiveIntegerField(
         default=0, verbose_name="Количество обновленных"
     )
+    status = models.CharField(
+        max_length=16,
+        choices=SyncStatus.choices,
+        default=SyncStatus.SUCCESS,
+        db_index=True,
+        verbose_name="Результат",
+    )
+    mode = models.CharField(
+        max_length=16,
+        choices=SyncMode.choices,
+        default=SyncMode.INCREMENTAL,
+        verbose_name="Режим",
+    )
+    duration = models.FloatField(null=True, blank=True, verbose_name="Длительность, с")
+    error = models.TextField(blank=True, default="", verbose_name="Ошибка")
+    pages_fetched = models.PositiveIntegerField(
+        default=0, verbose_name="Загружено страниц"
+    )
+    items_seen = models.PositiveIntegerField(default=0, verbose_name="Получено записей")
+    skipped_count = models.PositiveIntegerField(
+        default=0, verbose_name="Количество без изменений"
+    )
+    error_count = models.PositiveIntegerField(
+        default=0, verbose_name="Количество ошибок"
+    )
+    bytes_downloaded = models.PositiveBigIntegerField(
+        default=0, verbose_name="Загружено байт"
+    )
+    retries = models.PositiveIntegerField(default=0, verbose_name="Повторных запросов")
+    rate_limit_waits = models.PositiveIntegerField(
+        default=0, verbose_name="Ожиданий по 429"
+    )
+    rate_limit_wait_seconds = models.FloatField(
+        default=0, verbose_name="Ожидание по 429, с"
+    )
+    network_seconds = models.FloatField(default=0, verbose_name="Сеть, с")
+    parse_seconds = models.FloatField(default=0, verbose_name="Разбор ответов, с")
+    db_seconds = models.FloatField(default=0, verbose_name="Запись в БД, с")
+    timings = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Тайминги по фазам",
+        help_text="count, total, p50 и p95 по фазам network, wait, parse и db",
+    )
 
     class Meta:
         verbose_name = "Результат синхронизации"
@@ -0,0 +1,27 @@
+import random
+
+from src.core.settings import JWT_TOKEN
+
+RETRIABLE_STATUS = {408, 429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 6
+BACKOFF_CAP = 60
+
+
+def provider_headers() -> dict:
+    return {
+        "Authorization": f"Bearer {JWT_TOKEN}",
+        "Content-Type": "application/json",
+    }
+
+
+def backoff(attempt: int, backoff_cap) -> float:
+    return min(backoff_cap, (2 ** (attempt - 1)) + random.uniform(0, 0.5))
+
+
+def parse_retry_after(v: str | None) -> int | None:
+    if not v:
+        return None
+    try:
+        return max(1, int(v))
+    except ValueError:
+        return None
@@ -0,0 +1,95 @@
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+PHASES = ("network", "wait", "parse", "db")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[k]
+
+
+@dataclass
+class SyncStats:
+    pages_fetched: int = 0
+    pages_not_modified: int = 0
+    items_seen: int = 0
+    skipped_count: int = 0
+    error_count: int = 0
+    bytes_downloaded: int = 0
+    retries: int = 0
+    rate_limit_waits: int = 0
+    rate_limit_wait_seconds: float = 0.0
+    samples: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    # async-клиент пишет статистику из своего потока, пока команда в основном
+    # потоке пишет db-замеры: общие поля меняются только под блокировкой.
+    lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    @contextmanager
+    def timer(self, phase: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - started)
+
+    def add_time(self, phase: str, seconds: float):
+        with self.lock:
+            self.samples[phase].append(seconds)
+
+    def count(self, **counters: int):
+        with self.lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def record_wait(self, seconds: float, rate_limited: bool = False):
+        with self.lock:
+            self.retries += 1
+            self.samples["wait"].append(seconds)
+            if rate_limited:
+                self.rate_limit_waits += 1
+                self.rate_limit_wait_seconds += seconds
+
+    def total(self, phase: str) -> float:
+        return sum(self.samples.get(phase, ()))
+
+    def timings(self) -> dict:
+        # Один замер: network - HTTP-запрос, wait - пауза перед повтором,
+        # parse - разбор JSON страницы, db - обработка одной записи.
+        result = {}
+        for phase in PHASES:
+            values = self.samples.get(phase)
+            if not values:
+                continue
+            result[phase] = {
+                "count": len(values),
+                "total": round(sum(values), 6),
+                "p50": round(percentile(values, 50), 6),
+                "p95": round(percentile(values, 95), 6),
+            }
+        return result
+
+    def as_fields(self) -> dict:
+        return {
+            "pages_fetched": self.pages_fetched,
+            "items_seen": self.items_seen,
+            "skipped_count": self.skipped_count,
+            "error_count": self.error_count,
+            "bytes_downloaded": self.bytes_downloaded,
+            "retries": self.retries,
+            "rate_limit_waits": self.rate_limit_waits,
+            "rate_limit_wait_seconds": self.rate_limit_wait_seconds,
+            "network_seconds": self.total("network"),
+            "parse_seconds": self.total("parse"),
+            "db_seconds": self.total("db"),
+            "timings": self.timings(),
+        }
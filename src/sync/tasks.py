@@ -0,0 +1,31 @@
+from celery import shared_task
+from django.core.management import call_command
+
+from src.core.settings import SYNC_OVERLAP_POLICY
+from src.sync.locks import SyncLock
+from src.sync.models import SyncMode, SyncResult, SyncStatus
+
+QUEUE_RETRY_COUNTDOWN = 60
+QUEUE_MAX_RETRIES = 30
+
+
+@shared_task(bind=True, max_retries=QUEUE_MAX_RETRIES)
+def sync_events_task(self, full: bool = False) -> str:
+    lock = SyncLock()
+    if not lock.acquire():
+        # Полный запуск бывает раз в сутки, поэтому он всегда ждет окончания
+        # текущей синхронизации; "skip" действует только на инкрементальные.
+        queue = full or SYNC_OVERLAP_POLICY == "queue"
+        if queue and self.request.retries < self.max_retries:
+            raise self.retry(countdown=QUEUE_RETRY_COUNTDOWN)
+        SyncResult.objects.create(
+            status=SyncStatus.SKIPPED,
+            mode=SyncMode.FULL if full else SyncMode.INCREMENTAL,
+        )
+        return SyncStatus.SKIPPED
+
+    try:
+        call_command("sync_events", all=full)
+    finally:
+        lock.release()
+    return SyncStatus.SUCCESS
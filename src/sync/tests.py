@@ -1 +1,171 @@
-# Create your tests here.
+import tempfile
+import threading
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from benchmarks.fake_provider import make_server
+from src.events.models import Event
+from src.sync.http_cache import ProviderCache
+from src.sync.management.commands import sync_events
+from src.sync.models import SyncMode, SyncResult, SyncStatus
+from src.sync.tasks import QUEUE_MAX_RETRIES, sync_events_task
+
+
+class ProviderCacheTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def cache(self, **kwargs):
+        return ProviderCache(self.directory.name, 1024 * 1024, 3600, **kwargs)
+
+    def test_entries_visible_only_after_commit(self):
+        cache = self.cache()
+        cache.store("http://p/1", {"ETag": '"a"'}, "http://p/2")
+        self.assertIsNone(self.cache().get("http://p/1"))
+
+        cache.commit()
+        entry = self.cache().get("http://p/1")
+        self.assertEqual(entry["next"], "http://p/2")
+        self.assertEqual(ProviderCache.validators(entry), {"If-None-Match": '"a"'})
+
+    def test_unconditional_cache_only_refreshes(self):
+        cache = self.cache()
+        cache.store("http://p/1", {"ETag": '"a"'}, None)
+        cache.commit()
+
+        cache = self.cache(conditional=False)
+        self.assertIsNone(cache.get("http://p/1"))
+        cache.store("http://p/1", {"ETag": '"b"'}, None)
+        cache.commit()
+        self.assertEqual(self.cache().get("http://p/1")["etag"], '"b"')
+
+    def test_evicts_oldest_over_size_limit(self):
+        cache = ProviderCache(self.directory.name, 1, 3600)
+        cache.store("http://p/1", {"ETag": '"a"'}, None)
+        cache.commit()
+        self.assertIsNone(cache.get("http://p/1"))
+
+
+class ProviderServerMixin:
+    def serve_provider(self, **kwargs):
+        self.server = make_server(**kwargs)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        url = f"http://127.0.0.1:{self.server.server_port}/api/events/"
+        for name, value in (
+            ("PROVIDER_URL", url),
+            ("PROVIDER_CACHE_DIR", directory.name),
+        ):
+            patcher = patch.object(sync_events, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def sync(self, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("sync_events", *args, stdout=StringIO())
+        return SyncResult.objects.latest("id")
+
+
+class SyncCacheTests(ProviderServerMixin, TestCase):
+    def setUp(self):
+        self.serve_provider(events=250, page_size=100)
+
+    def test_incremental_sync_uses_conditional_requests(self):
+        self.sync("--all")
+        self.assertEqual(self.sync().items_seen, 250)
+        result = self.sync()
+        self.assertEqual(result.pages_fetched, 3)
+        self.assertEqual(result.items_seen, 0)
+
+    def test_records_counters_and_phase_timings(self):
+        self.sync("--all")
+        result = self.sync("--all")
+        self.assertEqual(
+            (result.pages_fetched, result.items_seen, result.skipped_count),
+            (3, 250, 250),
+        )
+        self.assertEqual(result.error_count, 0)
+        self.assertGreater(result.bytes_downloaded, 0)
+        self.assertEqual(set(result.timings), {"network", "parse", "db"})
+        self.assertEqual(result.timings["network"]["count"], 3)
+        self.assertEqual(result.timings["db"]["count"], 250)
+        self.assertAlmostEqual(
+            result.db_seconds, result.timings["db"]["total"], places=5
+        )
+        self.assertLessEqual(result.timings["db"]["p50"], result.timings["db"]["p95"])
+
+    def test_full_sync_repopulates_flushed_database(self):
+        self.sync("--all")
+        Event.objects.all().delete()
+
+        result = self.sync("--all")
+        self.assertEqual(result.added_count, 250)
+        self.assertEqual(Event.objects.count(), 250)
+
+
+@patch("src.sync.async_client.backoff", lambda *args: 0)
+class AsyncEngineTests(ProviderServerMixin, TestCase):
+    def setUp(self):
+        self.serve_provider(
+            events=250, page_size=50, faults={"503": 0.3}, retry_after=None
+        )
+
+    def test_full_sync_retries_and_counts_pages(self):
+        result = self.sync("--all", "--engine", "async", "--concurrency", "4")
+        self.assertEqual(result.status, SyncStatus.SUCCESS)
+        self.assertEqual(result.added_count, 250)
+        self.assertEqual(Event.objects.count(), 250)
+        self.assertEqual(result.pages_fetched, 5)
+        self.assertEqual(result.retries, self.server.RequestHandlerClass.stats["503"])
+        self.assertGreater(result.retries, 0)
+
+    def test_client_error_page_skipped(self):
+        self.serve_provider(events=10, faults={"404": 1.0})
+        with self.assertLogs("src.sync.async_client", "WARNING") as logs:
+            result = self.sync("--all", "--engine", "async")
+        self.assertIn("HTTP 404", logs.output[0])
+        self.assertEqual(result.status, SyncStatus.SUCCESS)
+        self.assertEqual((result.pages_fetched, result.items_seen), (0, 0))
+        self.assertEqual(result.retries, 0)
+
+    def test_incremental_sync_uses_conditional_requests(self):
+        self.sync("--all", "--engine", "async")
+        result = self.sync("--engine", "async")
+        self.assertEqual(result.pages_fetched, 5)
+        self.assertEqual(result.items_seen, 250)
+        result = self.sync("--engine", "async")
+        self.assertEqual(result.items_seen, 0)
+        self.assertEqual(result.pages_fetched, 5)
+
+
+@patch("src.sync.tasks.call_command")
+@patch("src.sync.tasks.SyncLock")
+class SyncTaskOverlapTests(TestCase):
+    def test_incremental_run_skipped_while_locked(self, lock, call):
+        lock.return_value.acquire.return_value = False
+        sync_events_task.apply(kwargs={"full": False})
+        call.assert_not_called()
+        result = SyncResult.objects.get()
+        self.assertEqual(
+            (result.status, result.mode), (SyncStatus.SKIPPED, SyncMode.INCREMENTAL)
+        )
+
+    def test_full_run_waits_for_lock_under_skip_policy(self, lock, call):
+        lock.return_value.acquire.side_effect = [False, False, True]
+        with patch("src.sync.tasks.SYNC_OVERLAP_POLICY", "skip"):
+            sync_events_task.apply(kwargs={"full": True})
+        call.assert_called_once_with("sync_events", all=True)
+        self.assertFalse(SyncResult.objects.exists())
+
+    def test_full_run_recorded_as_skipped_after_retries(self, lock, call):
+        lock.return_value.acquire.return_value = False
+        sync_events_task.apply(kwargs={"full": True})
+        self.assertEqual(lock.return_value.acquire.call_count, QUEUE_MAX_RETRIES + 1)
+        self.assertEqual(SyncResult.objects.get().mode, SyncMode.FULL)
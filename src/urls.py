@@ -19,18 +19,57 @@ from django.contrib import admin
 from django.urls import include, path
 from rest_framework import routers
 
-from src.events.views import EventRegisterView, EventViewSet
+from src.core.metrics import metrics_view
+from src.events.async_views import event_changes_stream, event_list, event_register
+from src.events.views import (
+    EventChangesView,
+    EventConfirmView,
+    EventExportView,
+    EventRegisterView,
+    EventRegistrationExportView,
+    EventRegistrationImportView,
+    EventViewSet,
+)
 
 router = routers.DefaultRouter()
 router.register(r"events", EventViewSet)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("api/auth/", include("src.authz.urls")),
+    path("api/events/export/", EventExportView.as_view(), name="event-export"),
+    path("api/events/changes/", EventChangesView.as_view(), name="event-changes"),
     path(
         "api/events/<event_id>/register/",
         EventRegisterView.as_view(),
         name="event-register",
     ),
+    path(
+        "api/events/<event_id>/confirm/",
+        EventConfirmView.as_view(),
+        name="event-confirm",
+    ),
+    path(
+        "api/events/<event_id>/registrations/import/",
+        EventRegistrationImportView.as_view(),
+        name="event-registrations-import",
+    ),
+    path(
+        "api/events/<event_id>/registrations/export/",
+        EventRegistrationExportView.as_view(),
+        name="event-registrations-export",
+    ),
     path("api/", include(router.urls)),
+    path("api/async/events/", event_list, name="async-event-list"),
+    path(
+        "api/async/events/changes/",
+        event_changes_stream,
+        name="async-event-changes",
+    ),
+    path(
+        "api/async/events/<event_id>/register/",
+        event_register,
+        name="async-event-register",
+    ),
 ]